@@ -0,0 +1,266 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+:Mod: bench
+
+:Synopsis:
+    Benchmark each emlvp pipeline stage on the EML XML documents in tests/data, and on scaled-up copies of
+    them, recording results to JSON. The compare command fails if any stage has regressed beyond a
+    tolerance relative to a baseline recording.
+
+    python benchmarks/bench.py run -o current.json
+    python benchmarks/bench.py compare baseline.json current.json -t 0.25
+
+    The threads command measures how validation of a corpus scales with the threads of emlvp.check_many,
+    relative to processing the same documents sequentially.
+
+    python benchmarks/bench.py threads -n 1,2,4,8
+
+:Author:
+    servilla
+
+:Created:
+    10/18/26
+"""
+import copy
+import json
+from pathlib import Path
+import platform
+import sys
+import tempfile
+import time
+import timeit
+
+import click
+from lxml import etree
+
+from emlvp.batch import check_many
+from emlvp.dereferencer import Dereferencer
+from emlvp.exceptions import EMLVPError
+import emlvp.normalizer as normalizer
+from emlvp.parser import Parser
+from emlvp.pipeline import check_file, nvpd, schema_for
+from emlvp.result_cache import emlvp_version
+from emlvp.schema_registry import registry
+import emlvp.unicode_inspector as ui
+from emlvp.validator import Validator
+
+
+DATA = Path(__file__).resolve().parents[1] / "tests" / "data"
+
+# Minimum duration in seconds of each timing repetition
+MIN_TIME = 0.05
+
+# Entity elements of an EML dataset that are duplicated to scale up a document
+ENTITIES = ("dataTable", "otherEntity", "spatialRaster", "spatialVector", "storedProcedure", "view")
+
+
+def _quietly(stage, *args):
+    try:
+        stage(*args)
+    except EMLVPError:
+        # Invalid documents are timed through to the exception that reports them
+        pass
+
+
+def _nvpd(xml: str):
+    nvpd(xml, dereference=True, fail_fast=False, pretty_print=False, normalize=True)
+
+
+STAGES = {
+    "validate": lambda xml, schema: _quietly(Validator(schema).validate, xml),
+    "parse": lambda xml, schema: _quietly(Parser().parse, xml),
+    "dereference": lambda xml, schema: _quietly(Dereferencer().dereference, xml),
+    "normalize": lambda xml, schema: _quietly(normalizer.normalize, xml),
+    "unicode_list": lambda xml, schema: ui.unicode_list(xml),
+    "nvpd": lambda xml, schema: _quietly(_nvpd, xml),
+}
+
+
+def scale(xml: str, factor: int) -> str:
+    """
+    Scale up an EML XML document by repeating each dataset entity factor times. Identifiers within each
+    copy, and references to them from within the copy, are suffixed so that the document remains valid.
+    :param xml: EML XML document instance as a unicode string
+    :param factor: Number of copies of each entity
+    :return: Scaled EML XML document instance, or None if the document has no entities to repeat
+    """
+    if factor == 1:
+        return xml
+    try:
+        root = etree.fromstring(xml.encode("utf-8"))
+    except etree.XMLSyntaxError:
+        return None
+    dataset = root.find("dataset")
+    if dataset is None:
+        return None
+    entities = [e for e in dataset if e.tag in ENTITIES]
+    if not entities:
+        return None
+    for entity in entities:
+        position = dataset.index(entity)
+        for n in range(1, factor):
+            duplicate = copy.deepcopy(entity)
+            ids = set()
+            for element in duplicate.iter():
+                if element.get("id") is not None:
+                    ids.add(element.get("id"))
+                    element.set("id", f"{element.get('id')}-{n}")
+            for references in duplicate.iter("references"):
+                if references.text in ids:
+                    references.text = f"{references.text}-{n}"
+            dataset.insert(position + n, duplicate)
+    return etree.tostring(root, xml_declaration=True, encoding="UTF-8").decode("utf-8")
+
+
+def measure(stage, xml: str, schema: str, repeat: int) -> float:
+    """
+    Return the best time of one call to a stage.
+    :param stage: Stage callable
+    :param xml: EML XML document instance as a unicode string
+    :param schema: Path to root schema eml.xsd
+    :param repeat: Number of timing repetitions
+    :return: Seconds per call
+    """
+    timer = timeit.Timer(lambda: stage(xml, schema))
+    # Calibrate the number of calls per repetition from a single (warm-up) call
+    number = max(1, int(MIN_TIME / max(timer.timeit(number=1), 1e-9)))
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+@click.group()
+def main():
+    """
+    Benchmark the emlvp pipeline stages
+    """
+
+
+@main.command()
+@click.option("-o", "--output", type=click.Path(dir_okay=False), default=None, help="Write results to JSON file.")
+@click.option("-s", "--scales", default="1,10,50", show_default=True, help="Comma separated scale factors.")
+@click.option("-r", "--repeat", type=click.IntRange(min=1), default=5, show_default=True, help="Timing repetitions.")
+@click.option("--stage", "stages", multiple=True, type=click.Choice(list(STAGES)), help="Stage(s) to benchmark.")
+def run(output: str, scales: str, repeat: int, stages: tuple):
+    """
+    Time each stage on each document and scale
+    """
+    stages = stages or tuple(STAGES)
+    factors = [int(f) for f in scales.split(",")]
+    results = {}
+    for doc in sorted(DATA.glob("*.xml")):
+        original = doc.read_text(encoding="utf-8")
+        try:
+            schema = schema_for(original)
+        except ValueError:
+            continue
+        registry.get(schema)
+        for factor in factors:
+            xml = scale(original, factor)
+            if xml is None:
+                continue
+            for stage in stages:
+                key = f"{stage}/{doc.name}/x{factor}"
+                results[key] = measure(STAGES[stage], xml, schema, repeat)
+                print(f"{key:70} {results[key] * 1000:10.3f} ms")
+
+    recording = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "emlvp": emlvp_version(),
+        "lxml": ".".join(str(v) for v in etree.LXML_VERSION),
+        "libxml2": ".".join(str(v) for v in etree.LIBXML_VERSION),
+        "python": platform.python_version(),
+        "results": results,
+    }
+    if output is not None:
+        Path(output).write_text(json.dumps(recording, indent=2) + "\n", encoding="utf-8")
+
+
+@main.command()
+@click.argument("baseline", type=click.Path(exists=True, dir_okay=False))
+@click.argument("current", type=click.Path(exists=True, dir_okay=False))
+@click.option("-t", "--tolerance", type=float, default=0.25, show_default=True,
+              help="Allowed slowdown as a fraction of the baseline time.")
+def compare(baseline: str, current: str, tolerance: float):
+    """
+    Fail if any stage of CURRENT is slower than BASELINE beyond the tolerance
+    """
+    baseline = json.loads(Path(baseline).read_text(encoding="utf-8"))
+    current = json.loads(Path(current).read_text(encoding="utf-8"))
+    print(
+        f"baseline: emlvp {baseline['emlvp']}, lxml {baseline['lxml']}; "
+        f"current: emlvp {current['emlvp']}, lxml {current['lxml']}"
+    )
+
+    regressions = 0
+    for key, before in baseline["results"].items():
+        after = current["results"].get(key)
+        if after is None:
+            continue
+        ratio = after / before
+        flag = ""
+        if ratio > 1 + tolerance:
+            regressions += 1
+            flag = "REGRESSION"
+        print(f"{key:70} {before * 1000:10.3f} {after * 1000:10.3f} ms {ratio:6.2f}x {flag}")
+
+    print(f"{regressions} regression(s) beyond {tolerance:.0%} tolerance")
+    sys.exit(1 if regressions else 0)
+
+
+@main.command()
+@click.option("-o", "--output", type=click.Path(dir_okay=False), default=None, help="Write results to JSON file.")
+@click.option("-n", "--threads", "counts", default="1,2,4,8", show_default=True, help="Comma separated thread counts.")
+@click.option("-s", "--scale", "factor", type=click.IntRange(min=1), default=5, show_default=True,
+              help="Scale factor of each document.")
+@click.option("-c", "--copies", type=click.IntRange(min=1), default=10, show_default=True,
+              help="Copies of each document in the corpus.")
+@click.option("-r", "--repeat", type=click.IntRange(min=1), default=3, show_default=True, help="Timing repetitions.")
+def threads(output: str, counts: str, factor: int, copies: int, repeat: int):
+    """
+    Time validation of a corpus sequentially and with each number of threads
+    """
+    counts = [int(n) for n in counts.split(",")]
+    with tempfile.TemporaryDirectory() as corpus:
+        paths = []
+        for doc in sorted(DATA.glob("*.xml")):
+            original = doc.read_text(encoding="utf-8")
+            try:
+                registry.get(schema_for(original))
+            except ValueError:
+                continue
+            xml = scale(original, factor) or original
+            for n in range(copies):
+                path = Path(corpus) / f"{doc.stem}-{n}.xml"
+                path.write_text(xml, encoding="utf-8")
+                paths.append(str(path))
+        size = sum(Path(path).stat().st_size for path in paths)
+        print(f"{len(paths)} documents, {size / 2 ** 20:.1f} MiB")
+
+        def sequential():
+            for path in paths:
+                check_file(path)
+
+        timings = {"sequential": min(timeit.repeat(sequential, repeat=repeat, number=1))}
+        for n in counts:
+            timings[f"threads/{n}"] = min(
+                timeit.repeat(lambda: list(check_many(paths, threads=n)), repeat=repeat, number=1)
+            )
+    for key, seconds in timings.items():
+        speedup = timings["sequential"] / seconds
+        print(f"{key:20} {seconds:8.3f} s {len(paths) / seconds:10.1f} docs/s {speedup:6.2f}x")
+
+    recording = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "emlvp": emlvp_version(),
+        "python": platform.python_version(),
+        "documents": len(paths),
+        "bytes": size,
+        "results": timings,
+    }
+    if output is not None:
+        Path(output).write_text(json.dumps(recording, indent=2) + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,3 +12,6 @@
 :Created:
     1/21/23
 """
+from emlvp.batch import check_many, validate_many
+
+__all__ = ["check_many", "validate_many"]
@@ -0,0 +1,188 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+:Mod:
+    batch
+
+:Synopsis:
+    asyncio API for validating many EML XML documents from async code. Documents are read in threads while
+    earlier documents are processed by an executor (by default a pool of worker processes), and results are
+    yielded in order of completion rather than document order:
+
+    async with contextlib.aclosing(emlvp.validate_many(paths, concurrency=4)) as results:
+        async for result in results:
+            ...
+
+    check_many is its synchronous counterpart for a pool of threads, which run in parallel while lxml, having
+    released the GIL, parses and validates; its results are yielded in document order.
+
+:Author:
+    servilla
+
+:Created:
+    10/18/26
+"""
+import asyncio
+import collections
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+import functools
+import os
+from pathlib import Path
+from typing import AsyncIterator, Iterable, Iterator
+
+import daiquiri
+
+from emlvp.document import Member
+from emlvp.pipeline import check, check_file
+from emlvp.result import errors_from, FAILED, Result
+
+
+logger = daiquiri.getLogger(__name__)
+
+
+async def _validate_one(path, executor: Executor, slots: asyncio.Semaphore, options: dict) -> Result:
+    doc = str(path)
+    try:
+        if isinstance(path, Member):
+            xml = path.data
+        else:
+            xml = await asyncio.to_thread(Path(path).read_bytes)
+    except OSError as e:
+        result = Result(doc)
+        result.stages = {"read": FAILED}
+        result.errors = errors_from(e)
+        return result
+    async with slots:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, functools.partial(check, xml, doc=doc, **options))
+
+
+async def validate_many(
+    paths: Iterable,
+    concurrency: int = 0,
+    executor: Executor = None,
+    dereference: bool = False,
+    normalize: bool = False,
+    fail_fast: bool = False,
+    pretty_print: bool = False,
+    normalize_engine: str = "xslt",
+    checks: list = None,
+) -> AsyncIterator[Result]:
+    """
+    Normalize, validate, parse, and dereference EML XML documents, yielding each result as its document
+    finishes. At most concurrency documents are processed at a time, and as many more are read ahead, so that
+    a very large document occupies only one worker while the others continue. Closing the generator (or
+    cancelling the task that iterates it) cancels the documents not yet processed.
+    :param paths: Iterable of EML XML document file paths and archive Member (see emlvp.discovery.discover)
+    :param concurrency: Maximum number of documents processed at a time (0 for one per CPU)
+    :param executor: Executor that processes documents (default is a pool of concurrency worker processes,
+        created for and shut down after this call)
+    :param dereference: Dereference the documents (default is False)
+    :param normalize: Normalize the documents before validating and parsing (default is False)
+    :param fail_fast: Report only the first parser inspection that fails (default is False)
+    :param pretty_print: Pretty print dereferenced EML XML (default is False)
+    :param normalize_engine: Normalization engine, either "xslt" or "native" (default is "xslt")
+    :param checks: Names of the checks to run, from emlvp.pipeline.CHECKS (default is all)
+    :return: Asynchronous generator of the Result of each document (see emlvp.pipeline.check); a document
+        that cannot be read fails at its "read" stage with an error of type OSError (or its subclass)
+    """
+    concurrency = concurrency or os.cpu_count() or 1
+    options = dict(
+        dereference=dereference,
+        normalize=normalize,
+        fail_fast=fail_fast,
+        pretty_print=pretty_print,
+        normalize_engine=normalize_engine,
+        checks=checks,
+    )
+    owned = executor is None
+    if owned:
+        executor = ProcessPoolExecutor(max_workers=concurrency)
+    slots = asyncio.Semaphore(concurrency)
+    # Documents in flight, whether being read, waiting for a slot, or being processed
+    window = concurrency * 2
+    paths = iter(paths)
+    pending = set()
+
+    def submit() -> bool:
+        path = next(paths, None)
+        if path is None:
+            return False
+        pending.add(asyncio.ensure_future(_validate_one(path, executor, slots, options)))
+        return True
+
+    try:
+        while len(pending) < window and submit():
+            pass
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                pending.discard(task)
+                # Keep the window full while the caller handles the result
+                submit()
+                yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        if owned:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+def check_many(
+    paths: Iterable,
+    threads: int = 0,
+    executor: Executor = None,
+    dereference: bool = False,
+    normalize: bool = False,
+    fail_fast: bool = False,
+    pretty_print: bool = False,
+    normalize_engine: str = "xslt",
+    checks: list = None,
+) -> Iterator[Result]:
+    """
+    Normalize, validate, parse, and dereference EML XML documents in a pool of threads, yielding their results
+    in document order. Each thread compiles the schemas it needs once (see emlvp.schema_registry). Closing the
+    generator cancels the documents not yet processed.
+    :param paths: Iterable of EML XML document file paths and archive Member (see emlvp.discovery.discover)
+    :param threads: Number of threads (0 for one per CPU)
+    :param executor: Executor that processes documents (default is a pool of threads threads, created for and
+        shut down after this call)
+    :param dereference: Dereference the documents (default is False)
+    :param normalize: Normalize the documents before validating and parsing (default is False)
+    :param fail_fast: Report only the first parser inspection that fails (default is False)
+    :param pretty_print: Pretty print dereferenced EML XML (default is False)
+    :param normalize_engine: Normalization engine, either "xslt" or "native" (default is "xslt")
+    :param checks: Names of the checks to run, from emlvp.pipeline.CHECKS (default is all)
+    :return: Generator of the Result of each document (see emlvp.pipeline.check_file)
+    """
+    threads = threads or os.cpu_count() or 1
+    options = dict(
+        dereference=dereference,
+        normalize=normalize,
+        fail_fast=fail_fast,
+        pretty_print=pretty_print,
+        normalize_engine=normalize_engine,
+        checks=checks,
+    )
+    owned = executor is None
+    if owned:
+        executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="emlvp")
+    # Bound the number of documents in flight so that very large batches are not submitted all at once
+    window = threads * 2
+    paths = iter(paths)
+    pending = collections.deque()
+    try:
+        for path in paths:
+            pending.append(executor.submit(check_file, path, **options))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+        if owned:
+            executor.shutdown(wait=True, cancel_futures=True)
@@ -17,16 +17,23 @@ import copy
 import daiquiri
 from lxml import etree
 
-from emlvp import exceptions
+from emlvp import document, exceptions
 
 
 logger = daiquiri.getLogger(__name__)
 
+# Expansion states of source elements
+_VISITING = "visiting"
+_EXPANDED = "expanded"
+
 
 class Dereferencer:
     """
     Expands EML XML content by dereferencing "references" element to content defined
     by the "id" attribute of a source element.
+
+    A Dereferencer holds only its options, so one Dereferencer may dereference documents in any number of
+    threads at once. An element tree must not be dereferenced by two threads at once.
     """
 
     def __init__(self, pretty_print=False):
@@ -42,25 +49,86 @@ class Dereferencer:
         :param xml: EML XML document instance as a unicode string.
         :return str: Expanded EML XML.
         """
+        tree = self.dereference_tree(document.parse(xml))
+        return document.tostring(tree, pretty_print=self.pretty_print)
 
-        try:
-            xml = xml.encode("utf-8")
-        except UnicodeEncodeError as e:
-            logger.debug(e)
-            raise exceptions.UTF8Error(e)
-
-        root = etree.fromstring(xml)
+    def dereference_tree(self, tree: etree._ElementTree) -> etree._ElementTree:
+        """
+        Dereferences an already parsed EML XML document instance in place. Source elements are expanded in
+        dependency order, so that references within copied content are resolved as well, and each source is
+        expanded only once before being copied into every element that references it.
+        :param tree: EML XML element tree.
+        :return: Expanded EML XML element tree (the same tree object that was passed in).
+        :raises emlvp.exceptions.MissingReferenceIdError: If a references element has no subject id
+        :raises emlvp.exceptions.CircularReferenceIdError: If the expansion of an id would contain itself
+        """
+        root = tree.getroot()
+
+        index = {}  # id -> first element (sans the root) with the id
+        owned = {None: []}  # id element -> references elements whose nearest id-bearing ancestor it is
+        nested = {None: []}  # id element -> id elements whose nearest id-bearing ancestor it is
+        references_nodes = []
+        stack = []
+        for event, element in etree.iterwalk(root, events=("start", "end")):
+            if event == "end":
+                stack.pop()
+                continue
+            owner = stack[-1] if stack else None
+            if element.tag == "references" and element is not root:
+                owned[owner].append(element)
+                references_nodes.append(element)
+            elif element.get("id") is not None and element is not root:
+                index.setdefault(element.get("id"), element)
+                nested[owner].append(element)
+                owned[element] = []
+                nested[element] = []
+                owner = element
+            stack.append(owner)
+
+        state = {}  # id element -> _VISITING or _EXPANDED
+
+        def source_of(references: etree._Element) -> etree._Element:
+            subject = (references.text or "").strip()
+            if subject not in index:
+                raise exceptions.MissingReferenceIdError(f"Missing references id: {subject}")
+            return index[subject]
+
+        def dependencies(source: etree._Element) -> list:
+            return [source_of(r) for r in owned[source] if r.getparent() is not None] + nested[source]
+
+        def expand(source: etree._Element):
+            # Iterative depth-first expansion so that long reference chains do not exhaust the call stack
+            state[source] = _VISITING
+            pending = [(source, iter(dependencies(source)))]
+            while pending:
+                element, remaining = pending[-1]
+                for dependency in remaining:
+                    if state.get(dependency) is _VISITING:
+                        subject = dependency.get("id")
+                        raise exceptions.CircularReferenceIdError(f"Circular reference id: {subject}")
+                    if dependency not in state:
+                        state[dependency] = _VISITING
+                        pending.append((dependency, iter(dependencies(dependency))))
+                        break
+                else:
+                    pending.pop()
+                    for references in owned[element]:
+                        if references.getparent() is not None:
+                            replace(references)
+                    state[element] = _EXPANDED
+
+        def replace(references: etree._Element):
+            source = source_of(references)
+            parent_node = references.getparent()
+            position = parent_node.index(references)
+            parent_node[position:position + 1] = [copy.deepcopy(child) for child in source]
 
-        references_nodes = root.xpath(".//references")
         for references in references_nodes:
-            source_node = root.xpath(f".//*[@id='{references.text.strip()}']")[0]
-            source_children = source_node.getchildren()
-            parent_node = references.getparent()
-            parent_node.remove(references)
-            n_children = len(source_children)
-            # Add children in reverse to ensure correct order when using E.insert() at position 0
-            for child in range(n_children, 0, -1):
-                replicant = copy.deepcopy(source_children[child - 1])
-                parent_node.insert(0, replicant)
-
-        return etree.tostring(root, pretty_print=self.pretty_print).decode("utf-8")
+            if references.getparent() is None:
+                continue  # Already replaced while expanding a source
+            source = source_of(references)
+            if source not in state:
+                expand(source)
+            replace(references)
+
+        return tree
@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+:Mod:
+    discovery
+
+:Synopsis:
+    Discover the EML XML documents identified by targets: files, directories (optionally searched
+    recursively), and zip or tar archives, whose members are read from the archive rather than extracted to
+    disk. Documents are generated as they are found, so that the full list of a large corpus is never built.
+
+:Author:
+    servilla
+
+:Created:
+    10/18/26
+"""
+from fnmatch import fnmatch
+import hashlib
+import os
+import tarfile
+import zipfile
+
+import daiquiri
+
+from emlvp.document import Member
+
+
+logger = daiquiri.getLogger(__name__)
+
+# File name suffixes of the archives whose members are discovered
+ZIP_SUFFIXES = (".zip",)
+TAR_SUFFIXES = (".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+
+
+def is_archive(path: str) -> bool:
+    """
+    Return True if the file name of a path has a zip or tar archive suffix.
+    :param path: File path
+    :return: Boolean
+    """
+    return path.lower().endswith(ZIP_SUFFIXES + TAR_SUFFIXES)
+
+
+def shard_of(key: str, count: int) -> int:
+    """
+    Return the shard of a document, from a hash of its key that is the same on every machine and run.
+    :param key: Document key (its path relative to its target)
+    :param count: Number of shards
+    :return: Shard number, from 1 to count
+    """
+    digest = hashlib.sha256(key.encode("utf-8", errors="surrogateescape")).digest()
+    return int.from_bytes(digest[:8], "big") % count + 1
+
+
+def _in_shard(key: str, shard: tuple) -> bool:
+    return shard is None or shard_of(key, shard[1]) == shard[0]
+
+
+def _matches(path: str, patterns: tuple) -> bool:
+    # Patterns match either the relative path or the file name
+    name = path.rpartition("/")[2]
+    return any(fnmatch(path, pattern) or fnmatch(name, pattern) for pattern in patterns)
+
+
+def _selected(path: str, include: tuple, exclude: tuple) -> bool:
+    return _matches(path, include) and not _matches(path, exclude)
+
+
+def _walk(top: str, recursive: bool, exclude: tuple):
+    # Generate (path, path relative to top) of the files under top, one directory at a time so that only one
+    # directory is open at a time
+    directories = [(top, "")]
+    while directories:
+        directory, relative = directories.pop()
+        subdirectories = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    path = f"{relative}{entry.name}"
+                    if entry.is_dir(follow_symlinks=False):
+                        if recursive and not _matches(path, exclude):
+                            subdirectories.append((entry.path, f"{path}/"))
+                    elif entry.is_file():
+                        yield entry.path, path
+        except OSError as e:
+            logger.error(f"Cannot read directory {directory}: {e}")
+        # Visit subdirectories in the order found, depth first
+        directories.extend(reversed(subdirectories))
+
+
+def relative_path(doc, targets) -> str:
+    """
+    Return the path of a discovered document relative to the target it was discovered from: its path relative
+    to a directory target, or the file name of a file target, with the member name of an archive member
+    appended to the relative path of its archive. Components that would lead outside the target ("..") are
+    dropped.
+    :param doc: Document file path or archive Member (see discover)
+    :param targets: Iterable of the targets the document was discovered from
+    :return: Relative path, with "/" separators
+    """
+    name = str(doc)
+    relative = os.path.basename(name)
+    for target in targets:
+        if name == target:
+            break
+        if name.startswith(f"{target}/") and os.path.isfile(target):
+            # Member of an archive target
+            relative = f"{os.path.basename(target)}/{name[len(target) + 1:]}"
+            break
+        directory = os.path.join(target, "")
+        if name.startswith(directory):
+            relative = name[len(directory):]
+            break
+    parts = relative.replace(os.sep, "/").split("/")
+    return "/".join(part for part in parts if part not in ("", ".", ".."))
+
+
+def members(
+    archive: str, include: tuple = ("*.xml",), exclude: tuple = (), shard: tuple = None, key: str = None
+):
+    """
+    Generate the EML XML documents in a zip or tar archive, reading each member from the archive. Tar
+    archives, including compressed ones, are read as a stream from start to end. An archive that cannot be
+    read is logged as an error and its remaining members are skipped.
+    :param archive: File path of zip or tar archive
+    :param include: Glob patterns of member names to include
+    :param exclude: Glob patterns of member names to exclude
+    :param shard: Tuple of (shard, number of shards) of the members to generate, whose members are not read
+        (default is all members)
+    :param key: Key of the archive from which member keys are formed (default is the archive path)
+    :return: Generator of Member
+    """
+    key = archive if key is None else key
+    try:
+        if archive.lower().endswith(ZIP_SUFFIXES):
+            with zipfile.ZipFile(archive) as z:
+                for info in z.infolist():
+                    if (
+                        not info.is_dir()
+                        and _selected(info.filename, include, exclude)
+                        and _in_shard(f"{key}/{info.filename}", shard)
+                    ):
+                        yield Member(f"{archive}/{info.filename}", z.read(info))
+        else:
+            with tarfile.open(archive, mode="r|*") as t:
+                for info in t:
+                    if (
+                        info.isfile()
+                        and _selected(info.name, include, exclude)
+                        and _in_shard(f"{key}/{info.name}", shard)
+                    ):
+                        yield Member(f"{archive}/{info.name}", t.extractfile(info).read())
+    except (OSError, EOFError, tarfile.TarError, zipfile.BadZipFile) as e:
+        logger.error(f"Cannot read archive {archive}: {e}")
+
+
+def discover(
+    targets,
+    recursive: bool = False,
+    include: tuple = ("*.xml",),
+    exclude: tuple = (),
+    archives: bool = False,
+    shard: tuple = None,
+):
+    """
+    Generate the EML XML documents identified by the targets. A file target is always a document, unless it is
+    an archive, whose members are the documents. Directory targets are searched for documents, and for
+    archives if requested.
+    :param targets: Iterable of file, archive, and directory paths
+    :param recursive: Search subdirectories of directory targets (default is False)
+    :param include: Glob patterns of the paths (relative to the directory target) or file names of documents
+        to include, also applied to archive member names (default is "*.xml")
+    :param exclude: Glob patterns of the paths or names of documents, archive members, and subdirectories to
+        exclude (default is none)
+    :param archives: Discover the members of archives found in directory targets (default is False)
+    :param shard: Tuple of (shard, number of shards), from (1, N) to (N, N), of the documents to generate. Each
+        document is in exactly one shard, decided by a hash of its path relative to its target (or of the path
+        of a file target as given), so that the same targets are sharded the same way on every machine
+        (default is all documents)
+    :return: Generator of document file paths and archive Member
+    :raises FileNotFoundError: If a target is not a file or directory
+    """
+    for target in targets:
+        if os.path.isfile(target):
+            if is_archive(target):
+                yield from members(target, include, exclude, shard)
+            elif _in_shard(target, shard):
+                yield target
+        elif os.path.isdir(target):
+            for path, relative in _walk(target, recursive, exclude):
+                if archives and is_archive(path):
+                    if not _matches(relative, exclude):
+                        yield from members(path, include, exclude, shard, key=relative)
+                elif _selected(relative, include, exclude) and _in_shard(relative, shard):
+                    yield path
+        else:
+            raise FileNotFoundError(f"Target {target} is not a file or directory")
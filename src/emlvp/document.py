@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+:Mod:
+    document
+
+:Synopsis:
+    Parse an EML XML document instance once into an lxml element tree that is then shared by the
+    normalizer, Validator, Parser, and Dereferencer. Documents are read from files, or are members read from
+    archives (see emlvp.discovery).
+
+:Author:
+    servilla
+
+:Created:
+    10/18/26
+"""
+import mmap
+import os
+import uuid
+
+import daiquiri
+from lxml import etree
+
+from emlvp import exceptions
+from emlvp.parser_pool import pool
+
+
+logger = daiquiri.getLogger(__name__)
+
+
+class Member:
+    """
+    EML XML document read from an archive, named "<archive path>/<member name>".
+    """
+
+    __slots__ = ("name", "data")
+
+    def __init__(self, name: str, data: bytes):
+        """
+        Class init method.
+        :param name: Name of the document, "<archive path>/<member name>"
+        :param data: Content of the document
+        """
+        self.name = name
+        self.data = data
+
+    def __str__(self) -> str:
+        return self.name
+
+    def __repr__(self) -> str:
+        return f"Member({self.name!r})"
+
+
+def read(path, mapped: bool = True):
+    """
+    Memory map an EML XML file, without reading or decoding it, so that its bytes can be passed directly to
+    the XML parser
+    :param path: File path to EML XML document, or archive Member
+    :param mapped: Boolean to indicate if the file is memory mapped rather than read (default is True). Reading
+        a map of a file that another process truncates kills this process with SIGBUS, so files that may be
+        rewritten while being processed (for example, watched files) should be read instead.
+    :return: Read-only memory map of the file (or its bytes if not mapped, or empty bytes if the file is
+        empty), or the content of the archive member
+    """
+    if isinstance(path, Member):
+        return path.data
+    with open(path, "rb") as f:
+        if not mapped:
+            return f.read()
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        # The map remains valid after the file is closed and is released when no longer referenced
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def text(xml) -> str:
+    """
+    Return the unicode string view of an EML XML document instance, as if its file had been read in text mode
+    :param xml: EML XML document instance as a unicode string, or as UTF-8 bytes or memory map
+    :return: EML XML document instance as a unicode string
+    """
+    if isinstance(xml, str):
+        return xml
+    # Translate line endings as universal newlines mode does
+    return str(xml, "utf-8").replace("\r\n", "\n").replace("\r", "\n")
+
+
+def parse(xml) -> etree._ElementTree:
+    """
+    Parse an EML XML document instance into an element tree
+    :param xml: EML XML document instance as a unicode string, or as UTF-8 bytes or memory map (which are
+        parsed without being decoded)
+    :return: EML XML element tree
+    :raises emlvp.exceptions.UTF8Error, emlvp.exceptions.ParserError, emlvp.exceptions.XMLSyntaxError
+    """
+    if isinstance(xml, str):
+        try:
+            xml = xml.encode("utf-8")
+        except UnicodeEncodeError as e:
+            logger.debug(e)
+            raise exceptions.UTF8Error(e)
+
+    try:
+        # Reuse the thread's parser, which reads documents as UTF-8, whatever encoding is declared
+        root = etree.fromstring(xml, pool.get())
+    except etree.ParserError as e:
+        logger.debug(e)
+        raise exceptions.ParserError(e)
+    except etree.XMLSyntaxError as e:
+        logger.debug(e)
+        if e.code == etree.ErrorTypes.ERR_INVALID_ENCODING:
+            # Report invalid UTF-8 as the codec does
+            try:
+                str(xml, "utf-8")
+            except UnicodeDecodeError as u:
+                raise exceptions.UTF8Error(u)
+        raise exceptions.XMLSyntaxError(e)
+
+    return etree.ElementTree(root)
+
+
+def tostring(tree: etree._ElementTree, pretty_print: bool = False) -> str:
+    """
+    Serialize the root element of an EML XML element tree
+    :param tree: EML XML element tree
+    :param pretty_print: Boolean to indicate if EML XML is formatted for viewing
+    :return: EML XML document instance as a unicode string
+    """
+    return etree.tostring(tree.getroot(), pretty_print=pretty_print).decode("utf-8")
+
+
+def write(
+    tree: etree._ElementTree,
+    path: str,
+    pretty_print: bool = False,
+    declaration: str = None,
+    prolog: bool = False,
+):
+    """
+    Serialize an EML XML element tree to a file as UTF-8, incrementally rather than building the document as a
+    string. The file is written under a temporary name in the same directory and then renamed, so that it is
+    replaced atomically and never seen partially written, even by concurrent writers of the same path.
+    :param tree: EML XML element tree
+    :param path: File path to write
+    :param pretty_print: Boolean to indicate if EML XML is formatted for viewing
+    :param declaration: XML declaration written before the document (default is none)
+    :param prolog: Boolean to indicate if the comments and processing instructions preceding and following the
+        root element are written (default is False)
+    :return: None
+    """
+    directory, name = os.path.split(path)
+    temp = os.path.join(directory, f".{name}.{uuid.uuid4().hex}.tmp")
+    # Created with the permissions (subject to umask) of any other new file
+    fd = os.open(temp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            root = tree.getroot()
+            if declaration is not None:
+                f.write(declaration.encode("utf-8"))
+            if prolog:
+                for node in reversed(list(root.itersiblings(preceding=True))):
+                    f.write(etree.tostring(node, pretty_print=pretty_print, encoding="utf-8"))
+            with etree.xmlfile(f, encoding="utf-8") as xf:
+                xf.write(root, pretty_print=pretty_print)
+            if prolog:
+                for node in root.itersiblings():
+                    f.write(etree.tostring(node, pretty_print=pretty_print, encoding="utf-8"))
+        os.replace(temp, path)
+    except BaseException:
+        os.unlink(temp)
+        raise
+
+
+def iterparse(source, events: tuple = ("end",), schema: etree.XMLSchema = None):
+    """
+    Stream an EML XML document instance as (event, element) tuples, discarding each element once its
+    "end" event has been consumed so that memory use stays bounded regardless of document size
+    :param source: File path or binary file object of EML XML document instance
+    :param events: Parser events to generate ("start" and/or "end")
+    :param schema: Optional compiled XML schema to validate against while streaming
+    :return: Generator of (event, element) tuples
+    :raises emlvp.exceptions.ValidationError, emlvp.exceptions.XMLSyntaxError
+    """
+    context = etree.iterparse(source, events=events, schema=schema, **pool.iterparse_options())
+    try:
+        for event, element in context:
+            yield event, element
+            if event == "end":
+                element.clear()
+                # Drop already processed preceding siblings that are still referenced by the parent
+                while element.getprevious() is not None:
+                    del element.getparent()[0]
+    except etree.XMLSyntaxError as e:
+        logger.debug(e)
+        last_error = context.error_log.last_error
+        if last_error is not None and last_error.domain == etree.ErrorDomains.SCHEMASV:
+            raise exceptions.ValidationError(context.error_log)
+        if e.code == etree.ErrorTypes.ERR_INVALID_ENCODING:
+            # Invalid UTF-8, reported as by parse (but with the parser's message, as the bytes are not kept)
+            raise exceptions.UTF8Error(e)
+        raise exceptions.XMLSyntaxError(e)
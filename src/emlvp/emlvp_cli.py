@@ -12,19 +12,48 @@
 :Created:
     1/27/23
 """
+import collections
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+import contextlib
+import io
+import json
 import logging
+import os
 from pathlib import Path
+import re
 import sys
+import threading
+import time
 
 import click
 import daiquiri
 
-from emlvp.dereferencer import Dereferencer
-from emlvp.exceptions import EMLVPError, ValidationError, ParseError, ParserError, XIncludeError, XMLSchemaParseError, XMLSyntaxError
+import emlvp.document as document
+from emlvp.discovery import discover, relative_path
+from emlvp.exceptions import (
+    CircularReferenceIdError,
+    EMLVPError,
+    MissingReferenceIdError,
+    ValidationError,
+    ParseError,
+    ParserError,
+    UTF8Error,
+    XIncludeError,
+    XMLSchemaParseError,
+    XMLSyntaxError,
+)
+import emlvp.generator as generator
 import emlvp.normalizer as normalizer
-from emlvp.parser import Parser
+from emlvp.parser_pool import pool
+from emlvp.pipeline import CHECKS, check_file, nvp_stream, nvpd
+from emlvp.result_cache import ResultCache
+from emlvp.schema_registry import schema_file
+import emlvp.server as server
+from emlvp.sniffer import sniff_version
+from emlvp.timings import NO_TIMINGS, Timings
 import emlvp.unicode_inspector as ui
 from emlvp.validator import Validator
+import emlvp.watcher as watcher
 
 CWD = Path(".").resolve().as_posix()
 LOGFILE = CWD + "/emlvp.log"
@@ -37,6 +66,14 @@ daiquiri.setup(
 )
 logger = daiquiri.getLogger(__name__)
 
+# File size in bytes at or above which documents are validated and parsed in streaming mode
+STREAMING_THRESHOLD = 100 * 1024 * 1024
+# Approximate number of characters buffered by unicode_show between writes
+RENDER_CHUNK_SIZE = 64 * 1024
+
+# Runs of characters highlighted by unicode_show (codepoints greater than or equal to 127)
+_non_ascii_run = re.compile("[^\x00-\x7e]+")
+
 
 class Style:
     """
@@ -52,60 +89,40 @@ class Style:
     RESET = "\033[0m"
 
 
-def unicode_show(xml: str, unicode: int):
-    lines = xml.split("\n")
-    n = 0
-    for line in lines:
-        n += 1
-        if unicode == 2:
-            print(f"{Style.BLUE}{n:5}{Style.RESET}", end=": ")
-        for c in range(len(line)):
-            i = line[c]
-            if ord(i) >= 127:
-                print(f"{Style.GREEN_BG}{i}{Style.RESET}", end="")
-            else:
-                print(i, end="")
-        print()
+def _highlight(match: re.Match) -> str:
+    return "".join(f"{Style.GREEN_BG}{c}{Style.RESET}" for c in match.group())
 
 
-def nvpd(
-    xml: str, dereference: bool, fail_fast: bool, pretty_print: bool, normalize: bool
-) -> str:
+def unicode_show(xml: str, unicode: int, out=None, color: bool = None):
     """
-    Normalize, validate, parse, and dereference EML XML file(s)
-    :param xml: EML XML file as a unicode string
-    :param dereference: Dereference EML XML file(s) (default is False)
-    :param fail_fast: Exit on first exception encountered (default is False)
-    :param pretty_print: Pretty print output for dereferenced EML XML (default is False)
-    :param normalize: Normalize EML XML file(s) before parsing and validating (default is False)
-    :return: EML XML file, either dereferenced and/or normalized as a unicode string
+    Write EML XML with non-ASCII unicode characters highlighted. Output is built a line at a time, with
+    runs of ASCII characters kept as slices, and written in chunks of about RENDER_CHUNK_SIZE characters.
+    :param xml: EML XML document instance as a unicode string
+    :param unicode: Level of highlighting (1 for characters, 2 for characters and line numbers)
+    :param out: Text stream written to (default is sys.stdout)
+    :param color: Boolean to indicate if output is colored (default is True only if out is a terminal)
+    :return: None
     """
+    if out is None:
+        out = sys.stdout
+    if color is None:
+        color = out.isatty()
 
-    path = Path(__file__).resolve().parent.as_posix()
-
-    if "https://eml.ecoinformatics.org/eml-2.2.0" in xml:
-        schema = path + "/schemas/EML2.2.0/xsd/eml.xsd"
-    elif "eml://ecoinformatics.org/eml-2.1.1" in xml:
-        schema = path + "/schemas/EML2.1.1/eml.xsd"
-    elif "eml://ecoinformatics.org/eml-2.1.0" in xml:
-        schema = path + "/schemas/EML2.1.0/eml.xsd"
-    else:
-        raise ValueError("Cannot determine EML schema")
-
-    if normalize:
-        xml = normalizer.normalize(xml)
-
-    v = Validator(schema)
-    v.validate(xml)
-    parser = Parser(fail_fast=fail_fast)
-    parser.parse(xml)
-    if dereference:
-        d = Dereferencer(pretty_print=pretty_print)
-        xml = d.dereference(xml)
-        v.validate(xml)
-        parser.parse(xml)
-
-    return xml
+    chunk = []
+    size = 0
+    for n, line in enumerate(xml.split("\n"), start=1):
+        if unicode == 2:
+            chunk.append(f"{Style.BLUE}{n:5}{Style.RESET}: " if color else f"{n:5}: ")
+        if color:
+            line = _non_ascii_run.sub(_highlight, line)
+        chunk.append(line)
+        chunk.append("\n")
+        size += len(line)
+        if size >= RENDER_CHUNK_SIZE:
+            out.write("".join(chunk))
+            chunk.clear()
+            size = 0
+    out.write("".join(chunk))
 
 
 def process_one_document(
@@ -117,10 +134,17 @@ def process_one_document(
     verbose: int,
     normalize: bool,
     unicode: int,
+    streaming_threshold: int = STREAMING_THRESHOLD,
+    normalize_engine: str = "xslt",
+    color: bool = None,
+    timings: Timings = NO_TIMINGS,
+    checks: list = None,
+    output: str = None,
+    mapped: bool = True,
 ):
     """
     Process one EML XML document
-    :param doc: File path to EML XML document
+    :param doc: File path to EML XML document, or archive Member
     :param dereference: Dereference EML XML file(s) (default is False)
     :param fail_fast: Exit on first exception encountered (default is False)
     :param list_unicode: List non-ASCII unicode characters, along with unicode data (default is False)
@@ -128,33 +152,72 @@ def process_one_document(
     :param unicode: Highlight non-ASCII unicode characters in EML output (-uu for line numbers)
     :param verbose: Level of output verbosity (0, 1, 2, 3)
     :param normalize: Normalize EML XML file(s) before parsing and validating (default is False)
+    :param streaming_threshold: File size in bytes at or above which the document is validated and parsed
+        in streaming mode, if no option requires the full document (default is STREAMING_THRESHOLD)
+    :param normalize_engine: Normalization engine, either "xslt" or "native" (default is "xslt")
+    :param color: Boolean to indicate if unicode highlighting is colored (default is True only if standard out
+        is a terminal)
+    :param timings: Recorder of the duration of each stage (default is no recording)
+    :param checks: Names of the checks to run, from emlvp.pipeline.CHECKS (default is all)
+    :param output: File path to which dereferenced and/or normalized EML XML is written (default is none)
+    :param mapped: Memory map the file rather than reading it (default is True; see emlvp.document.read)
     :return:
     """
-    try:
-        with open(doc, "r", encoding="utf-8") as f:
-            xml = f.read()
-    except UnicodeDecodeError as e:
-        if verbose >= 0:
-            print(f"{doc}\n{Style.RED}{e}{Style.RESET}\n")
-        raise EMLVPError(e)
+    streaming = (
+        streaming_threshold is not None
+        and not (dereference or normalize or list_unicode or verbose >= 2)
+        and not isinstance(doc, document.Member)
+        and os.path.getsize(doc) >= streaming_threshold
+    )
 
+    xml = None
     try:
-        xml = nvpd(xml, dereference, fail_fast, pretty_print, normalize)
+        # Select the schema from the document prologue before reading and decoding the full document
+        with timings.stage("sniff"):
+            schema = schema_file(sniff_version(doc.data if isinstance(doc, document.Member) else doc))
+        if streaming:
+            nvp_stream(doc, fail_fast, schema=schema, timings=timings, checks=checks)
+        else:
+            with timings.stage("read"):
+                xml = document.read(doc, mapped=mapped)
+            xml = nvpd(
+                xml,
+                dereference,
+                fail_fast,
+                pretty_print,
+                normalize,
+                normalize_engine,
+                schema=schema,
+                timings=timings,
+                checks=checks,
+                output=output,
+            )
+            if verbose >= 2 or list_unicode:
+                if xml is None:
+                    # Written to the output directory
+                    xml = document.read(output)
+                # Build the unicode string view only when output requires it
+                xml = document.text(xml)
         if verbose >= 1:
             print(f"{doc}\n")
             if verbose >= 2:
                 if unicode >= 1:
-                    unicode_show(xml, unicode=unicode)
+                    unicode_show(xml, unicode=unicode, color=color)
                 else:
                     print(xml)
         if list_unicode:
-            unicode_list = ui.unicode_list(xml)
+            with timings.stage("list-unicode"):
+                unicode_list = ui.unicode_list(xml)
             print(f"\n{doc} has {len(unicode_list)} non-ASCII unicode characters")
             for u in unicode_list:
                 print(
                     f"Row: {u[0]}, Col: {u[1]}, Char: {u[2]}, CP: {u[3]}, Name: {u[4]}"
                 )
             print()
+    except UTF8Error as e:
+        if verbose >= 0:
+            print(f"{doc}\n{Style.RED}{e}{Style.RESET}\n")
+        raise EMLVPError(e)
     except ValidationError as e:
         if verbose >= 0:
             print(f"{doc}")
@@ -162,44 +225,471 @@ def process_one_document(
             for error in errors:
                 line = error.line
                 cause = error.message.replace("\n", "\\n")
-                msg = f"Schema validation error: Line {line}, {cause}"
+                if line:
+                    msg = f"Schema validation error: Line {line}, {cause}"
+                else:
+                    # Line numbers are not available from streaming validation
+                    msg = f"Schema validation error: {cause}"
                 print(f"{Style.RED}{msg}{Style.RESET}")
-            if verbose >= 2:
+            if verbose >= 2 and xml is not None:
+                xml = document.text(xml)
                 if unicode:
-                    unicode_show(xml, unicode=unicode)
+                    unicode_show(xml, unicode=unicode, color=color)
                 else:
                     print(xml)
         raise EMLVPError(e)
-    except (ParseError, ParserError, ValueError, XIncludeError, XMLSchemaParseError, XMLSyntaxError) as e:
+    except (
+        CircularReferenceIdError,
+        MissingReferenceIdError,
+        ParseError,
+        ParserError,
+        ValueError,
+        XIncludeError,
+        XMLSchemaParseError,
+        XMLSyntaxError,
+    ) as e:
         if verbose >= 0:
             print(f"{doc}\n{Style.RED}{e}{Style.RESET}\n")
-            if verbose >= 2:
+            if verbose >= 2 and xml is not None:
+                xml = document.text(xml)
                 if unicode:
-                    unicode_show(xml, unicode=unicode)
+                    unicode_show(xml, unicode=unicode, color=color)
                 else:
                     print(xml)
         raise EMLVPError(e)
 
 
+def output_path(doc: str, output_dir: str, targets: tuple = ()):
+    """
+    Return the file path to which the dereferenced and/or normalized EML XML of a document is written
+    :param doc: File path to EML XML document, or archive Member
+    :param output_dir: Output directory, or None
+    :param targets: Targets the document was discovered from, whose subdirectories (and archives) are kept in
+        the output directory
+    :return: File path in the output directory with the path of the document relative to its target (see
+        emlvp.discovery.relative_path), or None
+    """
+    if output_dir is None:
+        return None
+    return os.path.join(output_dir, *relative_path(doc, targets).split("/"))
+
+
+def distinct_outputs(docs, output_dir: str, targets: tuple = ()):
+    """
+    Generate documents whose output files are distinct, exiting if two documents would be written to the same
+    file in the output directory (for example, same-named file targets in different directories)
+    :param docs: Iterable of EML XML document file paths and archive Member
+    :param output_dir: Output directory
+    :param targets: Targets the documents were discovered from
+    :return: Generator of EML XML document file paths and archive Member
+    """
+    written = {}
+    for doc in docs:
+        output = output_path(doc, output_dir, targets)
+        if output in written:
+            logger.error(f"{doc} and {written[output]} would both be written to {output}")
+            sys.exit(1)
+        written[output] = str(doc)
+        yield doc
+
+
+def documents(target: tuple, **kwargs):
+    """
+    Generate the EML XML documents identified by the targets
+    :param target: EML XML files, archives, or directories containing EML XML files
+    :param kwargs: Keyword arguments of emlvp.discovery.discover
+    :return: Generator of EML XML document file paths and archive Member
+    """
+    try:
+        yield from discover(target, **kwargs)
+    except FileNotFoundError as e:
+        logger.error(e)
+        sys.exit(1)
+
+
+def _process_one(doc: str, options: dict) -> bool:
+    """
+    Process one EML XML document, writing its report to standard out
+    :param doc: File path to EML XML document, or archive Member
+    :param options: Keyword arguments of process_one_document, along with "format" to report either as text
+        or as a JSON line of the emlvp.result.Result, "huge_tree" to lift the XML parser limits on document
+        depth and size (see emlvp.parser_pool), "timings" to append a JSON line of stage durations to the
+        report (or to include them in the JSON line result), "profile_dir" to write pstats files of each
+        stage, and "output_dir" and "targets" to write the document's output to the output directory (see
+        output_path) rather than "output"
+    :return: True if the document failed processing
+    """
+    options = dict(options)
+    report_format = options.pop("format", "text")
+    report_timings = options.pop("timings", False)
+    profile_dir = options.pop("profile_dir", None)
+    pool.configure(huge_tree=options.pop("huge_tree", False))
+    output = output_path(doc, options.pop("output_dir", None), options.pop("targets", ()))
+    if output is not None:
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+    if report_timings or profile_dir is not None:
+        timings = Timings(profile_dir=profile_dir, label=str(doc))
+    else:
+        timings = NO_TIMINGS
+
+    if report_format == "jsonl":
+        result = check_file(
+            doc,
+            dereference=options["dereference"],
+            normalize=options["normalize"],
+            fail_fast=options["fail_fast"],
+            pretty_print=options["pretty_print"],
+            normalize_engine=options["normalize_engine"],
+            streaming_threshold=options["streaming_threshold"],
+            timings=None if timings is NO_TIMINGS else timings,
+            checks=options["checks"],
+            output=output,
+            mapped=options.get("mapped", True),
+        )
+        if options["verbose"] < 2:
+            # The dereferenced and/or normalized document is reported only with -vv, as in text reports
+            result.output = None
+        print(result.to_json())
+        if profile_dir is not None:
+            timings.dump_profiles()
+        return not result.valid
+
+    start = time.perf_counter()
+    failed = False
+    try:
+        process_one_document(doc=doc, timings=timings, output=output, **options)
+    except EMLVPError:
+        failed = True
+
+    if report_timings:
+        record = dict(
+            document=str(doc),
+            failed=failed,
+            total=round(time.perf_counter() - start, 6),
+            stages={stage: round(seconds, 6) for stage, seconds in timings.stages.items()},
+        )
+        print(json.dumps(record))
+    if profile_dir is not None:
+        timings.dump_profiles()
+    return failed
+
+
+class _ThreadOutput(io.TextIOBase):
+    """
+    Standard out shared by threads that each capture their own output: text written by a thread while it is
+    capturing goes to its buffer, and any other text to the original standard out.
+    """
+
+    def __init__(self, stdout):
+        """
+        Class init method.
+        :param stdout: Original standard out
+        """
+        super().__init__()
+        self.stdout = stdout
+        self._local = threading.local()
+
+    @contextlib.contextmanager
+    def capture(self, buffer: io.StringIO):
+        """
+        Capture the output of the calling thread in a buffer.
+        :param buffer: Buffer to which the thread's output is written
+        :return: Context manager
+        """
+        self._local.buffer = buffer
+        try:
+            yield buffer
+        finally:
+            self._local.buffer = None
+
+    def write(self, text: str) -> int:
+        buffer = getattr(self._local, "buffer", None)
+        return (self.stdout if buffer is None else buffer).write(text)
+
+    def flush(self):
+        self.stdout.flush()
+
+    def isatty(self) -> bool:
+        return self.stdout.isatty()
+
+
+def _process_one_captured(doc: str, options: dict) -> tuple:
+    """
+    Process one EML XML document in a worker process or thread, capturing its report
+    :param doc: File path to EML XML document, or archive Member
+    :param options: Keyword arguments of process_one_document
+    :return: Tuple of (report, True if the document failed processing)
+    """
+    buffer = io.StringIO()
+    if isinstance(sys.stdout, _ThreadOutput):
+        capture = sys.stdout.capture(buffer)
+    else:
+        capture = contextlib.redirect_stdout(buffer)
+    with capture:
+        failed = _process_one(doc, options)
+    return buffer.getvalue(), failed
+
+
+def process_sequential(docs, options: dict, cache: ResultCache = None):
+    """
+    Process EML XML documents one at a time, writing reports to standard out in document order.
+    :param docs: Iterable of EML XML document file paths
+    :param options: Keyword arguments of process_one_document
+    :param cache: Optional result cache; cached reports are written without re-processing the document
+    :return: Generator of True/False failure flags in document order
+    """
+    for doc in docs:
+        if cache is None:
+            yield _process_one(doc, options)
+            continue
+        key = cache.key(doc, options)
+        result = cache.get(key)
+        if result is None:
+            result = _process_one_captured(doc, options)
+            cache.put(key, *result)
+        report, failed = result
+        sys.stdout.write(report)
+        yield failed
+
+
+def process_parallel(docs, options: dict, jobs: int = 0, cache: ResultCache = None, threads: bool = False):
+    """
+    Process EML XML documents in a pool of worker processes, or of threads of this process. Each worker
+    compiles the schemas it needs once (see emlvp.schema_registry) and reports are written to standard out in
+    document order. Threads share the memory of one process and run in parallel while lxml, which releases
+    the GIL, parses and validates.
+    :param docs: Iterable of EML XML document file paths
+    :param options: Keyword arguments of process_one_document
+    :param jobs: Number of worker processes or threads (0 for one per CPU)
+    :param cache: Optional result cache; cached documents are not submitted to the workers
+    :param threads: Boolean to indicate if the workers are threads rather than processes (default is False)
+    :return: Generator of True/False failure flags in document order; closing the generator cancels
+        outstanding documents
+    """
+    jobs = jobs or os.cpu_count()
+    # Bound the number of queued documents so that very large batches are not submitted all at once
+    window = jobs * 4
+    if threads:
+        executor = ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="emlvp")
+        stdout = sys.stdout
+        sys.stdout = _ThreadOutput(stdout)
+    else:
+        executor = ProcessPoolExecutor(max_workers=jobs)
+    pending = collections.deque()
+
+    def complete():
+        key, future = pending.popleft()
+        report, failed = future.result()
+        if key is not None:
+            cache.put(key, report, failed)
+        sys.stdout.write(report)
+        return failed
+
+    try:
+        for doc in docs:
+            key = None
+            result = None
+            if cache is not None:
+                key = cache.key(doc, options)
+                result = cache.get(key)
+            if result is None:
+                future = executor.submit(_process_one_captured, doc, options)
+            else:
+                key = None
+                future = Future()
+                future.set_result(result)
+            pending.append((key, future))
+            if len(pending) >= window:
+                yield complete()
+        while pending:
+            yield complete()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        if threads:
+            sys.stdout = stdout
+
+
+def process_watched(target: tuple, options: dict, statistics: bool = False, **kwargs):
+    """
+    Process the EML XML documents of the targets, then re-process each document when it is created or
+    modified, until interrupted. Documents are processed in this process, so that compiled schemas stay warm,
+    and the outcome of each document is kept, so that only changed documents are re-processed.
+    :param target: EML XML files or directories containing EML XML files
+    :param options: Keyword arguments of process_one_document
+    :param statistics: Write the number of watched and failing documents after each change
+    :param kwargs: Keyword arguments of emlvp.watcher.watch
+    :return: None
+    """
+    failures = {}  # document -> True if the document failed processing
+    # Watched documents are rewritten while being processed, which a memory map of them does not survive
+    options = dict(options, mapped=False)
+    try:
+        for changed, removed in watcher.watch(target, **kwargs):
+            for doc in removed:
+                del failures[doc]
+            for doc in changed:
+                try:
+                    failures[doc] = _process_one(doc, options)
+                except OSError as e:
+                    # Removed or replaced while being read, and reported again by the next poll if it changed
+                    logger.error(f"Cannot read {doc}: {e}")
+                    failures[doc] = True
+            if statistics:
+                print(f"Documents watched: {len(failures)}, failed validation: {sum(failures.values())}")
+            sys.stdout.flush()
+    except (FileNotFoundError, ValueError) as e:
+        logger.error(e)
+        sys.exit(1)
+    except KeyboardInterrupt:
+        pass
+
+
 help_target = "Either EML XML file or directory containing EML XML file(s)."
+help_recursive = "Search subdirectories of TARGET directories (default is False)."
+help_include = (
+    "Glob pattern of the file names, or paths relative to a TARGET directory, of documents to validate, also "
+    "applied to archive members (may be repeated, default is *.xml)."
+)
+help_exclude = (
+    "Glob pattern of the names or relative paths of documents, archive members, and subdirectories to skip "
+    "(may be repeated)."
+)
+help_archives = (
+    "Also validate the documents in zip and tar archives (.zip, .tar, .tar.gz, .tgz, ...) found in TARGET "
+    "directories, reading them from the archive without extracting them; archive TARGETs are always read."
+)
 help_dereference = "Dereference EML XML file(s) (default is False)."
-help_fail_fast = "Exit on first exception encountered (default is False)."
+help_fail_fast = "Exit on first exception encountered, skipping any remaining documents (default is False)."
 help_list_unicode = "List non-ASCII unicode characters, along with unicode data"
 help_normalize = (
     "Normalize EML XML file(s) before parsing and validating (default is False)."
 )
+help_normalize_engine = (
+    "Normalization engine: the normalize whitespace stylesheet (xslt) or an equivalent, faster "
+    "element tree walk (native) (default is xslt)."
+)
 help_pretty_print = "Pretty print output for dereferenced EML XML (default is False)."
 help_statistics = "Show post processing inspection statistics."
 help_unicode = (
     "Highlight non-ASCII unicode characters in EML output (-uu for line numbers)"
 )
 help_verbose = "Send output to standard out (-v or -vv or -vvv for increasing output)."
+help_streaming_threshold = (
+    "File size in MB at or above which documents are validated and parsed in streaming mode with bounded "
+    "memory, unless dereferencing, normalizing, listing unicode, or -vv output is requested (default is 100)."
+)
+help_jobs = "Number of worker processes used to process documents in parallel (0 for one per CPU, default is 1)."
+help_threads = (
+    "Number of threads used to process documents in parallel in one process, instead of worker processes "
+    "(0 for one per CPU)."
+)
+help_cache = "SQLite file used to cache results so that unchanged documents are not re-processed."
+help_refresh_cache = "Re-process all documents and replace their cached results."
+help_no_cache = "Bypass the result cache given by --cache."
+help_timings = (
+    "Append a JSON line of the duration in seconds of each processing stage to the report of each document "
+    "(bypasses the result cache)."
+)
+help_profile = "Directory to which cProfile statistics of each stage of each document are written."
+help_format = (
+    "Report format: colored text, or JSON Lines (jsonl) with one JSON record per document of its EML version, "
+    "status of each stage, and errors (default is text)."
+)
+help_checks = (
+    f"Comma-separated checks to run, from {', '.join(CHECKS)}: schema is XSD validation, revalidate is "
+    "re-validating and re-parsing dereferenced EML XML, and the others are parser inspections (default is "
+    "all). With --fail-fast, the cheapest selected stage runs first."
+)
+help_output_dir = (
+    "Directory to which dereferenced and/or normalized EML XML is written, as UTF-8, one file per document "
+    "at the document's path relative to its TARGET (requires -d or -n; bypasses the result cache)."
+)
+help_huge_tree = (
+    "Lift the XML parser limits on document depth (256) and text size (10 MB) for very large or deeply nested "
+    "documents."
+)
+help_watch = (
+    "Validate the documents of TARGET, then keep watching TARGET and re-validate each document as soon as it "
+    "is created or modified, until interrupted (Ctrl-C)."
+)
+help_shard = (
+    "Validate only shard i of N (i/N, from 1/N to N/N) of the documents, chosen by a stable hash of each "
+    "document's path relative to its TARGET, so that separate runs of each shard of the same TARGETs validate "
+    "every document exactly once (see emlvp merge)."
+)
 help_version = "Output emlvp version and exit."
+help_count = "Number of documents to generate, with consecutive seeds (default is 1)."
+help_seed = "Seed of the first document (default is 0)."
+help_entities = "Number of dataTable entities (default is 1)."
+help_attributes = "Number of attributes of each entity (default is 10)."
+help_creators = "Number of creators, each with an id (default is 1)."
+help_references = "Number of contacts that reference a creator (default is 0)."
+help_annotations = "Number of annotations that reference an id (default is 0)."
+help_custom_units = "Number of STMML custom units used by attributes (default is 0)."
+help_additional_metadata_size = "Approximate size in characters of additionalMetadata (default is 0)."
+help_depth = "Nesting depth of sections in the abstract (default is 0)."
+help_chain = "Length of a chain of related projects, each referencing the previous one (default is 0)."
+help_duplicate_ids = "Number of additional creators that duplicate an existing creator id (default is 0)."
+help_merge_statistics = "Show the statistics of the merged report."
+help_merge_format = "Report format of the merged report, either text or JSON Lines (default is text)."
+help_host = "Host address to listen on (default is 127.0.0.1, local connections only)."
+help_port = "Port to listen on (default is 8080)."
+help_workers = "Number of warm worker processes (default is 0, one per CPU)."
+help_queue_size = "Number of requests that may wait for a busy worker before more are refused (default is 16)."
+help_max_body = "Maximum size in bytes of a request body (default is 256 MiB)."
 
 CONTEXT_SETTINGS = dict(help_option_names=["-h", "--help"])
+EPILOG = "Other commands: generate, merge, serve. Use 'emlvp COMMAND -h' for help on a command."
+
+
+class DefaultCommandGroup(click.Group):
+    """
+    Command group that runs its default command unless the first argument names one of its commands, so that
+    "emlvp TARGET" validates as before while, for example, "emlvp generate" runs a subcommand.
+    """
+
+    def __init__(self, *args, default_command: str = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.default_command = default_command
 
+    def parse_args(self, ctx, args):
+        if not args or args[0] not in self.commands:
+            args.insert(0, self.default_command)
+        return super().parse_args(ctx, args)
 
-@click.command(context_settings=CONTEXT_SETTINGS)
+
+def _checks(ctx, param, value):
+    # Split a comma-separated --checks list, rejecting unknown checks
+    if value is None:
+        return None
+    checks = [check.strip() for check in value.split(",") if check.strip()]
+    unknown = [check for check in checks if check not in CHECKS]
+    if unknown:
+        raise click.BadParameter(f"unknown check(s) {', '.join(unknown)}; choose from {', '.join(CHECKS)}")
+    return checks
+
+
+def _shard(ctx, param, value):
+    # Parse an i/N --shard into (i, N)
+    if value is None:
+        return None
+    try:
+        shard, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise click.BadParameter(f"{value} is not of the form i/N")
+    if not 1 <= shard <= count:
+        raise click.BadParameter(f"shard {shard} is not from 1 to {count}")
+    return shard, count
+
+
+@click.group(cls=DefaultCommandGroup, default_command="validate", context_settings=CONTEXT_SETTINGS)
+def main():
+    """
+    EML validator and parser
+    """
+
+
+@main.command(context_settings=CONTEXT_SETTINGS, epilog=EPILOG)
 @click.argument("target", nargs=-1)
 @click.option("-d", "--dereference", is_flag=True, default=False, help=help_dereference)
 @click.option("-f", "--fail-fast", is_flag=True, default=False, help=help_fail_fast)
@@ -207,23 +697,71 @@ CONTEXT_SETTINGS = dict(help_option_names=["-h", "--help"])
     "-l", "--list_unicode", is_flag=True, default=False, help=help_list_unicode
 )
 @click.option("-n", "--normalize", is_flag=True, default=False, help=help_normalize)
+@click.option(
+    "--normalize-engine",
+    type=click.Choice(normalizer.ENGINES),
+    default="xslt",
+    help=help_normalize_engine,
+)
 @click.option(
     "-p", "--pretty-print", is_flag=True, default=False, help=help_pretty_print
 )
 @click.option("-s", "--statistics", is_flag=True, default=False, help=help_statistics)
 @click.option("-u", "--unicode", count=True, help=help_unicode)
 @click.option("-v", "--verbose", count=True, help=help_verbose)
+@click.option(
+    "--streaming-threshold",
+    type=click.IntRange(min=0),
+    default=STREAMING_THRESHOLD // (1024 * 1024),
+    help=help_streaming_threshold,
+)
+@click.option("-j", "--jobs", type=click.IntRange(min=0), default=1, help=help_jobs)
+@click.option("-t", "--threads", type=click.IntRange(min=0), default=None, help=help_threads)
+@click.option("--cache", type=click.Path(dir_okay=False), default=None, help=help_cache)
+@click.option("--refresh-cache", is_flag=True, default=False, help=help_refresh_cache)
+@click.option("--no-cache", is_flag=True, default=False, help=help_no_cache)
+@click.option("--timings", is_flag=True, default=False, help=help_timings)
+@click.option("--profile", type=click.Path(file_okay=False), default=None, help=help_profile)
+@click.option("--format", "report_format", type=click.Choice(["text", "jsonl"]), default="text", help=help_format)
+@click.option("-r", "--recursive", is_flag=True, default=False, help=help_recursive)
+@click.option("--include", multiple=True, default=("*.xml",), help=help_include)
+@click.option("--exclude", multiple=True, help=help_exclude)
+@click.option("-a", "--archives", is_flag=True, default=False, help=help_archives)
+@click.option("--checks", callback=_checks, metavar="LIST", default=None, help=help_checks)
+@click.option("-o", "--output-dir", type=click.Path(file_okay=False), default=None, help=help_output_dir)
+@click.option("--huge-tree", is_flag=True, default=False, help=help_huge_tree)
+@click.option("-w", "--watch", is_flag=True, default=False, help=help_watch)
+@click.option("--shard", callback=_shard, metavar="i/N", default=None, help=help_shard)
 @click.option("--version", is_flag=True, default=False, help=help_version)
-def main(
+def validate(
     target: tuple,
     dereference: bool,
     fail_fast: bool,
     list_unicode: bool,
     normalize: bool,
+    normalize_engine: str,
     pretty_print: bool,
     statistics: bool,
     unicode: bool,
     verbose: int,
+    streaming_threshold: int,
+    jobs: int,
+    threads: int,
+    cache: str,
+    refresh_cache: bool,
+    no_cache: bool,
+    timings: bool,
+    profile: str,
+    report_format: str,
+    recursive: bool,
+    include: tuple,
+    exclude: tuple,
+    archives: bool,
+    checks: list,
+    output_dir: str,
+    huge_tree: bool,
+    watch: bool,
+    shard: tuple,
     version: bool,
 ):
     """
@@ -233,7 +771,7 @@ def main(
         3. Dereference references/id into expanded EML XML and re-validate/parse\n
 
     \b
-        TARGET: EML XML file or directory containing EML XML file(s) (may be repeated)
+        TARGET: EML XML file, zip or tar archive, or directory containing EML XML file(s) (may be repeated)
     """
     docs_processed = 0
     docs_with_exceptions = 0
@@ -244,48 +782,254 @@ def main(
         print(v)
         return 0
 
-    for t in target:
-        if Path(t).is_file():
-            try:
-                docs_processed += 1
-                process_one_document(
-                    doc=t,
-                    dereference=dereference,
-                    fail_fast=fail_fast,
-                    list_unicode=list_unicode,
-                    pretty_print=pretty_print,
-                    verbose=verbose,
-                    normalize=normalize,
-                    unicode=unicode,
-                )
-            except EMLVPError:
+    options = dict(
+        dereference=dereference,
+        fail_fast=fail_fast,
+        list_unicode=list_unicode,
+        pretty_print=pretty_print,
+        verbose=verbose,
+        normalize=normalize,
+        unicode=unicode,
+        streaming_threshold=streaming_threshold * 1024 * 1024,
+        normalize_engine=normalize_engine,
+        # Decided here so that reports captured from worker processes are colored like direct output
+        color=sys.stdout.isatty(),
+        format=report_format,
+        checks=checks,
+        output_dir=output_dir,
+        targets=target,
+        huge_tree=huge_tree,
+    )
+    if threads is not None and jobs != 1:
+        raise click.UsageError("--threads and --jobs are mutually exclusive")
+    if output_dir is not None:
+        if not (dereference or normalize):
+            raise click.UsageError("--output-dir requires --dereference or --normalize")
+        os.makedirs(output_dir, exist_ok=True)
+    instrumented = timings or profile is not None
+    if instrumented:
+        options.update(timings=timings, profile_dir=profile)
+
+    if watch:
+        process_watched(target, options, statistics=statistics, recursive=recursive, include=include, exclude=exclude)
+        return 0
+
+    result_cache = None
+    # Timings and profiles are of actual processing, and output is written by processing, so cached results
+    # are not used
+    if cache is not None and not no_cache and not instrumented and output_dir is None:
+        result_cache = ResultCache(cache, refresh=refresh_cache)
+
+    docs = documents(
+        target, recursive=recursive, include=include, exclude=exclude, archives=archives, shard=shard
+    )
+    if output_dir is not None:
+        docs = distinct_outputs(docs, output_dir, target)
+    if threads is not None:
+        results = process_parallel(docs, options, jobs=threads, cache=result_cache, threads=True)
+    elif jobs == 1:
+        results = process_sequential(docs, options, cache=result_cache)
+    else:
+        results = process_parallel(docs, options, jobs=jobs, cache=result_cache)
+
+    try:
+        for failed in results:
+            docs_processed += 1
+            if failed:
                 docs_with_exceptions += 1
-        elif Path(t).is_dir():
-            for tf in Path(t).glob("*.xml"):
-                try:
-                    docs_processed += 1
-                    process_one_document(
-                        doc=str(tf),
-                        dereference=dereference,
-                        fail_fast=fail_fast,
-                        list_unicode=list_unicode,
-                        pretty_print=pretty_print,
-                        verbose=verbose,
-                        normalize=normalize,
-                        unicode=unicode,
-                    )
-                except EMLVPError:
-                    docs_with_exceptions += 1
-        else:
-            logger.error(f"Target {t} is not a file or directory")
-            sys.exit(1)
+                if fail_fast:
+                    results.close()
+                    break
+    finally:
+        if result_cache is not None:
+            result_cache.close()
 
-    if statistics:
+    if statistics and report_format == "jsonl":
+        summary = dict(documents=docs_processed, failed=docs_with_exceptions)
+        if result_cache is not None:
+            summary.update(cache_hits=result_cache.hits, cache_misses=result_cache.misses)
+        if shard is not None:
+            summary.update(shard=f"{shard[0]}/{shard[1]}")
+        print(json.dumps(dict(summary=summary), separators=(",", ":")))
+    elif statistics:
+        if shard is not None:
+            print(f"Shard: {shard[0]}/{shard[1]}")
         print(f"Total documents validated: {docs_processed}")
         print(f"Documents that failed validation: {docs_with_exceptions}")
+        if result_cache is not None:
+            lookups = result_cache.hits + result_cache.misses
+            print(
+                f"Result cache hits: {result_cache.hits} of {lookups} ({result_cache.hit_rate():.1%})"
+            )
 
     return 0
 
 
+@main.command(context_settings=CONTEXT_SETTINGS)
+@click.argument("output", type=click.Path(file_okay=False))
+@click.option("-c", "--count", type=click.IntRange(min=1), default=1, help=help_count)
+@click.option("--seed", type=int, default=0, help=help_seed)
+@click.option("--entities", type=click.IntRange(min=0), default=1, help=help_entities)
+@click.option("--attributes", type=click.IntRange(min=0), default=10, help=help_attributes)
+@click.option("--creators", type=click.IntRange(min=0), default=1, help=help_creators)
+@click.option("--references", type=click.IntRange(min=0), default=0, help=help_references)
+@click.option("--annotations", type=click.IntRange(min=0), default=0, help=help_annotations)
+@click.option("--custom-units", type=click.IntRange(min=0), default=0, help=help_custom_units)
+@click.option(
+    "--additional-metadata-size", type=click.IntRange(min=0), default=0, help=help_additional_metadata_size
+)
+@click.option("--depth", type=click.IntRange(min=0), default=0, help=help_depth)
+@click.option("--chain", type=click.IntRange(min=0), default=0, help=help_chain)
+@click.option("--duplicate-ids", type=click.IntRange(min=0), default=0, help=help_duplicate_ids)
+def generate(output: str, count: int, seed: int, **shape):
+    """
+    Generate synthetic EML 2.2.0 XML documents of a controlled size and shape, validated against the
+    bundled EML 2.2.0 schema\n
+
+    \b
+        OUTPUT: Directory to which the documents are written (created if it does not exist)
+    """
+    os.makedirs(output, exist_ok=True)
+    validator = Validator(schema_file("2.2.0"))
+    invalid = 0
+    # Deeply nested documents are generated on purpose, so they are parsed without the libxml2 depth limit
+    huge_tree = pool.options["huge_tree"]
+    pool.configure(huge_tree=True)
+    try:
+        for n in range(count):
+            xml = generator.generate(seed=seed + n, **shape)
+            doc = f"{output}/synthetic-{seed + n}.xml"
+            Path(doc).write_text(xml, encoding="utf-8")
+            try:
+                validator.validate(xml)
+            except ValidationError as e:
+                invalid += 1
+                print(f"{doc}")
+                for error in e.args[0]:
+                    print(f"{Style.RED}Schema validation error: Line {error.line}, {error.message}{Style.RESET}")
+            except EMLVPError as e:
+                invalid += 1
+                print(f"{doc}\n{Style.RED}{e}{Style.RESET}")
+    finally:
+        pool.configure(huge_tree=huge_tree)
+    print(f"Generated {count} document(s) in {output}, {invalid} not valid against the EML 2.2.0 schema")
+
+
+def _text_report(record: dict, color: bool = True) -> str:
+    """
+    Return the text report of a document from its JSON Lines record, as a run with the text format writes it
+    :param record: JSON Lines record of emlvp.result.Result
+    :param color: Boolean to indicate if errors are colored (default is True)
+    :return: Report, empty if the document is valid
+    """
+    if record["valid"]:
+        return ""
+    red, reset = (Style.RED, Style.RESET) if color else ("", "")
+    errors = record["errors"]
+    if errors[0]["type"] == "ValidationError":
+        lines = [record["document"]]
+        for error in errors:
+            cause = error["message"].replace("\n", "\\n")
+            if error.get("line"):
+                msg = f"Schema validation error: Line {error['line']}, {cause}"
+            else:
+                msg = f"Schema validation error: {cause}"
+            lines.append(f"{red}{msg}{reset}")
+        return "\n".join(lines) + "\n"
+    message = "\n".join(error["message"] for error in errors)
+    return f"{record['document']}\n{red}{message}{reset}\n\n"
+
+
+@main.command(context_settings=CONTEXT_SETTINGS)
+@click.argument("results", nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False))
+@click.option("-s", "--statistics", is_flag=True, default=False, help=help_merge_statistics)
+@click.option(
+    "--format", "report_format", type=click.Choice(["text", "jsonl"]), default="text", help=help_merge_format
+)
+def merge(results: tuple, statistics: bool, report_format: str):
+    """
+    Merge the JSON Lines reports of the shards of a run (emlvp --shard i/N --format jsonl -s) into one report\n
+
+    \b
+        RESULTS: JSON Lines report file of each shard
+
+    Documents are reported in the order of the RESULTS files. A document reported more than once is reported
+    only the first time, and if the shard summaries show a shard missing or merged more than once, the
+    merged report is written but emlvp exits with status 1.
+    """
+    documents = set()
+    failed = 0
+    duplicates = 0
+    # Errors are colored only on a terminal, not in reports written to a file or pipe
+    color = sys.stdout.isatty()
+    shards = collections.defaultdict(list)  # number of shards -> shards merged
+    for path in results:
+        with open(path, "r", encoding="utf-8") as f:
+            for number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    logger.error(f"{path}, line {number}: not a JSON Lines record")
+                    sys.exit(1)
+                if "summary" in record:
+                    if "shard" in record["summary"]:
+                        shard, count = (int(part) for part in record["summary"]["shard"].split("/"))
+                        shards[count].append(shard)
+                    continue
+                if record["document"] in documents:
+                    duplicates += 1
+                    continue
+                documents.add(record["document"])
+                failed += not record["valid"]
+                if report_format == "jsonl":
+                    sys.stdout.write(line if line.endswith("\n") else line + "\n")
+                else:
+                    sys.stdout.write(_text_report(record, color=color))
+
+    if statistics and report_format == "jsonl":
+        print(json.dumps(dict(summary=dict(documents=len(documents), failed=failed)), separators=(",", ":")))
+    elif statistics:
+        print(f"Total documents validated: {len(documents)}")
+        print(f"Documents that failed validation: {failed}")
+
+    consistent = True
+    if duplicates:
+        logger.error(f"{duplicates} document(s) reported more than once")
+        consistent = False
+    if len(shards) > 1:
+        logger.error(f"Shards of runs with different numbers of shards: {sorted(shards)}")
+        consistent = False
+    for count, merged in shards.items():
+        missing = sorted(set(range(1, count + 1)) - set(merged))
+        repeated = sorted(shard for shard in set(merged) if merged.count(shard) > 1)
+        if missing or repeated:
+            logger.error(f"Shards of {count} missing: {missing}, merged more than once: {repeated}")
+            consistent = False
+    if not consistent:
+        sys.exit(1)
+
+
+@main.command(context_settings=CONTEXT_SETTINGS)
+@click.option("--host", default="127.0.0.1", help=help_host)
+@click.option("--port", type=click.IntRange(min=0, max=65535), default=8080, help=help_port)
+@click.option("--workers", type=click.IntRange(min=0), default=0, help=help_workers)
+@click.option("--queue-size", type=click.IntRange(min=0), default=16, help=help_queue_size)
+@click.option("--max-body", type=click.IntRange(min=1), default=server.MAX_BODY_SIZE, help=help_max_body)
+@click.option("--huge-tree", is_flag=True, default=False, help=help_huge_tree)
+def serve(host: str, port: int, workers: int, queue_size: int, max_body: int, huge_tree: bool):
+    """
+    Run a long-running HTTP validation service whose worker processes keep the compiled EML schemas warm\n
+
+    \b
+        POST /validate  EML XML document as the body; query parameters dereference, normalize,
+                        normalize_engine, fail_fast, and pretty_print; returns a JSON result
+        GET  /health    Returns JSON service status
+    """
+    print(f"emlvp serving on http://{host}:{port} (press Ctrl-C to stop)")
+    server.serve(host, port, workers=workers, queue_size=queue_size, max_body_size=max_body, huge_tree=huge_tree)
+
+
 if __name__ == "__main__":
     main()
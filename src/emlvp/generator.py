@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+:Mod:
+    generator
+
+:Synopsis:
+    Generate synthetic, reproducible EML 2.2.0 XML documents of a controlled size and shape for scaling and
+    stress tests of the Validator, Parser, and Dereferencer.
+
+:Author:
+    servilla
+
+:Created:
+    10/18/26
+"""
+import random
+
+import daiquiri
+from lxml import etree
+
+
+logger = daiquiri.getLogger(__name__)
+
+EML = "https://eml.ecoinformatics.org/eml-2.2.0"
+STMML = "http://www.xml-cml.org/schema/stmml-1.2"
+XSI = "http://www.w3.org/2001/XMLSchema-instance"
+SYSTEM = "https://pasta.edirepository.org"
+
+WORDS = (
+    "abundance", "biomass", "canopy", "carbon", "density", "discharge", "elevation", "flux", "growth",
+    "habitat", "lake", "litter", "nitrogen", "plot", "precipitation", "sample", "site", "soil", "species",
+    "stream", "temperature", "transect", "vegetation", "watershed",
+)
+
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def _sub(parent: etree._Element, tag: str, text: str = None, **attributes) -> etree._Element:
+    element = etree.SubElement(parent, tag, attributes)
+    element.text = text
+    return element
+
+
+def _party(parent: etree._Element, tag: str, rng: random.Random, id: str = None) -> etree._Element:
+    party = _sub(parent, tag) if id is None else _sub(parent, tag, id=id, system=SYSTEM)
+    name = _sub(party, "individualName")
+    _sub(name, "givenName", rng.choice(WORDS).title())
+    _sub(name, "surName", rng.choice(WORDS).title())
+    return party
+
+
+def _project(parent: etree._Element, tag: str, rng: random.Random, id: str = None) -> etree._Element:
+    project = _sub(parent, tag) if id is None else _sub(parent, tag, id=id, system=SYSTEM)
+    _sub(project, "title", _text(rng, 4))
+    personnel = _party(project, "personnel", rng)
+    _sub(personnel, "role", "principalInvestigator")
+    return project
+
+
+def _attribute(parent: etree._Element, id: str, rng: random.Random, custom_units: int):
+    attribute = _sub(parent, "attribute", id=id, system=SYSTEM)
+    _sub(attribute, "attributeName", id.replace("-", "_"))
+    _sub(attribute, "attributeDefinition", _text(rng, 8))
+    scale = _sub(attribute, "measurementScale")
+    if rng.random() < 0.5:
+        nonnumeric = _sub(_sub(scale, "nominal"), "nonNumericDomain")
+        _sub(_sub(nonnumeric, "textDomain"), "definition", _text(rng, 4))
+    else:
+        ratio = _sub(scale, "ratio")
+        unit = _sub(ratio, "unit")
+        if custom_units > 0:
+            _sub(unit, "customUnit", f"unit-{rng.randrange(custom_units)}")
+        else:
+            _sub(unit, "standardUnit", "dimensionless")
+        _sub(_sub(ratio, "numericDomain"), "numberType", "real")
+
+
+def generate(
+    entities: int = 1,
+    attributes: int = 10,
+    creators: int = 1,
+    references: int = 0,
+    annotations: int = 0,
+    custom_units: int = 0,
+    additional_metadata_size: int = 0,
+    depth: int = 0,
+    chain: int = 0,
+    duplicate_ids: int = 0,
+    seed: int = 0,
+) -> str:
+    """
+    Generate a synthetic EML 2.2.0 XML document. The same arguments always generate the same document.
+    :param entities: Number of dataTable entities
+    :param attributes: Number of attributes of each entity
+    :param creators: Number of creators, each with an id
+    :param references: Number of contacts that reference a creator
+    :param annotations: Number of annotations (in the annotations element) that reference an id
+    :param custom_units: Number of STMML custom units used by ratio attributes
+    :param additional_metadata_size: Approximate number of characters of additionalMetadata describing the dataset
+    :param depth: Nesting depth of sections in the dataset abstract
+    :param chain: Length of a chain of related projects, each referencing the previous project
+    :param duplicate_ids: Number of additional creators that duplicate an existing creator id
+    :param seed: Seed of the pseudo-random content
+    :return: EML XML document instance as a unicode string
+    """
+    rng = random.Random(seed)
+    nsmap = {"eml": EML, "stmml": STMML, "xsi": XSI}
+    root = etree.Element(f"{{{EML}}}eml", nsmap=nsmap)
+    root.set("packageId", f"synthetic.{seed}.1")
+    root.set("system", SYSTEM)
+    root.set(f"{{{XSI}}}schemaLocation", f"{EML} {EML}/eml.xsd")
+    ids = []
+
+    dataset = _sub(root, "dataset", id="dataset", system=SYSTEM)
+    ids.append("dataset")
+    _sub(dataset, "title", _text(rng, 8))
+    for i in range(creators):
+        _party(dataset, "creator", rng, id=f"creator-{i}")
+        ids.append(f"creator-{i}")
+    for i in range(duplicate_ids):
+        _party(dataset, "creator", rng, id=f"creator-{i % max(creators, 1)}")
+
+    abstract = _sub(dataset, "abstract")
+    section = abstract
+    for _ in range(depth):
+        section = _sub(section, "section")
+        _sub(section, "title", _text(rng, 3))
+    _sub(section, "para", _text(rng, 24))
+
+    if creators > 0:
+        for _ in range(references):
+            contact = _sub(dataset, "contact")
+            _sub(contact, "references", f"creator-{rng.randrange(creators)}", system=SYSTEM)
+    _party(dataset, "contact", rng)
+
+    if chain > 0:
+        project = _project(dataset, "project", rng)
+        for i in range(chain):
+            related = _project(project, "relatedProject", rng, id=f"project-{i}")
+            ids.append(f"project-{i}")
+            if i > 0:
+                previous = _sub(related, "relatedProject")
+                _sub(previous, "references", f"project-{i - 1}", system=SYSTEM)
+
+    for i in range(entities):
+        table = _sub(dataset, "dataTable", id=f"entity-{i}", system=SYSTEM)
+        ids.append(f"entity-{i}")
+        _sub(table, "entityName", f"table_{i}.csv")
+        attribute_list = _sub(table, "attributeList")
+        for j in range(attributes):
+            _attribute(attribute_list, f"attribute-{i}-{j}", rng, custom_units)
+            ids.append(f"attribute-{i}-{j}")
+
+    if annotations > 0:
+        container = _sub(root, "annotations")
+        for i in range(annotations):
+            annotation = _sub(container, "annotation", references=ids[i % len(ids)])
+            _sub(annotation, "propertyURI", "http://purl.obolibrary.org/obo/IAO_0000136", label="is about")
+            _sub(annotation, "valueURI", "http://purl.obolibrary.org/obo/ENVO_00000873", label="freshwater habitat")
+
+    if custom_units > 0:
+        unit_list = _sub(_sub(_sub(root, "additionalMetadata"), "metadata"), f"{{{STMML}}}unitList")
+        for i in range(custom_units):
+            unit = _sub(unit_list, f"{{{STMML}}}unit", id=f"unit-{i}", name=f"unit-{i}", unitType="dimensionless")
+            _sub(unit, f"{{{STMML}}}description", _text(rng, 6))
+
+    if additional_metadata_size > 0:
+        additional_metadata = _sub(root, "additionalMetadata")
+        _sub(additional_metadata, "describes", "dataset")
+        notes = _sub(_sub(additional_metadata, "metadata"), "notes")
+        size = 0
+        while size < additional_metadata_size:
+            note = _sub(notes, "note", _text(rng, 12))
+            size += len(note.text) + len("<note></note>")
+
+    return etree.tostring(root, xml_declaration=True, encoding="UTF-8", pretty_print=True).decode("utf-8")
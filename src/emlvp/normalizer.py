@@ -15,11 +15,14 @@
 :Created:
     2/16/24
 """
+import itertools
+import re
+import threading
 
 import daiquiri
 from lxml import etree
 
-from emlvp import exceptions
+from emlvp import document
 
 
 logger = daiquiri.getLogger(__name__)
@@ -54,18 +57,174 @@ normalize_whitespace = """<xsl:stylesheet version="1.0"
        </xsl:stylesheet>"""
 
 
-def normalize(xml: str) -> str:
+# Elements whose descendant text is not whitespace normalized
+EXCLUDED = frozenset({"markdown", "literalLayout", "objectName", "attributeName", "para"})
+
+ENGINES = ("xslt", "native")
+
+_whitespace = re.compile("[ \t\r\n]+")
+
+
+_local = threading.local()
+
+
+def _stylesheet() -> etree.XSLT:
+    """
+    Return the normalize whitespace stylesheet, compiled once per thread so that threads never share one
+    stylesheet
+    :return: Compiled XSLT stylesheet
+    """
+    if not hasattr(_local, "stylesheet"):
+        _local.stylesheet = etree.XSLT(etree.XML(normalize_whitespace))
+    return _local.stylesheet
+
+
+def _normalize_space(value: str) -> str:
+    # XPath normalize-space(): strip and collapse XML whitespace (space, tab, carriage return, line feed)
+    return _whitespace.sub(" ", value).strip(" ")
+
+
+def normalize(xml: str, engine: str = "xslt") -> str:
     """
     Normalize an EML XML document instance
     :param xml: EML XML document instance as a unicode string
+    :param engine: Normalization engine, either "xslt" or "native" (default is "xslt")
     :return: Normalized EML XML document instance as a unicode string
     """
-    xslt = etree.XSLT(etree.XML(normalize_whitespace))
+    return tostring(normalize_tree(document.parse(xml), engine=engine))
+
+
+def normalize_tree(tree: etree._ElementTree, engine: str = "xslt") -> etree._ElementTree:
+    """
+    Normalize an already parsed EML XML document instance
+    :param tree: EML XML element tree; non-breaking spaces are replaced in place
+    :param engine: Normalization engine, either "xslt" to apply the normalize whitespace stylesheet, or
+        "native" to apply the same rules by walking the element tree (default is "xslt")
+    :return: Normalized EML XML element tree; a new tree for "xslt", the same tree normalized in place
+        for "native"
+    :raises ValueError: If the engine is unknown
+    """
+    if engine == "xslt":
+        _replace_nbsp(tree)
+        return _stylesheet()(tree)
+    elif engine == "native":
+        return _normalize_native(tree)
+    else:
+        raise ValueError(f"Unknown normalize engine: {engine}")
+
+
+def tostring(tree: etree._ElementTree) -> str:
+    """
+    Serialize a normalized EML XML element tree as the normalize whitespace stylesheet output does
+    (XML declaration and indentation)
+    :param tree: Normalized EML XML element tree
+    :return: Normalized EML XML document instance as a unicode string
+    """
+    return '<?xml version="1.0"?>\n' + etree.tostring(tree, pretty_print=True, encoding="unicode")
+
+
+def write(tree: etree._ElementTree, path: str):
+    """
+    Write a normalized EML XML element tree to a file as the normalize whitespace stylesheet output does,
+    incrementally and atomically (see emlvp.document.write)
+    :param tree: Normalized EML XML element tree
+    :param path: File path to write
+    :return: None
+    """
+    document.write(tree, path, pretty_print=True, declaration='<?xml version="1.0"?>\n', prolog=True)
+
+
+def _replace_nbsp(tree: etree._ElementTree):
+    root = tree.getroot()
+    nodes = itertools.chain(
+        root.itersiblings(preceding=True), root.iter(), root.itersiblings()
+    )
+    for node in nodes:
+        if node.text is not None and "\xa0" in node.text:
+            node.text = node.text.replace("\xa0", " ")
+        if node.tail is not None and "\xa0" in node.tail:
+            node.tail = node.tail.replace("\xa0", " ")
+        if isinstance(node.tag, str):
+            for name, value in node.attrib.items():
+                if "\xa0" in value:
+                    node.attrib[name] = value.replace("\xa0", " ")
+
+
+def _normalize_text(text: str, excluded: bool):
+    # Replace non-breaking spaces, then normalize space unless within an excluded element; an
+    # empty result removes the text node as the stylesheet does
+    if text is None:
+        return None
+    text = text.replace("\xa0", " ")
+    if excluded:
+        return text
+    return _normalize_space(text) or None
+
+
+def _normalize_native(tree: etree._ElementTree) -> etree._ElementTree:
+    root = tree.getroot()
+    # The stylesheet output has no DOCTYPE (entities declared in it are already expanded by the parser)
+    tree.docinfo.clear()
+    for node in itertools.chain(root.itersiblings(preceding=True), root.itersiblings()):
+        if node.text is not None:
+            node.text = node.text.replace("\xa0", " ")
+
+    # Stack of flags indicating whether text of the open element is excluded from normalization
+    stack = [False]
+    # Stack of in-scope namespace declarations, and declarations of the next element
+    scopes = [{"xml": "http://www.w3.org/XML/1998/namespace"}]
+    declared = []
+    redeclaring = []
+    for event, node in etree.iterwalk(root, events=("start", "end", "start-ns")):
+        if event == "start-ns":
+            declared.append(node)
+            continue
+        element = node
+        if event == "end":
+            stack.pop()
+            scopes.pop()
+            continue
+        scope = scopes[-1]
+        if declared:
+            if any(scope.get(prefix) == uri for prefix, uri in declared):
+                kept = {prefix: uri for prefix, uri in declared if scope.get(prefix) != uri}
+                redeclaring.append((element, kept))
+            scope = dict(scope)
+            scope.update(declared)
+            declared = []
+        scopes.append(scope)
+
+        parent_excluded = stack[-1]
+        excluded = parent_excluded or element.tag in EXCLUDED
+        stack.append(excluded)
+        element.text = _normalize_text(element.text, excluded)
+        if element is not root:
+            element.tail = _normalize_text(element.tail, parent_excluded)
+        for name, value in element.attrib.items():
+            normalized = _normalize_space(value.replace("\xa0", " "))
+            if normalized != value:
+                element.attrib[name] = normalized
+        # Comments and processing instructions are copied verbatim, but are followed by text of this element
+        for child in element:
+            if not isinstance(child.tag, str):
+                if child.text is not None:
+                    child.text = child.text.replace("\xa0", " ")
+                child.tail = _normalize_text(child.tail, excluded)
+
+    # The stylesheet does not copy namespace declarations that are already in scope
+    for element, nsmap in redeclaring:
+        _redeclare(element, nsmap)
+
+    return tree
 
-    try:
-        normalized = str(xslt(etree.XML(xml.replace("\xa0", " ").encode("utf-8"))))
-    except UnicodeEncodeError as e:
-        logger.debug(e)
-        raise exceptions.UTF8Error(e)
 
-    return normalized
+def _redeclare(element: etree._Element, nsmap: dict):
+    # Replace the element with one declaring only the given namespaces; it is created as a child of the
+    # same parent so that its name, attributes, and moved children resolve to the in-scope declarations
+    parent = element.getparent()
+    replacement = etree.SubElement(parent, element.tag, dict(element.attrib), nsmap=nsmap)
+    parent.insert(parent.index(element), replacement)
+    replacement.text = element.text
+    replacement.tail = element.tail
+    replacement.extend(element)
+    parent.remove(element)
@@ -12,27 +12,280 @@
 :Created:
     1/22/23
 """
+import threading
+
 import daiquiri
 from lxml import etree
 
-from emlvp import exceptions
+from emlvp import document, exceptions
+from emlvp.timings import NO_TIMINGS, Timings
 
 
 logger = daiquiri.getLogger(__name__)
 
 
+# Compiled XPath expressions of the calling thread, as lxml serializes concurrent evaluations of one expression
+_local = threading.local()
+
+
+def _ids(tree: etree._ElementTree) -> list:
+    # Return the id attributes of all elements in document order
+    if not hasattr(_local, "ids"):
+        _local.ids = etree.XPath("//@id", smart_strings=False)
+    return _local.ids(tree)
+
+
+class _Frame:
+    """
+    Open element on the document walk stack.
+    """
+
+    __slots__ = ("tag", "local", "id", "position", "parent", "has_annotation", "is_metadata", "under_metadata")
+
+    def __init__(self, tag: str, id: str, position: int, parent: "_Frame"):
+        self.tag = tag
+        self.local = tag.rpartition("}")[2]
+        self.id = id
+        self.position = position
+        self.parent = parent
+        self.has_annotation = False
+        # "./additionalMetadata/metadata" of the root element, and any of its descendants
+        self.is_metadata = (
+            tag == "metadata"
+            and parent is not None
+            and parent.tag == "additionalMetadata"
+            and parent.parent is not None
+            and parent.parent.parent is None
+        )
+        self.under_metadata = parent is not None and (parent.is_metadata or parent.under_metadata)
+
+
+class DocumentIndex:
+    """
+    Index of the content inspected by the Parser, collected in a single walk of an EML XML document instance:
+    id attributes, references, annotations, custom units, STMML unit definitions, and additionalMetadata
+    describes. Only strings are retained, so the index does not keep any part of the element tree alive.
+    """
+
+    def __init__(self):
+        """
+        Class init method.
+        """
+        self.ids = {}  # id -> (tag, system) of the first element (sans the root) with the id
+        self.duplicate_ids = {}  # Ordered set of ids occurring more than once
+        self.references = []  # (text, system, parent tag if the parent element has an id) of references elements
+        self.custom_units = {}  # Ordered set of customUnit values
+        self.unit_ids = set()  # ids of STMML unit definitions in additionalMetadata
+        self.annotation_parents = []  # (position, tag) of annotation parents without an id
+        self.annotation_references = {}  # Ordered set of annotations/annotation references attributes
+        self.describes = {}  # Ordered set of additionalMetadata describes values
+
+    @classmethod
+    def ids_from_tree(cls, tree: etree._ElementTree) -> "DocumentIndex":
+        """
+        Build an index of only the ids and duplicate ids of an EML XML element tree, from a single scan of its
+        id attributes in C, which costs a fraction of the full walk of from_tree.
+        :param tree: EML XML element tree
+        :return: Document index, with ids mapped to None
+        """
+        index = cls()
+        ids = _ids(tree)
+        if tree.getroot().get("id") is not None:
+            # The id of the root element, first in document order, is not indexed
+            ids = ids[1:]
+        for value in ids:
+            if value in index.ids:
+                index.duplicate_ids[value] = None
+            else:
+                index.ids[value] = None
+        return index
+
+    @classmethod
+    def from_tree(cls, tree: etree._ElementTree) -> "DocumentIndex":
+        """
+        Build the index by walking an EML XML element tree once.
+        :param tree: EML XML element tree
+        :return: Document index
+        """
+        index = cls()
+        index.add_events(etree.iterwalk(tree.getroot(), events=("start", "end")))
+        return index
+
+    def add_events(self, events):
+        """
+        Add the elements of a ("start", "end") event stream to the index.
+        :param events: Iterable of (event, element) tuples as produced by lxml iterwalk or iterparse
+        :return: None
+        """
+        stack = []
+        position = 0
+        for event, element in events:
+            if event == "start":
+                parent = stack[-1] if stack else None
+                frame = _Frame(element.tag, element.get("id"), position, parent)
+                position += 1
+                stack.append(frame)
+                if parent is None:
+                    continue
+                if frame.id is not None:
+                    if frame.id in self.ids:
+                        self.duplicate_ids[frame.id] = None
+                    else:
+                        self.ids[frame.id] = (frame.tag, element.get("system"))
+                if frame.tag == "annotation":
+                    if parent.parent is not None and parent.local != "annotations":
+                        parent.has_annotation = True
+                    if parent.tag == "annotations" and parent.parent is not None:
+                        references = element.get("references")
+                        if references is not None:
+                            self.annotation_references[references] = None
+                if (
+                    frame.local == "unit"
+                    and frame.id is not None
+                    and parent.local == "unitList"
+                    and parent.under_metadata
+                ):
+                    self.unit_ids.add(frame.id)
+            else:
+                frame = stack.pop()
+                parent = frame.parent
+                if parent is not None:
+                    if frame.local == "references":
+                        parent_tag = parent.tag if parent.id is not None else None
+                        self.references.append((element.text, element.get("system"), parent_tag))
+                    elif frame.local == "customUnit":
+                        self.custom_units[element.text] = None
+                    elif frame.tag == "describes" and parent.tag == "additionalMetadata" and parent.parent is not None:
+                        self.describes[element.text] = None
+                    if frame.has_annotation and frame.id is None:
+                        self.annotation_parents.append((frame.position, frame.tag))
+
+
+def _check_duplicate_id(index: DocumentIndex) -> str:
+    # Inspect id attributes in all elements to ensure uniqueness
+    if len(index.duplicate_ids) > 0:
+        return f"Duplicate id(s): {list(index.duplicate_ids)}\n"
+
+
+def _check_references(index: DocumentIndex) -> str:
+    # Inspect references elements for subject ids
+    references_without_ids = []
+    for text, _, _ in index.references:
+        reference = text.strip()
+        if reference not in index.ids:
+            references_without_ids.append(reference)
+    if len(references_without_ids) > 0:
+        return f"Missing references id(s): {references_without_ids}\n"
+
+
+def _check_circular_reference(index: DocumentIndex) -> str:
+    # Inspect for circular references (reference parent elements with id attributes)
+    circular_references = []
+    for text, _, parent_tag in index.references:
+        if parent_tag is not None:
+            circular_references.append(f"{parent_tag}::{text.strip()}")
+    if len(circular_references) > 0:
+        return f"Circular references: {circular_references}\n"
+
+
+def _check_system(index: DocumentIndex) -> str:
+    # Inspect for system attribute consistency
+    inconsistent_systems = []
+    for text, r_system, _ in index.references:
+        reference = text.strip()
+        if reference in index.ids:
+            tag, i_system = index.ids[reference]
+            if r_system != i_system:
+                inconsistent_systems.append(f"{tag}::{reference}")
+    if len(inconsistent_systems) > 0:
+        return "Inconsistent system attribute(s): {inconsistent_systems}\n"
+
+
+def _check_custom_unit(index: DocumentIndex) -> str:
+    # Inspect custom units for STMML definitions
+    missing_custom_unit_ids = [u for u in index.custom_units if u not in index.unit_ids]
+    if len(missing_custom_unit_ids) > 0:
+        return f"Missing custom unit id(s): {missing_custom_unit_ids}\n"
+
+
+def _check_annotation_parent(index: DocumentIndex) -> str:
+    # Inspect parents of annotation elements for subject id (sans the annotations element)
+    missing_annotation_ids = [tag for _, tag in sorted(index.annotation_parents)]
+    if len(missing_annotation_ids) > 0:
+        return f"Missing subject id for annotation parent(s): {missing_annotation_ids}\n"
+
+
+def _check_annotation_references(index: DocumentIndex) -> str:
+    # Inspect references attribute of annotation(s) for subject id
+    missing_annotation_references_ids = [r for r in index.annotation_references if r not in index.ids]
+    if len(missing_annotation_references_ids) > 0:
+        return f"Missing subject id for annotation references: {missing_annotation_references_ids}\n"
+
+
+def _check_describes(index: DocumentIndex) -> str:
+    # Inspect additionalMetadata describes for subject id
+    missing_describes_ids = [d for d in index.describes if d not in index.ids]
+    if len(missing_describes_ids) > 0:
+        return f"Missing additionalMetadata describes subject id: {missing_describes_ids}\n"
+
+
+# Parser inspections in the order they are run and reported
+CHECKS = {
+    "duplicate-id": _check_duplicate_id,
+    "references": _check_references,
+    "circular-reference": _check_circular_reference,
+    "system": _check_system,
+    "custom-unit": _check_custom_unit,
+    "annotation-parent": _check_annotation_parent,
+    "annotation-references": _check_annotation_references,
+    "describes": _check_describes,
+}
+
+# Inspections that need only the ids of the index (see DocumentIndex.ids_from_tree)
+IDS_ONLY_CHECKS = frozenset(["duplicate-id"])
+
+
+def _parse_error(msg: str, failures: dict) -> exceptions.ParseError:
+    e = exceptions.ParseError(msg)
+    # Message of each failed inspection by name, for structured reports (see emlvp.result)
+    e.failures = failures
+    return e
+
+
 class Parser:
     """
     Parses an EML XML document instance inspecting for non-schema related issues. See here for possible
     issues: https://eml.ecoinformatics.org/validation-and-content-references.html
+
+    A Parser holds only its options, so one Parser may parse documents in any number of threads at once
+    (unless its Timings are shared).
     """
 
-    def __init__(self, fail_fast: bool = False):
+    def __init__(self, fail_fast: bool = False, timings: Timings = None, checks=None):
         """
         Class init method.
         :param fail_fast: Boolean to indicate whether parsing should fail immediately
+        :param timings: Recorder of the duration of each inspection (default is no recording)
+        :param checks: Names of the inspections to run, from CHECKS (default is all)
+        :raises ValueError: If an inspection name is unknown
         """
         self.fail_fast = fail_fast
+        self.timings = NO_TIMINGS if timings is None else timings
+        if checks is None:
+            self.checks = tuple(CHECKS)
+        else:
+            unknown = set(checks) - set(CHECKS)
+            if unknown:
+                raise ValueError(f"Unknown Parser inspection(s): {sorted(unknown)}")
+            self.checks = tuple(name for name in CHECKS if name in checks)
+
+    @property
+    def ids_only(self) -> bool:
+        """
+        True if the selected inspections need only the ids of a document, which are indexed far faster than
+        the content needed by the other inspections.
+        """
+        return set(self.checks) <= IDS_ONLY_CHECKS
 
     def parse(self, xml: str):
         """
@@ -41,162 +294,55 @@ class Parser:
         :return: None
         :raises emlvp.exceptions.ParseError: Raises ParseError on any invalid content found
         """
+        self.parse_tree(document.parse(xml))
 
-        try:
-            xml = xml.encode("utf-8")
-        except UnicodeEncodeError as e:
-            logger.debug(e)
-            raise exceptions.UTF8Error(e)
+    def parse_tree(self, tree: etree._ElementTree):
+        """
+        Parses an already parsed EML XML document instance inspecting for non-schema related issues.
+        :param tree: EML XML element tree
+        :return: None
+        :raises emlvp.exceptions.ParseError: Raises ParseError on any invalid content found
+        """
+        if not self.checks:
+            return
+        if self.ids_only:
+            self.inspect(DocumentIndex.ids_from_tree(tree))
+        else:
+            self.inspect(DocumentIndex.from_tree(tree))
 
-        root = etree.fromstring(xml)
+    def parse_stream(self, source):
+        """
+        Parses an EML XML document instance while streaming it from a file, inspecting for non-schema related
+        issues without building the element tree; memory use is bounded by the size of the index.
+        :param source: File path or binary file object of EML XML document instance
+        :return: None
+        :raises emlvp.exceptions.ParseError: Raises ParseError on any invalid content found
+        :raises emlvp.exceptions.XMLSyntaxError: Raises XMLSyntaxError if the document is not well formed
+        """
+        index = DocumentIndex()
+        index.add_events(document.iterparse(source, events=("start", "end")))
+        self.inspect(index)
 
+    def inspect(self, index: DocumentIndex):
+        """
+        Runs the selected inspections against the index of an EML XML document instance.
+        :param index: Document index
+        :return: None
+        :raises emlvp.exceptions.ParseError: Raises ParseError on any invalid content found
+        """
         msg_queue = ""
+        failures = {}
 
-        # Inspect id attributes in all elements to ensure uniqueness
-        id_nodes = root.findall(".//*[@id]")
-        ids = [i.attrib["id"] for i in id_nodes]
-        id_duplicates = set([id for id in ids if ids.count(id) > 1])
-        if len(id_duplicates) > 0:
-            msg_duplicate_id = f"Duplicate id(s): {list(id_duplicates)}\n"
-            msg_queue += msg_duplicate_id
-            logger.debug(msg_duplicate_id)
-            if self.fail_fast:
-                raise exceptions.ParseError(msg_duplicate_id)
-
-        # Remove duplicates
-        ids = set(ids)
-
-        # Inspect references elements for subject ids
-        references_nodes = root.findall(".//{*}references")
-        references = [r.text.strip() for r in references_nodes]
-        missing_reference_id = False
-        references_without_ids = []
-        for reference in references:
-            if reference not in ids:
-                references_without_ids.append(reference)
-                missing_reference_id = True
-        if missing_reference_id:
-            msg_reference = f"Missing references id(s): {references_without_ids}\n"
-            msg_queue += msg_reference
-            logger.debug(msg_reference)
-            if self.fail_fast:
-                raise exceptions.ParseError(msg_reference)
-
-        # Inspect for circular references (reference parent elements with id attributes)
-        has_circular_reference = False
-        circular_references = []
-        for reference in references_nodes:
-            parent = reference.getparent()
-            if parent is not None and "id" in parent.attrib:
-                circular_references.append(f"{parent.tag}::{reference.text.strip()}")
-                has_circular_reference = True
-        if has_circular_reference:
-            msg_circular_references = f"Circular references: {circular_references}\n"
-            msg_queue += msg_circular_references
-            logger.debug(msg_circular_references)
-            if self.fail_fast:
-                raise exceptions.ParseError(msg_circular_references)
-
-        # Inspect for system attribute consistency
-        has_system_inconsistency = False
-        inconsistent_systems = []
-        for reference in references_nodes:
-            r_system = None
-            if "system" in reference.attrib:
-                r_system = reference.attrib["system"]
-            for id_node in id_nodes:
-                if id_node.attrib["id"] == reference.text.strip():
-                    i_system = None
-                    if "system" in id_node.attrib:
-                        i_system = id_node.attrib["system"]
-                    if r_system != i_system:
-                        has_system_inconsistency = True
-                        inconsistent_systems.append(
-                            f"{id_node.tag}::{reference.text.strip()}"
-                        )
-                    break
-        if has_system_inconsistency:
-            msg_system_inconsistency = (
-                "Inconsistent system attribute(s): {inconsistent_systems}\n"
-            )
-            msg_queue += msg_system_inconsistency
-            logger.debug(msg_system_inconsistency)
-            if self.fail_fast:
-                raise exceptions.ParseError(msg_system_inconsistency)
-
-        # Inspect custom units for STMML definitions
-        has_undefined_custom_unit = False
-        missing_custom_unit_ids = []
-        custom_unit_nodes = root.findall(".//{*}customUnit")
-        custom_units = set([unit.text for unit in custom_unit_nodes])
-        unit_nodes = root.xpath(
-            "./additionalMetadata/metadata//*[local-name()='unitList']/*[local-name()='unit'][@id]"
-        )
-        unit_ids = [unit_id.attrib["id"] for unit_id in unit_nodes]
-        for custom_unit in custom_units:
-            if custom_unit not in unit_ids:
-                has_undefined_custom_unit = True
-                missing_custom_unit_ids.append(custom_unit)
-        if has_undefined_custom_unit:
-            msg_undefined_custom_unit = (
-                f"Missing custom unit id(s): {missing_custom_unit_ids}\n"
-            )
-            msg_queue += msg_undefined_custom_unit
-            logger.debug(msg_undefined_custom_unit)
-            if self.fail_fast:
-                raise exceptions.ParseError(msg_undefined_custom_unit)
-
-        # Inspect parents of annotation elements for subject id (sans the annotations element)
-        has_missing_annotation_id = False
-        missing_annotation_ids = []
-        parents_nodes = root.xpath(
-            ".//*[local-name() != 'annotations']/annotation/parent::*"
-        )
-        for parent in parents_nodes:
-            if "id" not in parent.attrib:
-                has_missing_annotation_id = True
-                missing_annotation_ids.append(parent.tag)
-        if has_missing_annotation_id:
-            msg_missing_annotation_id = f"Missing subject id for annotation parent(s): {missing_annotation_ids}\n"
-            msg_queue += msg_missing_annotation_id
-            logger.debug(msg_missing_annotation_id)
-            if self.fail_fast:
-                raise exceptions.ParseError(msg_missing_annotation_id)
-
-        # Inspect references attribute of annotation(s) for subject id
-        has_missing_annotation_references_id = False
-        missing_annotation_references_ids = []
-        annotation_nodes = root.xpath(".//annotations/annotation[@references]")
-        annotation_references = set(
-            [reference.attrib["references"] for reference in annotation_nodes]
-        )
-        for annotation_reference in annotation_references:
-            if annotation_reference not in ids:
-                has_missing_annotation_references_id = True
-                missing_annotation_references_ids.append(annotation_reference)
-        if has_missing_annotation_references_id:
-            msg_missing_annotation_references = f"Missing subject id for annotation references: {missing_annotation_references_ids}\n"
-            msg_queue += msg_missing_annotation_references
-            logger.debug(msg_missing_annotation_references)
-            if self.fail_fast:
-                raise exceptions.ParseError(msg_missing_annotation_references)
-
-        # Inspect additionalMetadata describes for subject id
-        has_missing_describes_id = False
-        missing_describes_ids = []
-        describes_nodes = root.xpath(".//additionalMetadata/describes")
-        describes = set([d.text for d in describes_nodes])
-        for describe in describes:
-            if describe not in ids:
-                has_missing_describes_id = True
-                missing_describes_ids.append(describe)
-        if has_missing_describes_id:
-            msg_missing_describes_id = f"Missing additionalMetadata describes subject id: {missing_describes_ids}\n"
-            msg_queue += msg_missing_describes_id
-            logger.debug(msg_missing_describes_id)
-            if self.fail_fast:
-                raise exceptions.ParseError(msg_missing_describes_id)
+        for name in self.checks:
+            with self.timings.stage(f"check:{name}"):
+                msg = CHECKS[name](index)
+            if msg is not None:
+                msg_queue += msg
+                failures[name] = msg.strip()
+                logger.debug(msg)
+                if self.fail_fast:
+                    raise _parse_error(msg, failures)
 
         # Fail slow
         if len(msg_queue) > 0:
-            raise exceptions.ParseError(msg_queue.strip())
+            raise _parse_error(msg_queue.strip(), failures)
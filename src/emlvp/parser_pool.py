@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+:Mod:
+    parser_pool
+
+:Synopsis:
+    Process-wide pool of configured lxml XML parsers. Each thread is given its own XMLParser, which is then
+    reused for every document the thread parses, rather than a parser being allocated per document. Parsing
+    options are tuned for the pipeline, and the limits that guard against very deep or very large documents
+    are lifted only when huge_tree is configured.
+
+:Author:
+    servilla
+
+:Created:
+    10/18/26
+"""
+import threading
+
+import daiquiri
+from lxml import etree
+
+
+logger = daiquiri.getLogger(__name__)
+
+
+# Options of every parser. Documents are always UTF-8, whatever encoding is declared. The pipeline indexes
+# ids itself, so the parser's table of xml:id attributes is never built, and nothing is fetched from the
+# network while parsing.
+PARSER_OPTIONS = dict(encoding="utf-8", collect_ids=False, no_network=True)
+
+
+class ParserPool:
+    """
+    Thread-safe source of configured XML parsers, one per thread. lxml parsers may parse any number of
+    documents in turn, but not concurrently, so a parser is never shared between threads.
+    """
+
+    def __init__(self, huge_tree: bool = False, remove_blank_text: bool = False):
+        """
+        Class init method.
+        :param huge_tree: Boolean to indicate if the libxml2 limits on document depth and text node size are
+            lifted, for very large documents (default is False)
+        :param remove_blank_text: Boolean to indicate if whitespace-only text between elements is discarded,
+            which changes dereferenced and normalized output (default is False)
+        """
+        self._options = dict(huge_tree=huge_tree, remove_blank_text=remove_blank_text)
+        # Incremented when the options change, so that each thread replaces its parser
+        self._generation = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @property
+    def options(self) -> dict:
+        """
+        Return the configured parsing options.
+        :return: Dictionary of huge_tree and remove_blank_text
+        """
+        return dict(self._options)
+
+    def configure(self, huge_tree: bool = None, remove_blank_text: bool = None):
+        """
+        Change parsing options, leaving those not given unchanged. Parsers created with other options are
+        replaced the next time each thread asks for one.
+        :param huge_tree: Boolean to indicate if the libxml2 limits on document depth and text node size are
+            lifted
+        :param remove_blank_text: Boolean to indicate if whitespace-only text between elements is discarded
+        :return: None
+        """
+        options = dict(huge_tree=huge_tree, remove_blank_text=remove_blank_text)
+        options = {name: value for name, value in options.items() if value is not None}
+        with self._lock:
+            if any(self._options[name] != value for name, value in options.items()):
+                self._options.update(options)
+                self._generation += 1
+                logger.debug(f"Parser options: {self._options}")
+
+    def get(self) -> etree.XMLParser:
+        """
+        Return the XML parser of the calling thread, creating it on first use or if the options have changed.
+        :return: XML parser
+        :rtype: lxml.etree.XMLParser
+        """
+        local = self._local
+        if getattr(local, "generation", None) != self._generation:
+            with self._lock:
+                local.parser = etree.XMLParser(**PARSER_OPTIONS, **self._options)
+                local.generation = self._generation
+        return local.parser
+
+    def iterparse_options(self) -> dict:
+        """
+        Return the keyword arguments of lxml iterparse that match the configured parsers, so that streamed
+        documents are decoded as UTF-8, as parsed documents are, whatever encoding is declared.
+        :return: Dictionary of iterparse options
+        """
+        return dict(PARSER_OPTIONS, **self._options)
+
+
+# Default process-wide pool
+pool = ParserPool()
@@ -0,0 +1,316 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+:Mod:
+    pipeline
+
+:Synopsis:
+    The emlvp processing pipeline of an EML XML document: select its schema, then normalize, validate, parse,
+    and dereference it, either from a shared element tree (nvpd) or while streaming it from disk (nvp_stream).
+    check runs nvpd and returns a structured result rather than raising. Used by the emlvp command line
+    application, the validation server, and the asyncio batch API.
+
+:Author:
+    servilla
+
+:Created:
+    10/18/26
+"""
+import os
+
+import daiquiri
+
+from emlvp.dereferencer import Dereferencer
+import emlvp.document as document
+from emlvp.exceptions import EMLVPError
+import emlvp.normalizer as normalizer
+from emlvp.parser import CHECKS as parser_checks, IDS_ONLY_CHECKS, Parser
+from emlvp.result import errors_from, FAILED, OK, Result
+from emlvp.schema_registry import schema_file
+from emlvp.sniffer import MAX_SNIFF_SIZE, sniff_version
+from emlvp.timings import NO_TIMINGS, Timings
+from emlvp.validator import Validator
+
+
+logger = daiquiri.getLogger(__name__)
+
+
+# Checks that can be selected: schema validation, each Parser inspection, and re-validation and re-parsing of
+# the dereferenced document
+CHECKS = ("schema",) + tuple(parser_checks) + ("revalidate",)
+
+
+def _selected(checks) -> tuple:
+    # Return (validate against the schema, Parser inspections, re-validate and re-parse) of a check selection
+    if checks is None:
+        return True, None, True
+    unknown = set(checks) - set(CHECKS)
+    if unknown:
+        raise ValueError(f"Unknown check(s): {sorted(unknown)}")
+    return "schema" in checks, [c for c in checks if c in parser_checks], "revalidate" in checks
+
+
+def schema_for(xml) -> str:
+    """
+    Determine the root schema of an EML XML document instance from the namespace of its root element
+    :param xml: EML XML document instance, or its leading portion, as a unicode string, or as UTF-8 bytes or
+        memory map
+    :return: Path to root schema eml.xsd
+    :raises ValueError: If the EML schema cannot be determined
+    :raises emlvp.exceptions.XMLSyntaxError: If the prologue of the document is not well formed
+    """
+    if isinstance(xml, str):
+        prologue = xml[:MAX_SNIFF_SIZE].encode("utf-8", errors="ignore")
+    else:
+        prologue = bytes(xml[:MAX_SNIFF_SIZE])
+    return schema_file(sniff_version(prologue))
+
+
+def nvp_stream(doc: str, fail_fast: bool, schema: str = None, timings: Timings = NO_TIMINGS, checks=None):
+    """
+    Validate and parse an EML XML file while streaming it from disk, so that memory use stays bounded
+    regardless of document size. Normalization and dereferencing require the full element tree and are
+    not available in streaming mode.
+    :param doc: File path to EML XML document
+    :param fail_fast: Exit on first exception encountered (default is False)
+    :param schema: Path to root schema eml.xsd (default is determined from the document prologue)
+    :param timings: Recorder of the duration of each stage (default is no recording)
+    :param checks: Names of the checks to run, from CHECKS (default is all)
+    :return: None
+    """
+    validate, inspections, _ = _selected(checks)
+    parser = Parser(fail_fast=fail_fast, timings=timings, checks=inspections)
+    if validate:
+        with timings.stage("schema"):
+            if schema is None:
+                schema = schema_file(sniff_version(doc))
+            validator = Validator(schema)
+            validator.compile()
+        with timings.stage("validate"):
+            validator.validate_stream(doc)
+    if parser.checks:
+        with timings.stage("parse"):
+            parser.parse_stream(doc)
+
+
+def nvpd(
+    xml,
+    dereference: bool,
+    fail_fast: bool,
+    pretty_print: bool,
+    normalize: bool,
+    normalize_engine: str = "xslt",
+    schema: str = None,
+    timings: Timings = NO_TIMINGS,
+    checks=None,
+    output: str = None,
+) -> str:
+    """
+    Normalize, validate, parse, and dereference EML XML file(s)
+    :param xml: EML XML file as a unicode string, or as UTF-8 bytes or memory map
+    :param dereference: Dereference EML XML file(s) (default is False)
+    :param fail_fast: Exit on first exception encountered (default is False)
+    :param pretty_print: Pretty print output for dereferenced EML XML (default is False)
+    :param normalize: Normalize EML XML file(s) before parsing and validating (default is False)
+    :param normalize_engine: Normalization engine, either "xslt" or "native" (default is "xslt")
+    :param schema: Path to root schema eml.xsd (default is determined from the document prologue)
+    :param timings: Recorder of the duration of each stage (default is no recording)
+    :param checks: Names of the checks to run, from CHECKS (default is all)
+    :param output: File path to which the dereferenced and/or normalized EML XML is written incrementally,
+        instead of being returned as a string (default is none)
+    :return: EML XML file, either dereferenced and/or normalized as a unicode string (or None if written to
+        output), or otherwise unchanged
+    """
+    validate, inspections, revalidate = _selected(checks)
+    parser = Parser(fail_fast=fail_fast, timings=timings, checks=inspections)
+    if validate:
+        with timings.stage("schema"):
+            v = Validator(schema_for(xml) if schema is None else schema)
+            # Compile (or fetch) the schema here so that compilation is not counted as validation
+            v.compile()
+
+    # Parse once and share the element tree between all stages
+    with timings.stage("xml-parse"):
+        tree = document.parse(xml)
+
+    if normalize:
+        with timings.stage("normalize"):
+            tree = normalizer.normalize_tree(tree, engine=normalize_engine)
+
+    # Run the cheapest stages first when failing fast. Schema validation costs less than the Parser's walk of
+    # the full document, but the duplicate-id inspection scans the ids in C at a fraction of the cost, so it
+    # runs before validation and the other inspections after.
+    remaining = parser
+    if fail_fast and not set(parser.checks).isdisjoint(IDS_ONLY_CHECKS):
+        ids_parser = Parser(fail_fast=fail_fast, timings=timings, checks=IDS_ONLY_CHECKS)
+        remaining = Parser(
+            fail_fast=fail_fast, timings=timings, checks=[c for c in parser.checks if c not in IDS_ONLY_CHECKS]
+        )
+        with timings.stage("parse"):
+            ids_parser.parse_tree(tree)
+    if validate:
+        with timings.stage("validate"):
+            v.validate_tree(tree)
+    if remaining.checks:
+        with timings.stage("parse"):
+            remaining.parse_tree(tree)
+    if dereference:
+        d = Dereferencer(pretty_print=pretty_print)
+        with timings.stage("dereference"):
+            tree = d.dereference_tree(tree)
+        if revalidate and validate:
+            with timings.stage("revalidate"):
+                v.validate_tree(tree)
+        if revalidate and parser.checks:
+            with timings.stage("reparse"):
+                parser.parse_tree(tree)
+        with timings.stage("serialize"):
+            if output is None:
+                xml = document.tostring(tree, pretty_print=pretty_print)
+            else:
+                document.write(tree, output, pretty_print=pretty_print)
+                xml = None
+    elif normalize:
+        with timings.stage("serialize"):
+            if output is None:
+                xml = normalizer.tostring(tree)
+            else:
+                normalizer.write(tree, output)
+                xml = None
+
+    return xml
+
+
+def _check(result: Result, xml, streaming: bool, options: dict, timings: Timings, mapped: bool = True) -> Result:
+    # Process a document, from xml or else from the file result.document (memory mapped if mapped), recording
+    # its outcome in the result rather than raising
+    recorder = Timings() if timings is None else timings
+    try:
+        with recorder.stage("sniff"):
+            if xml is None:
+                result.version = sniff_version(result.document)
+            else:
+                if isinstance(xml, str):
+                    xml = xml.encode("utf-8")
+                result.version = sniff_version(bytes(xml[:MAX_SNIFF_SIZE]))
+        schema = schema_file(result.version)
+        if streaming:
+            nvp_stream(
+                result.document, options["fail_fast"], schema=schema, timings=recorder, checks=options["checks"]
+            )
+        else:
+            if xml is None:
+                with recorder.stage("read"):
+                    xml = document.read(result.document, mapped=mapped)
+            output = nvpd(xml, **options, schema=schema, timings=recorder)
+            if (options["dereference"] or options["normalize"]) and options["output"] is None:
+                result.output = output
+    except (EMLVPError, OSError, ValueError) as e:
+        result.errors = errors_from(e)
+
+    result.stages = {stage: OK for stage in recorder.stages}
+    if recorder.failed is not None:
+        result.stages[recorder.failed] = FAILED
+    for error in result.errors:
+        if error.check is not None:
+            result.stages[f"check:{error.check}"] = FAILED
+    if timings is not None:
+        result.timings = timings.stages
+    return result
+
+
+def check(
+    xml,
+    dereference: bool = False,
+    normalize: bool = False,
+    fail_fast: bool = False,
+    pretty_print: bool = False,
+    normalize_engine: str = "xslt",
+    doc: str = None,
+    timings: Timings = None,
+    checks=None,
+    output: str = None,
+) -> Result:
+    """
+    Normalize, validate, parse, and dereference an EML XML document, returning a structured result rather than
+    raising on the first error.
+    :param xml: EML XML document instance as a unicode string, or as UTF-8 bytes or memory map
+    :param dereference: Dereference the document (default is False)
+    :param normalize: Normalize the document before validating and parsing (default is False)
+    :param fail_fast: Report only the first parser inspection that fails (default is False)
+    :param pretty_print: Pretty print dereferenced EML XML (default is False)
+    :param normalize_engine: Normalization engine, either "xslt" or "native" (default is "xslt")
+    :param doc: File path of the document recorded in the result (default is None)
+    :param timings: Recorder of the duration of each stage, whose durations are included in the result
+        (default is no timings in the result)
+    :param checks: Names of the checks to run, from CHECKS (default is all)
+    :param output: File path to which the dereferenced and/or normalized document is written instead of being
+        included in the result (default is none)
+    :return: Result, with the dereferenced and/or normalized document as its output if requested
+    """
+    options = dict(
+        dereference=dereference,
+        fail_fast=fail_fast,
+        pretty_print=pretty_print,
+        normalize=normalize,
+        normalize_engine=normalize_engine,
+        checks=checks,
+        output=output,
+    )
+    return _check(Result(doc), xml, False, options, timings)
+
+
+def check_file(
+    doc: str,
+    dereference: bool = False,
+    normalize: bool = False,
+    fail_fast: bool = False,
+    pretty_print: bool = False,
+    normalize_engine: str = "xslt",
+    streaming_threshold: int = None,
+    timings: Timings = None,
+    checks=None,
+    output: str = None,
+    mapped: bool = True,
+) -> Result:
+    """
+    Normalize, validate, parse, and dereference an EML XML file, returning a structured result rather than
+    raising on the first error.
+    :param doc: File path to EML XML document, or archive Member (which is never streamed)
+    :param dereference: Dereference the document (default is False)
+    :param normalize: Normalize the document before validating and parsing (default is False)
+    :param fail_fast: Report only the first parser inspection that fails (default is False)
+    :param pretty_print: Pretty print dereferenced EML XML (default is False)
+    :param normalize_engine: Normalization engine, either "xslt" or "native" (default is "xslt")
+    :param streaming_threshold: File size in bytes at or above which the document is validated and parsed in
+        streaming mode, if neither dereferencing nor normalizing (default is never)
+    :param timings: Recorder of the duration of each stage, whose durations are included in the result
+        (default is no timings in the result)
+    :param checks: Names of the checks to run, from CHECKS (default is all)
+    :param output: File path to which the dereferenced and/or normalized document is written instead of being
+        included in the result (default is none)
+    :param mapped: Memory map the file rather than reading it (default is True; see emlvp.document.read)
+    :return: Result, with the dereferenced and/or normalized document as its output if requested
+    """
+    options = dict(
+        dereference=dereference,
+        fail_fast=fail_fast,
+        pretty_print=pretty_print,
+        normalize=normalize,
+        normalize_engine=normalize_engine,
+        checks=checks,
+        output=output,
+    )
+    if isinstance(doc, document.Member):
+        return _check(Result(doc.name), doc.data, False, options, timings)
+    try:
+        streaming = (
+            streaming_threshold is not None
+            and not (dereference or normalize)
+            and os.path.getsize(doc) >= streaming_threshold
+        )
+    except OSError:
+        # Reported as the document fails to be read
+        streaming = False
+    return _check(Result(doc), None, streaming, options, timings, mapped=mapped)
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+:Mod:
+    result
+
+:Synopsis:
+    Structured outcome of processing EML XML documents: a Result record per document, with the EML version,
+    the status of each processing stage, the errors found, and optionally stage timings. Records use __slots__
+    so that a large run holds little per document, and serialize to compact JSON for JSON Lines reporting.
+
+:Author:
+    servilla
+
+:Created:
+    10/18/26
+"""
+import json
+
+import daiquiri
+
+from emlvp import exceptions
+
+
+logger = daiquiri.getLogger(__name__)
+
+# Status of a processing stage
+OK = "ok"
+FAILED = "failed"
+
+
+class Error:
+    """
+    One error found in a document: the name of the exception type that reported it, its message, the line of
+    the document it was found on (if known), and the parser inspection that found it (if any).
+    """
+
+    __slots__ = ("type", "message", "line", "check")
+
+    def __init__(self, type: str, message: str, line: int = None, check: str = None):
+        """
+        Class init method.
+        :param type: Exception type name (e.g., "ValidationError")
+        :param message: Error message
+        :param line: Line number of the document (default is unknown)
+        :param check: Name of the parser inspection that found the error (default is none)
+        """
+        self.type = type
+        self.message = message
+        self.line = line
+        self.check = check
+
+    def to_dict(self) -> dict:
+        """
+        Return the error as a dictionary, omitting unknown line and inspection.
+        :return: Dictionary of error fields
+        """
+        error = dict(type=self.type, message=self.message)
+        if self.line:
+            error["line"] = self.line
+        if self.check is not None:
+            error["check"] = self.check
+        return error
+
+
+def errors_from(e: Exception) -> list:
+    """
+    Return the errors reported by an exception raised while processing a document: one per schema validation
+    error log entry, one per failed parser inspection, or otherwise the exception itself.
+    :param e: Exception
+    :return: List of Error
+    """
+    if isinstance(e, exceptions.ValidationError):
+        return [Error("ValidationError", error.message, error.line) for error in e.args[0]]
+    if isinstance(e, exceptions.ParseError) and getattr(e, "failures", None):
+        return [Error("ParseError", message, check=check) for check, message in e.failures.items()]
+    line = None
+    if e.args and isinstance(e.args[0], SyntaxError):
+        # lxml XMLSyntaxError wrapped by emlvp.exceptions.XMLSyntaxError
+        line = e.args[0].lineno
+    return [Error(type(e).__name__, str(e).strip(), line)]
+
+
+class Result:
+    """
+    Outcome of processing one EML XML document.
+    """
+
+    __slots__ = ("document", "version", "stages", "errors", "timings", "output")
+
+    def __init__(self, document: str = None):
+        """
+        Class init method.
+        :param document: File path of the document, if any
+        """
+        self.document = document
+        # EML version, or None if it could not be determined
+        self.version = None
+        # Status ("ok" or "failed") of each stage entered, in processing order
+        self.stages = {}
+        self.errors = []
+        # Duration in seconds of each stage, if timings were requested
+        self.timings = None
+        # Dereferenced and/or normalized document, if requested
+        self.output = None
+
+    @property
+    def valid(self) -> bool:
+        return not self.errors
+
+    def to_dict(self) -> dict:
+        """
+        Return the result as a dictionary of JSON types.
+        :return: Dictionary of result fields
+        """
+        result = dict(
+            document=self.document,
+            valid=self.valid,
+            version=self.version,
+            stages=self.stages,
+            errors=[error.to_dict() for error in self.errors],
+        )
+        if self.timings is not None:
+            result["timings"] = {stage: round(seconds, 6) for stage, seconds in self.timings.items()}
+        if self.output is not None:
+            result["output"] = self.output
+        return result
+
+    def to_json(self) -> str:
+        """
+        Return the result as one line of compact JSON.
+        :return: JSON string
+        """
+        return json.dumps(self.to_dict(), ensure_ascii=False, separators=(",", ":"))
+
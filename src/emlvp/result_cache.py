@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+:Mod:
+    result_cache
+
+:Synopsis:
+    Persistent, content-addressed cache of document processing results stored in a local SQLite file,
+    so that unchanged documents are not re-processed on repeat corpus runs.
+
+:Author:
+    servilla
+
+:Created:
+    10/18/26
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+import sqlite3
+
+import daiquiri
+
+from emlvp.document import Member
+
+
+logger = daiquiri.getLogger(__name__)
+
+# Number of stored results between commits
+COMMIT_INTERVAL = 1000
+
+
+def emlvp_version() -> str:
+    """
+    Return the installed emlvp version.
+    :return: emlvp version
+    :rtype: str
+    """
+    return Path(Path(__file__).resolve().parent, "VERSION.txt").read_text("utf-8").strip()
+
+
+class ResultCache:
+    """
+    Caches the report and outcome of processing a document, keyed by the document path, a SHA-256 digest of
+    its content, the emlvp version (which fixes the bundled EML schemas), and the processing options. The
+    EML schema version is determined by the content and is therefore covered by the digest. Digests are
+    themselves cached by file modification time and size so that unchanged files are not re-hashed.
+    """
+
+    def __init__(self, path: str, refresh: bool = False):
+        """
+        Class init method.
+        :param path: File path of the SQLite cache database (created if it does not exist)
+        :param refresh: Boolean to indicate that cached results are ignored and replaced
+        """
+        self.path = path
+        self.refresh = refresh
+        self.version = emlvp_version()
+        self.hits = 0
+        self.misses = 0
+        self._uncommitted = 0
+        # Allow concurrent emlvp runs to share one cache file
+        self._connection = sqlite3.connect(path, timeout=60)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS files "
+            "(path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, digest TEXT)"
+        )
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS results "
+            "(key TEXT PRIMARY KEY, failed INTEGER, report TEXT)"
+        )
+        self._connection.commit()
+
+    def digest(self, doc: str) -> str:
+        """
+        Return the SHA-256 digest of a document's content, re-hashing only if its modification time or size
+        has changed since it was last hashed.
+        :param doc: File path to EML XML document, or archive Member (which is always hashed)
+        :return: Hexadecimal SHA-256 digest
+        """
+        if isinstance(doc, Member):
+            return hashlib.sha256(doc.data).hexdigest()
+        doc = os.path.abspath(doc)
+        stat = os.stat(doc)
+        row = self._connection.execute(
+            "SELECT mtime_ns, size, digest FROM files WHERE path = ?", (doc,)
+        ).fetchone()
+        if row is not None and row[0] == stat.st_mtime_ns and row[1] == stat.st_size:
+            return row[2]
+        with open(doc, "rb") as f:
+            digest = hashlib.file_digest(f, "sha256").hexdigest()
+        self._connection.execute(
+            "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)",
+            (doc, stat.st_mtime_ns, stat.st_size, digest),
+        )
+        self._changed()
+        return digest
+
+    def key(self, doc: str, options: dict) -> str:
+        """
+        Return the cache key of processing a document with the given options.
+        :param doc: File path to EML XML document, or archive Member
+        :param options: Processing options
+        :return: Cache key
+        """
+        material = json.dumps(
+            [str(doc), self.digest(doc), self.version, options], sort_keys=True
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        """
+        Return a cached result.
+        :param key: Cache key
+        :return: Tuple of (report, True if the document failed processing), or None if not cached or refreshing
+        """
+        row = None
+        if not self.refresh:
+            row = self._connection.execute(
+                "SELECT report, failed FROM results WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0], bool(row[1])
+
+    def put(self, key: str, report: str, failed: bool):
+        """
+        Store a result.
+        :param key: Cache key
+        :param report: Report written for the document
+        :param failed: Boolean to indicate if the document failed processing
+        :return: None
+        """
+        self._connection.execute(
+            "INSERT OR REPLACE INTO results VALUES (?, ?, ?)", (key, int(failed), report)
+        )
+        self._changed()
+
+    def hit_rate(self) -> float:
+        """
+        Return the fraction of lookups that were served from the cache.
+        :return: Hit rate between 0 and 1
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def close(self):
+        """
+        Commit outstanding changes and close the cache database.
+        :return: None
+        """
+        self._connection.commit()
+        self._connection.close()
+
+    def _changed(self):
+        self._uncommitted += 1
+        if self._uncommitted >= COMMIT_INTERVAL:
+            self._connection.commit()
+            self._uncommitted = 0
@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+:Mod:
+    schema_registry
+
+:Synopsis:
+    Process-wide registry of compiled EML XML schemas. Each root schema is parsed and compiled only once
+    per thread, and the compiled lxml XMLSchema object is shared by every Validator of the thread. A compiled
+    schema keeps the error log of its last validation, so it is never used by two threads at once. The schemas
+    of a thread are held in thread-local storage and released when the thread exits.
+
+:Author:
+    servilla
+
+:Created:
+    10/18/26
+"""
+import os
+import threading
+from typing import NamedTuple
+import weakref
+
+import daiquiri
+from lxml import etree
+
+
+logger = daiquiri.getLogger(__name__)
+
+
+# Root schema file of each supported EML version, relative to the installed schemas directory
+EML_SCHEMAS = {
+    "2.1.0": "EML2.1.0/eml.xsd",
+    "2.1.1": "EML2.1.1/eml.xsd",
+    "2.2.0": "EML2.2.0/xsd/eml.xsd",
+}
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    size: int
+
+
+def schema_file(version: str) -> str:
+    """
+    Return path to the installed root schema file of an EML version.
+    :param version: EML version (e.g., "2.2.0")
+    :return: Path to root schema eml.xsd
+    :rtype: str
+    :raises ValueError: If the EML version is not supported
+    """
+    if version not in EML_SCHEMAS:
+        raise ValueError(f"Unsupported EML version: {version}")
+    return os.path.abspath(os.path.dirname(__file__)) + "/schemas/" + EML_SCHEMAS[version]
+
+
+class _ThreadSchemas:
+    """
+    Compiled XML schemas of one thread keyed by the absolute path of the root schema file.
+    """
+
+    __slots__ = ("schemas", "__weakref__")
+
+    def __init__(self):
+        """
+        Class init method.
+        """
+        self.schemas = {}
+
+
+class SchemaRegistry:
+    """
+    Thread-safe cache of compiled XML schemas keyed by the calling thread and the absolute path of the root
+    schema file.
+    """
+
+    def __init__(self):
+        """
+        Class init method.
+        """
+        self._local = threading.local()
+        # Schemas of the live threads, each dropped when its thread exits
+        self._threads = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _thread_schemas(self) -> dict:
+        thread = getattr(self._local, "thread", None)
+        if thread is None:
+            thread = self._local.thread = _ThreadSchemas()
+            with self._lock:
+                self._threads.add(thread)
+        return thread.schemas
+
+    def get(self, schema: str) -> etree.XMLSchema:
+        """
+        Return the compiled XML schema of the calling thread for a root schema file, compiling it on the
+        thread's first use.
+        :param schema: path to root schema eml.xsd
+        :return: Compiled XML schema
+        :rtype: lxml.etree.XMLSchema
+        :raises lxml.etree.XMLSchemaParseError: If the schema cannot be compiled
+        """
+        path = os.path.abspath(schema)
+        schemas = self._thread_schemas()
+        compiled = schemas.get(path)
+        with self._lock:
+            if compiled is not None:
+                self.hits += 1
+                return compiled
+            self.misses += 1
+            logger.debug(f"Compiling schema: {path}")
+            # Compile while holding the lock: libxml2 does not reliably compile the same schema files in
+            # several threads at once, and each thread compiles each schema only once
+            compiled = etree.XMLSchema(file=path)
+            schemas[path] = compiled
+        return compiled
+
+    def warm(self, versions: tuple = None):
+        """
+        Eagerly compile the root schemas of the given EML versions for the calling thread.
+        :param versions: EML versions to compile (default is all supported versions)
+        :return: None
+        """
+        if versions is None:
+            versions = tuple(EML_SCHEMAS)
+        for version in versions:
+            self.get(schema_file(version))
+
+    def cache_info(self) -> CacheInfo:
+        """
+        Return hit and miss counters along with the number of compiled schemas of all live threads.
+        :return: Cache information
+        :rtype: CacheInfo
+        """
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, sum(len(thread.schemas) for thread in self._threads))
+
+    def clear(self):
+        """
+        Remove all compiled schemas and reset counters.
+        :return: None
+        """
+        with self._lock:
+            for thread in self._threads:
+                thread.schemas.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+# Default process-wide registry
+registry = SchemaRegistry()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+:Mod:
+    server
+
+:Synopsis:
+    Long-running HTTP validation service. A pool of worker processes, each with compiled EML schemas,
+    stays warm between requests, so that requests do not pay for interpreter startup, imports, and schema
+    compilation. The number of requests being processed or waiting for a worker is bounded; requests
+    beyond the bound are refused with 503 Service Unavailable so that clients back off.
+
+    POST /validate   EML XML document as the request body; options as query parameters (dereference,
+                     normalize, normalize_engine, fail_fast, pretty_print, and checks, a comma-separated
+                     list of emlvp.pipeline.CHECKS); returns the JSON result of
+                     emlvp.pipeline.check
+    GET  /health     Returns JSON service status
+
+:Author:
+    servilla
+
+:Created:
+    10/18/26
+"""
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import threading
+from urllib.parse import parse_qs, urlsplit
+
+import daiquiri
+
+import emlvp.normalizer as normalizer
+from emlvp.parser_pool import pool
+from emlvp.pipeline import CHECKS, check
+from emlvp.schema_registry import EML_SCHEMAS, registry, schema_file
+from emlvp.sniffer import EML_NAMESPACES
+
+
+logger = daiquiri.getLogger(__name__)
+
+# Maximum size in bytes of a request body
+MAX_BODY_SIZE = 256 * 1024 * 1024
+# Seconds a request may take to be processed before 504 Gateway Timeout is returned
+REQUEST_TIMEOUT = 300
+
+# Boolean query parameters of POST /validate
+FLAGS = ("dereference", "normalize", "fail_fast", "pretty_print")
+
+
+def warm(huge_tree: bool = False):
+    """
+    Compile every EML schema that compiles in this process, so that requests find them in the registry, and
+    configure the process's XML parsers.
+    :param huge_tree: Boolean to indicate if the XML parser limits on document depth and size are lifted
+    :return: None
+    """
+    pool.configure(huge_tree=huge_tree)
+    for version in EML_SCHEMAS:
+        try:
+            registry.get(schema_file(version))
+        except Exception as e:
+            # A schema that cannot be compiled (e.g., it imports a schema from the network) is reported on use
+            logger.warning(f"Cannot compile EML {version} schema: {e}")
+
+
+class ValidationServer(ThreadingHTTPServer):
+    """
+    Threaded HTTP server that hands documents to a warm pool of worker processes.
+    """
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(
+        self,
+        address: tuple,
+        workers: int = 0,
+        queue_size: int = 16,
+        max_body_size: int = MAX_BODY_SIZE,
+        timeout: float = REQUEST_TIMEOUT,
+        huge_tree: bool = False,
+    ):
+        """
+        Class init method.
+        :param address: Tuple of (host, port) to listen on (port 0 selects a free port)
+        :param workers: Number of worker processes (0 for one per CPU)
+        :param queue_size: Number of requests that may wait for a worker before requests are refused
+        :param max_body_size: Maximum size in bytes of a request body
+        :param timeout: Seconds a request may take to be processed
+        :param huge_tree: Boolean to indicate if the XML parser limits on document depth and size are lifted
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.max_body_size = max_body_size
+        self.timeout = timeout
+        self.slots = threading.BoundedSemaphore(self.workers + queue_size)
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers, initializer=warm, initargs=(huge_tree,)
+        )
+        # Start and warm every worker before accepting requests
+        for future in [self.executor.submit(os.getpid) for _ in range(self.workers)]:
+            future.result()
+        super().__init__(address, _Handler)
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: ValidationServer
+
+    def log_message(self, format, *args):
+        logger.info(f"{self.address_string()} {format % args}")
+
+    def _reply(self, status: HTTPStatus, body: dict, headers: dict = None):
+        content = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def do_GET(self):
+        if urlsplit(self.path).path != "/health":
+            self._reply(HTTPStatus.NOT_FOUND, dict(error="Not found"))
+            return
+        self._reply(
+            HTTPStatus.OK,
+            dict(
+                status="ok",
+                workers=self.server.workers,
+                queue_size=self.server.queue_size,
+                versions=sorted(EML_NAMESPACES.values()),
+            ),
+        )
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if url.path != "/validate":
+            self._reply(HTTPStatus.NOT_FOUND, dict(error="Not found"))
+            return
+
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        options = {flag: query.get(flag, "false").lower() in ("1", "true", "yes") for flag in FLAGS}
+        options["normalize_engine"] = query.get("normalize_engine", "xslt")
+        if options["normalize_engine"] not in normalizer.ENGINES:
+            self._reply(HTTPStatus.BAD_REQUEST, dict(error=f"Unknown normalize_engine: {options['normalize_engine']}"))
+            return
+        if "checks" in query:
+            options["checks"] = [name for name in query["checks"].split(",") if name]
+            unknown = set(options["checks"]) - set(CHECKS)
+            if unknown:
+                self._reply(HTTPStatus.BAD_REQUEST, dict(error=f"Unknown check(s): {sorted(unknown)}"))
+                return
+
+        length = self.headers.get("Content-Length")
+        if length is None:
+            self._reply(HTTPStatus.LENGTH_REQUIRED, dict(error="Content-Length required"))
+            return
+        try:
+            length = int(length)
+        except ValueError:
+            length = -1
+        if length < 0:
+            # The body cannot be found, so the connection cannot be reused
+            self.close_connection = True
+            self._reply(HTTPStatus.BAD_REQUEST, dict(error="Invalid Content-Length"))
+            return
+        if length > self.server.max_body_size:
+            self.close_connection = True
+            self._reply(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, dict(error="Request body too large"))
+            return
+        # Refuse rather than queue without bound when all workers are busy and the queue is full
+        if not self.server.slots.acquire(blocking=False):
+            # Drain the body so that the client reads the reply rather than a connection reset
+            self.rfile.read(length)
+            self._reply(HTTPStatus.SERVICE_UNAVAILABLE, dict(error="Server busy"), headers={"Retry-After": "1"})
+            return
+        try:
+            xml = self.rfile.read(length)
+            future = self.server.executor.submit(check, xml, **options)
+        except BaseException:
+            self.server.slots.release()
+            raise
+        # The slot is held until the document is processed, not only until this request is answered: a
+        # document that times out keeps its worker busy, and cancelling it cannot stop it once it is running
+        future.add_done_callback(lambda f: self.server.slots.release())
+        try:
+            result = future.result(timeout=self.server.timeout)
+        except TimeoutError:
+            future.cancel()
+            self._reply(HTTPStatus.GATEWAY_TIMEOUT, dict(error="Processing timed out"))
+            return
+        except Exception as e:
+            logger.error(e)
+            self._reply(HTTPStatus.INTERNAL_SERVER_ERROR, dict(error=str(e)))
+            return
+        self._reply(HTTPStatus.OK, result.to_dict())
+
+
+def serve(host: str = "127.0.0.1", port: int = 8080, **kwargs):
+    """
+    Run the validation server until interrupted.
+    :param host: Host address to listen on (default is localhost only)
+    :param port: Port to listen on
+    :param kwargs: Keyword arguments of ValidationServer
+    :return: None
+    """
+    with ValidationServer((host, port), **kwargs) as server:
+        logger.info(f"emlvp serving on http://{server.server_address[0]}:{server.server_address[1]}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+:Mod:
+    sniffer
+
+:Synopsis:
+    Determine the EML version of a document from the namespace of its root element, reading only the
+    document prologue (up to and including the root start tag) rather than the full document.
+
+:Author:
+    servilla
+
+:Created:
+    10/18/26
+"""
+import daiquiri
+from lxml import etree
+
+from emlvp import exceptions
+
+
+logger = daiquiri.getLogger(__name__)
+
+# EML namespace of each supported EML version
+EML_NAMESPACES = {
+    "https://eml.ecoinformatics.org/eml-2.2.0": "2.2.0",
+    "eml://ecoinformatics.org/eml-2.1.1": "2.1.1",
+    "eml://ecoinformatics.org/eml-2.1.0": "2.1.0",
+}
+
+# Number of bytes read at a time while looking for the root start tag
+SNIFF_SIZE = 4 * 1024
+# Number of bytes read at most before giving up on finding the root start tag
+MAX_SNIFF_SIZE = 64 * 1024
+
+
+def _root(chunks) -> etree._Element:
+    parser = etree.XMLPullParser(events=("start",))
+    error = None
+    for chunk in chunks:
+        try:
+            parser.feed(chunk)
+        except etree.XMLSyntaxError as e:
+            error = e
+        for _, element in parser.read_events():
+            # Anything following the root start tag, including syntax errors, is left to later stages
+            return element
+        if error is not None:
+            logger.debug(error)
+            raise exceptions.XMLSyntaxError(error)
+    return None
+
+
+def _byte_chunks(data: bytes):
+    for start in range(0, min(len(data), MAX_SNIFF_SIZE), SNIFF_SIZE):
+        yield data[start:start + SNIFF_SIZE]
+
+
+def _file_chunks(path: str):
+    with open(path, "rb") as f:
+        for _ in range(0, MAX_SNIFF_SIZE, SNIFF_SIZE):
+            chunk = f.read(SNIFF_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+
+def sniff_version(source) -> str:
+    """
+    Return the EML version of a document from the namespace of its root element or, if the root element is
+    not in an EML namespace, from the EML namespace declared on the root element.
+    :param source: File path of EML XML document, or the document (or its leading portion) as bytes
+    :return: EML version (e.g., "2.2.0")
+    :raises ValueError: If the EML version cannot be determined
+    :raises emlvp.exceptions.XMLSyntaxError: If the prologue of the document is not well formed
+    """
+    if isinstance(source, bytes):
+        chunks = _byte_chunks(source)
+    else:
+        chunks = _file_chunks(source)
+
+    root = _root(chunks)
+    if root is not None:
+        namespace = etree.QName(root).namespace
+        if namespace in EML_NAMESPACES:
+            return EML_NAMESPACES[namespace]
+        for namespace in root.nsmap.values():
+            if namespace in EML_NAMESPACES:
+                return EML_NAMESPACES[namespace]
+    raise ValueError("Cannot determine EML schema")
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+:Mod:
+    timings
+
+:Synopsis:
+    Per-stage timing and optional cProfile instrumentation of processing one EML XML document. Code under
+    instrumentation receives either a Timings recorder or the NO_TIMINGS null recorder, whose stages are a
+    shared do-nothing context manager, so that instrumentation costs close to nothing when disabled.
+
+:Author:
+    servilla
+
+:Created:
+    10/18/26
+"""
+import contextlib
+import cProfile
+import hashlib
+import os
+from pathlib import Path
+import re
+import time
+
+import daiquiri
+
+
+logger = daiquiri.getLogger(__name__)
+
+
+class Timings:
+    """
+    Records the wall clock duration of each named stage. Durations of a stage entered more than once are
+    accumulated. If a profile directory is given, each outermost stage is also profiled with cProfile and
+    its statistics are written to "<profile_dir>/<name>-<hash>.<stage>.prof" by dump_profiles(), where name is
+    the file name of the label and hash a short hash of the full label, so that documents with the same file
+    name in different directories or archives have their own profiles.
+    """
+
+    def __init__(self, profile_dir: str = None, label: str = "document"):
+        """
+        Class init method.
+        :param profile_dir: Directory to which pstats files are written (default is no profiling)
+        :param label: Label of the profiled document used in pstats file names, usually its file path
+        """
+        self.stages = {}
+        # Outermost stage that raised an exception, if any
+        self.failed = None
+        self.profile_dir = profile_dir
+        digest = hashlib.sha256(label.encode("utf-8")).hexdigest()[:8]
+        name = re.sub(r"[^\w.-]", "_", Path(label).name)
+        self.label = f"{name}-{digest}"
+        self._profiles = {}
+        self._depth = 0
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        """
+        Context manager that times (and optionally profiles) a stage.
+        :param name: Stage name
+        :return: Context manager
+        """
+        profile = None
+        if self.profile_dir is not None and self._depth == 0:
+            # Profilers cannot be nested, so only outermost stages are profiled
+            profile = self._profiles.setdefault(name, cProfile.Profile())
+            profile.enable()
+        self._depth += 1
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            if self._depth == 1:
+                self.failed = name
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            self._depth -= 1
+            if profile is not None:
+                profile.disable()
+            self.stages[name] = self.stages.get(name, 0.0) + elapsed
+
+    def dump_profiles(self):
+        """
+        Write the pstats file of each profiled stage.
+        :return: None
+        """
+        if self.profile_dir is None:
+            return
+        os.makedirs(self.profile_dir, exist_ok=True)
+        for name, profile in self._profiles.items():
+            profile.dump_stats(f"{self.profile_dir}/{self.label}.{name.replace(':', '-')}.prof")
+
+
+class _NoTimings:
+    """
+    Null recorder used when instrumentation is disabled.
+    """
+
+    _null = contextlib.nullcontext()
+
+    def stage(self, name: str):
+        return self._null
+
+
+# Shared null recorder
+NO_TIMINGS = _NoTimings()
@@ -13,16 +13,58 @@
 :Created:
     4/11/24
 """
+import functools
+import re
 import unicodedata
 
 
-def unicode_list(xml: str) -> list:
+ENGINES = ("fast", "python")
+
+# Characters with codepoints greater than or equal to 127 (DEL is included, as in the python engine)
+_non_ascii = re.compile("[^\x00-\x7e]")
+
+
+@functools.cache
+def _name(char: str) -> str:
+    return unicodedata.name(char, "Unknown")
+
+
+def unicode_list(xml: str, engine: str = "fast") -> list:
     """
     List all unicode characters in the given XML with codepoints greater than ASCII 127
     as a list of tuples: (row, col, char, cp, name)
     :param xml:
+    :param engine: Either "fast" to skip pure ASCII documents and scan with a compiled regular
+        expression, or "python" to inspect each character (default is "fast")
     :return list:
     """
+    if engine == "python":
+        return _unicode_list_python(xml)
+    elif engine != "fast":
+        raise ValueError(f"Unknown unicode engine: {engine}")
+
+    if xml.isascii() and "\x7f" not in xml:
+        return []
+
+    unicodes = []
+    row = 1
+    line_start = 0
+    last = 0
+    for match in _non_ascii.finditer(xml):
+        offset = match.start()
+        # Matches arrive in order, so rows and line starts are advanced over the gap since the last match
+        newlines = xml.count("\n", last, offset)
+        if newlines:
+            row += newlines
+            line_start = xml.rfind("\n", last, offset) + 1
+        last = offset
+        char = match.group()
+        unicodes.append((row, offset - line_start + 1, char, ord(char), _name(char)))
+
+    return unicodes
+
+
+def _unicode_list_python(xml: str) -> list:
     unicodes = []
     n = 0
     lines = xml.split("\n")
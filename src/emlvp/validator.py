@@ -18,7 +18,8 @@ from pathlib import Path
 import daiquiri
 from lxml import etree
 
-from emlvp import exceptions
+from emlvp import document, exceptions
+from emlvp.schema_registry import registry, SchemaRegistry
 
 
 logger = daiquiri.getLogger(__name__)
@@ -36,18 +37,36 @@ def schema_path() -> str:
 class Validator:
     """
     Validates an EML XML document for being well formed and schema syntax correct.
+
+    One Validator may validate documents in any number of threads at once: each thread validates with its
+    own compiled schema from the schema registry, and lxml releases the GIL while it parses and validates.
     """
 
-    def __init__(self, schema: str):
+    def __init__(self, schema: str, schema_registry: SchemaRegistry = None):
         """
         Class init method.
         :param schema: path to root schema eml.xsd
+        :param schema_registry: Registry of compiled schemas (default is the process-wide registry)
         """
         self.schema = schema
+        self.schema_registry = registry if schema_registry is None else schema_registry
         if not Path(self.schema).is_file():
             msg = f"Cannot locate root schema file: {schema}"
             raise IOError(msg)
 
+    def compile(self) -> etree.XMLSchema:
+        """
+        Compiles the root schema, or fetches it from the schema registry if already compiled
+        :return: Compiled XML schema
+        :rtype: lxml.etree.XMLSchema
+        :raises emlvp.exceptions.XMLSchemaParseError
+        """
+        try:
+            return self.schema_registry.get(self.schema)
+        except etree.XMLSchemaParseError as e:
+            logger.debug(e)
+            raise exceptions.XMLSchemaParseError(e)
+
     def validate(self, xml: str):
         """
         Validates an EML XML document instance
@@ -56,17 +75,19 @@ class Validator:
         :raises emlvp.exceptions.ValidationError, emlvp.exceptions.ParseError, emlvp.exceptions.XIncludeError,
             emlvp.exceptions.XMLSchemaParseError, emlvp.exceptions.XMLSyntaxError
         """
+        self.validate_tree(document.parse(xml))
 
+    def validate_tree(self, tree: etree._ElementTree):
+        """
+        Validates an already parsed EML XML document instance
+        :param tree: EML XML element tree
+        :return: None
+        :raises emlvp.exceptions.ValidationError, emlvp.exceptions.ParseError, emlvp.exceptions.XIncludeError,
+            emlvp.exceptions.XMLSchemaParseError, emlvp.exceptions.XMLSyntaxError
+        """
         try:
-            xml = xml.encode("utf-8")
-        except UnicodeEncodeError as e:
-            logger.debug(e)
-            raise exceptions.UTF8Error(e)
-
-        try:
-            doc = etree.fromstring(xml)
-            schema = etree.XMLSchema(file=self.schema)
-            schema.assertValid(doc)
+            schema = self.schema_registry.get(self.schema)
+            schema.assertValid(tree)
         except etree.DocumentInvalid as e:
             logger.debug(e)
             raise exceptions.ValidationError(e.error_log)
@@ -82,3 +103,16 @@ class Validator:
         except etree.XMLSyntaxError as e:
             logger.debug(e)
             raise exceptions.XMLSyntaxError(e)
+
+    def validate_stream(self, source):
+        """
+        Validates an EML XML document instance while streaming it from a file, without building the element
+        tree. Streaming validation stops at the first schema error, and lxml does not report its line number.
+        :param source: File path or binary file object of EML XML document instance
+        :return: None
+        :raises emlvp.exceptions.ValidationError, emlvp.exceptions.XMLSchemaParseError,
+            emlvp.exceptions.XMLSyntaxError
+        """
+        schema = self.compile()
+        for _ in document.iterparse(source, events=("end",), schema=schema):
+            pass
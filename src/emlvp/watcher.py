@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+:Mod:
+    watcher
+
+:Synopsis:
+    Watch targets for EML XML documents that are created, modified, or removed, by polling their file
+    modification times and sizes. A burst of saves to a document is reported once, after the document has
+    been left unchanged for a short debounce period.
+
+:Author:
+    servilla
+
+:Created:
+    10/18/26
+"""
+import os
+import time
+
+import daiquiri
+
+from emlvp.discovery import discover, is_archive
+
+
+logger = daiquiri.getLogger(__name__)
+
+# Seconds between polls of the targets
+WATCH_INTERVAL = 0.1
+# Seconds a changed document must be left unchanged before it is reported
+WATCH_DEBOUNCE = 0.2
+
+
+def _signatures(targets, missing_ok: bool = False, **kwargs) -> dict:
+    # Return the (modification time, size) of each document file, skipping any removed while being listed,
+    # and, if missing_ok, the documents of targets that are missing (for example, while an editor saves a file
+    # target by renaming a new file over it)
+    signatures = {}
+    for target in targets:
+        try:
+            paths = list(discover([target], **kwargs))
+        except FileNotFoundError:
+            if not missing_ok:
+                raise
+            continue
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            signatures[path] = (stat.st_mtime_ns, stat.st_size)
+    return signatures
+
+
+def watch(
+    targets,
+    interval: float = WATCH_INTERVAL,
+    debounce: float = WATCH_DEBOUNCE,
+    recursive: bool = False,
+    include: tuple = ("*.xml",),
+    exclude: tuple = (),
+):
+    """
+    Generate the documents that change under the targets, starting with every document found. The targets
+    are polled until the generator is closed; a target that goes missing after the first poll has its
+    documents reported as removed, and those of a target that reappears as changed.
+    :param targets: Iterable of file and directory paths (archives are not watched)
+    :param interval: Seconds between polls (default is WATCH_INTERVAL)
+    :param debounce: Seconds a changed document must be left unchanged before it is reported (default is
+        WATCH_DEBOUNCE)
+    :param recursive: Watch subdirectories of directory targets (default is False)
+    :param include: Glob patterns of the paths or file names of documents to watch (default is "*.xml")
+    :param exclude: Glob patterns of the paths or names of documents and subdirectories not to watch
+    :return: Generator of tuples of (changed document file paths, removed document file paths), each in
+        path order
+    :raises FileNotFoundError: If a target is not a file or directory when first polled
+    :raises ValueError: If a target is an archive
+    """
+    targets = tuple(targets)
+    for target in targets:
+        if is_archive(target) and os.path.isfile(target):
+            raise ValueError(f"Archive {target} cannot be watched")
+    options = dict(recursive=recursive, include=include, exclude=exclude)
+    reported = _signatures(targets, **options)
+    yield sorted(reported), []
+    # Changed documents not yet reported -> (signature, monotonic time the signature was first seen)
+    settling = {}
+    while True:
+        time.sleep(interval)
+        now = time.monotonic()
+        current = _signatures(targets, missing_ok=True, **options)
+        for path, signature in current.items():
+            if signature == reported.get(path):
+                settling.pop(path, None)
+            elif path not in settling or settling[path][0] != signature:
+                settling[path] = (signature, now)
+        for path in [path for path in settling if path not in current]:
+            del settling[path]
+        changed = sorted(path for path, (_, since) in settling.items() if now - since >= debounce)
+        for path in changed:
+            reported[path] = settling.pop(path)[0]
+        removed = sorted(path for path in reported if path not in current)
+        for path in removed:
+            del reported[path]
+        if changed or removed:
+            logger.debug(f"Changed: {changed}, removed: {removed}")
+            yield changed, removed
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+:Mod: test_batch
+
+:Synopsis:
+
+:Author:
+    servilla
+
+:Created:
+    10/18/26
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import contextlib
+
+import emlvp
+from emlvp.pipeline import check_file
+
+
+def _collect(paths, **kwargs) -> list:
+    async def collect():
+        return [result async for result in emlvp.validate_many(paths, **kwargs)]
+
+    return asyncio.run(collect())
+
+
+def test_check_many(test_data):
+    names = ["eml-2.2.0.xml", "eml-2.2.0-invalid.xml", "eml-2.2.0-duplicate-id.xml", "missing.xml"] * 5
+    paths = [f"{test_data}/{name}" for name in names]
+    results = list(emlvp.check_many(paths, threads=4))
+    # Results arrive in document order, as if processed sequentially
+    assert [r.document for r in results] == paths
+    assert [r.to_dict() for r in results] == [check_file(path).to_dict() for path in paths]
+
+
+def test_check_many_close(test_data):
+    paths = (f"{test_data}/eml-2.2.0.xml" for _ in range(100))
+    with contextlib.closing(emlvp.check_many(paths, threads=1)) as results:
+        assert next(results).valid
+    assert len(list(paths)) >= 100 - 3
+
+
+def test_validate_many(test_data):
+    names = ["eml-2.2.0.xml", "eml-2.2.0-invalid.xml", "eml-2.2.0-duplicate-id.xml", "missing.xml"]
+    paths = [f"{test_data}/{name}" for name in names]
+    results = _collect(paths, concurrency=2)
+    # Results arrive in order of completion
+    assert sorted(r.document for r in results) == sorted(paths)
+    results = {r.document: r for r in results}
+    assert results[paths[0]].valid
+    assert results[paths[1]].errors[0].type == "ValidationError"
+    assert results[paths[2]].errors[0].type == "ParseError"
+    assert results[paths[3]].errors[0].type == "FileNotFoundError"
+    assert results[paths[3]].stages == {"read": "failed"}
+
+
+def test_validate_many_executor(test_data):
+    paths = [f"{test_data}/eml-2.2.0-dereference.xml"] * 5
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        results = _collect(paths, concurrency=1, executor=executor, dereference=True)
+        # A caller's executor is not shut down
+        assert executor.submit(len, "emlvp").result() == 5
+    assert len(results) == 5
+    assert all(r.valid and "<references" not in r.output for r in results)
+
+
+def test_validate_many_close(test_data):
+    paths = (f"{test_data}/eml-2.2.0.xml" for _ in range(100))
+
+    async def first():
+        async with contextlib.aclosing(emlvp.validate_many(paths, concurrency=1)) as results:
+            async for result in results:
+                return result
+
+    assert asyncio.run(first()).valid
+    # Closing the generator stops reading ahead after the window of documents in flight
+    assert len(list(paths)) >= 100 - 3
@@ -12,7 +12,11 @@
 :Created:
     1/26/23
 """
+import pytest
+
 from emlvp.dereferencer import Dereferencer
+import emlvp.document as document
+import emlvp.exceptions as exceptions
 
 
 def test_dereference(test_data):
@@ -21,3 +25,41 @@ def test_dereference(test_data):
     d = Dereferencer(pretty_print=True)
     xml = d.dereference(xml)
     assert xml is not None
+
+
+def test_dereference_tree(test_data):
+    with open(f"{test_data}/eml-2.2.0-dereference.xml", "r", encoding="utf-8") as f:
+        xml = f.read()
+    d = Dereferencer()
+    tree = document.parse(xml)
+    tree = d.dereference_tree(tree)
+    assert len(tree.getroot().findall(".//references")) == 0
+    assert document.tostring(tree) == d.dereference(xml)
+
+
+def test_dereference_transitive():
+    xml = """<eml:eml xmlns:eml="https://eml.ecoinformatics.org/eml-2.2.0">
+      <dataTable><references>t1</references></dataTable>
+      <dataTable id="t1"><attribute><references>a1</references></attribute></dataTable>
+      <attribute id="a1"><attributeName>a</attributeName></attribute>
+    </eml:eml>"""
+    tree = Dereferencer().dereference_tree(document.parse(xml))
+    root = tree.getroot()
+    assert len(root.findall(".//references")) == 0
+    assert len(root.findall(".//attributeName")) == 3
+
+
+def test_dereference_circular_reference():
+    xml = """<eml:eml xmlns:eml="https://eml.ecoinformatics.org/eml-2.2.0">
+      <dataTable id="t1"><attribute><references>t2</references></attribute></dataTable>
+      <dataTable id="t2"><attribute><references>t1</references></attribute></dataTable>
+    </eml:eml>"""
+    with pytest.raises(exceptions.CircularReferenceIdError):
+        Dereferencer().dereference(xml)
+
+
+def test_dereference_missing_reference_id(test_data):
+    with open(f"{test_data}/eml-2.2.0-missing-reference-id.xml", "r", encoding="utf-8") as f:
+        xml = f.read()
+    with pytest.raises(exceptions.MissingReferenceIdError):
+        Dereferencer().dereference(xml)
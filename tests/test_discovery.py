@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+:Mod: test_discovery
+
+:Synopsis:
+
+:Author:
+    servilla
+
+:Created:
+    10/18/26
+"""
+import shutil
+import tarfile
+import zipfile
+
+import pytest
+
+from emlvp.discovery import discover, members, relative_path, shard_of
+from emlvp.document import Member
+
+
+@pytest.fixture()
+def corpus(test_data, tmp_path):
+    (tmp_path / "a" / "b").mkdir(parents=True)
+    (tmp_path / "old").mkdir()
+    shutil.copy(f"{test_data}/eml-2.2.0.xml", tmp_path / "top.xml")
+    shutil.copy(f"{test_data}/eml-2.2.0.xml", tmp_path / "a" / "b" / "deep.xml")
+    shutil.copy(f"{test_data}/eml-2.2.0.xml", tmp_path / "old" / "old.xml")
+    (tmp_path / "a" / "notes.txt").write_text("not EML")
+    with zipfile.ZipFile(tmp_path / "a" / "bundle.zip", "w") as z:
+        z.write(f"{test_data}/eml-2.2.0.xml", "eml/zipped.xml")
+        z.writestr("README.txt", "not EML")
+    with tarfile.open(tmp_path / "bundle.tar.gz", "w:gz") as t:
+        t.add(f"{test_data}/eml-2.2.0-invalid.xml", "tarred.xml")
+    return tmp_path
+
+
+def _names(docs) -> list:
+    return sorted(str(doc).rpartition("/")[2] for doc in docs)
+
+
+def test_discover(corpus):
+    assert _names(discover([str(corpus)])) == ["top.xml"]
+    assert _names(discover([str(corpus)], recursive=True)) == ["deep.xml", "old.xml", "top.xml"]
+    docs = list(discover([str(corpus)], recursive=True, exclude=("old",), archives=True))
+    assert _names(docs) == ["deep.xml", "tarred.xml", "top.xml", "zipped.xml"]
+    zipped = next(doc for doc in docs if isinstance(doc, Member) and doc.name.endswith("zipped.xml"))
+    assert zipped.name == f"{corpus}/a/bundle.zip/eml/zipped.xml"
+    assert zipped.data == (corpus / "top.xml").read_bytes()
+
+
+def test_discover_filters(corpus):
+    docs = discover([str(corpus)], recursive=True, include=("*.xml", "*.txt"), exclude=("a/b/*",))
+    assert _names(docs) == ["notes.txt", "old.xml", "top.xml"]
+    # File targets are documents, whatever their names
+    assert list(discover([str(corpus / "a" / "notes.txt")])) == [str(corpus / "a" / "notes.txt")]
+    with pytest.raises(FileNotFoundError):
+        list(discover([str(corpus / "missing.xml")]))
+
+
+def test_discover_is_lazy(corpus):
+    docs = discover([str(corpus), str(corpus / "missing.xml")])
+    # The missing target is not reached until the documents of the first are consumed
+    assert _names([next(docs)]) == ["top.xml"]
+
+
+def test_members(corpus, tmp_path):
+    assert _names(members(str(corpus / "bundle.tar.gz"))) == ["tarred.xml"]
+    assert _names(members(str(corpus / "a" / "bundle.zip"), include=("*",), exclude=("eml/*",))) == ["README.txt"]
+    broken = tmp_path / "broken.zip"
+    broken.write_bytes(b"not a zip archive")
+    assert list(members(str(broken))) == []
+
+
+def test_discover_shard(corpus, tmp_path):
+    options = dict(recursive=True, archives=True)
+    everything = [str(doc) for doc in discover([str(corpus)], **options)]
+    shards = [[str(doc) for doc in discover([str(corpus)], shard=(i, 3), **options)] for i in (1, 2, 3)]
+    assert sorted(sum(shards, [])) == sorted(everything)
+    # Documents are sharded by their paths relative to the target, wherever the target is
+    moved = shutil.copytree(corpus, tmp_path.parent / f"{tmp_path.name}-moved")
+    for i, shard in enumerate(shards, start=1):
+        relative = [doc[len(str(corpus)):] for doc in shard]
+        assert [str(doc)[len(str(moved)):] for doc in discover([str(moved)], shard=(i, 3), **options)] == relative
+    assert shard_of("knb-lter-and.1.1.xml", 4) == shard_of("knb-lter-and.1.1.xml", 4)
+    assert {shard_of(f"{i}.xml", 4) for i in range(100)} == {1, 2, 3, 4}
+
+
+def test_relative_path(corpus):
+    targets = [str(corpus), str(corpus / "bundle.tar.gz"), str(corpus / "top.xml")]
+    docs = discover(targets, recursive=True, exclude=("old",), archives=True)
+    assert sorted(relative_path(doc, targets) for doc in docs) == [
+        "a/b/deep.xml",
+        "a/bundle.zip/eml/zipped.xml",
+        "bundle.tar.gz/tarred.xml",
+        "bundle.tar.gz/tarred.xml",
+        "top.xml",
+        "top.xml",
+    ]
+    assert relative_path(str(corpus / "top.xml"), [str(corpus / "top.xml")]) == "top.xml"
+    # Member names cannot lead outside the target
+    member = Member(f"{corpus}/bundle.tar.gz/../../escape.xml", b"")
+    assert relative_path(member, [str(corpus / "bundle.tar.gz")]) == "bundle.tar.gz/escape.xml"
@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+:Mod: test_document
+
+:Synopsis:
+
+:Author:
+    servilla
+
+:Created:
+    10/18/26
+"""
+import os
+
+import pytest
+
+import emlvp.document as document
+import emlvp.exceptions as exceptions
+
+
+def test_parse_read(test_data):
+    doc = f"{test_data}/eml-2.2.0-unicode.xml"
+    with open(doc, "r", encoding="utf-8") as f:
+        xml = f.read()
+    tree = document.parse(document.read(doc))
+    assert document.tostring(tree) == document.tostring(document.parse(xml))
+    assert document.text(document.read(doc)) == xml
+
+
+def test_read_unmapped(test_data, tmp_path):
+    doc = tmp_path / "eml.xml"
+    with open(f"{test_data}/eml-2.2.0.xml", "rb") as f:
+        doc.write_bytes(f.read())
+    xml = document.read(str(doc), mapped=False)
+    assert isinstance(xml, bytes)
+    # A read document is not affected by the file being truncated, as an editor saving it does
+    doc.write_bytes(b"")
+    assert document.parse(xml).getroot() is not None
+
+
+def test_parse_read_empty(tmp_path):
+    doc = tmp_path / "empty.xml"
+    doc.write_bytes(b"")
+    assert document.read(str(doc)) == b""
+    with pytest.raises(exceptions.XMLSyntaxError):
+        document.parse(document.read(str(doc)))
+
+
+def test_parse_invalid_utf8():
+    xml = '<?xml version="1.0" encoding="UTF-8"?>\n<eml>caf\xe9</eml>'.encode("latin-1")
+    with pytest.raises(exceptions.UTF8Error) as e:
+        document.parse(xml)
+    assert "'utf-8' codec can't decode byte 0xe9" in str(e.value)
+
+
+def test_parse_declared_encoding():
+    # Documents are parsed as UTF-8 regardless of their declared encoding
+    xml = '<?xml version="1.0" encoding="ISO-8859-1"?>\n<eml>café</eml>'
+    assert document.parse(xml).getroot().text == "café"
+    assert document.parse(xml.encode("utf-8")).getroot().text == "café"
+
+
+def test_text():
+    assert document.text(b"<eml>\r\ncaf\xc3\xa9\r</eml>") == "<eml>\ncafé\n</eml>"
+
+
+def test_write(test_data, tmp_path, monkeypatch):
+    tree = document.parse(document.read(f"{test_data}/eml-2.2.0-unicode.xml"))
+    path = str(tmp_path / "out.xml")
+    document.write(tree, path, pretty_print=True)
+    assert document.tostring(document.parse(document.read(path))) == document.tostring(tree)
+    # A failed write leaves the existing file in place and no temporary file behind
+    size = os.path.getsize(path)
+
+    def xmlfile(*args, **kwargs):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(document.etree, "xmlfile", xmlfile)
+    with pytest.raises(OSError):
+        document.write(tree, path)
+    assert os.path.getsize(path) == size
+    assert os.listdir(tmp_path) == ["out.xml"]
@@ -0,0 +1,272 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+:Mod: test_emlvp_cli
+
+:Synopsis:
+
+:Author:
+    servilla
+
+:Created:
+    10/18/26
+"""
+import io
+import json
+import os
+from pathlib import Path
+import tarfile
+
+from click.testing import CliRunner
+
+import emlvp.document as document
+from emlvp.emlvp_cli import _text_report, main, Style, unicode_show
+import emlvp.watcher as watcher
+
+
+def test_statistics(test_data):
+    runner = CliRunner()
+    result = runner.invoke(main, ["-s", test_data])
+    assert result.exit_code == 0
+    assert "Total documents validated: 16" in result.output
+    assert "Documents that failed validation: 13" in result.output
+
+
+def test_jobs(test_data):
+    runner = CliRunner()
+    sequential = runner.invoke(main, ["-s", test_data])
+    parallel = runner.invoke(main, ["-s", "-j", "4", test_data])
+    assert parallel.exit_code == 0
+    assert parallel.output == sequential.output
+
+
+def test_jobs_fail_fast(test_data):
+    runner = CliRunner()
+    result = runner.invoke(main, ["-s", "-f", "-j", "2", test_data])
+    assert result.exit_code == 0
+    assert "Documents that failed validation: 1" in result.output
+
+
+def test_threads(test_data):
+    runner = CliRunner()
+    for options in ([], ["-d", "-n"]):
+        sequential = runner.invoke(main, ["-s", *options, test_data])
+        threaded = runner.invoke(main, ["-s", "-t", "4", *options, test_data])
+        assert threaded.exit_code == 0
+        assert threaded.output == sequential.output
+    result = runner.invoke(main, ["-t", "2", "-j", "2", test_data])
+    assert result.exit_code == 2
+    assert "mutually exclusive" in result.output
+
+
+def test_streaming_threshold(test_data):
+    runner = CliRunner()
+    result = runner.invoke(main, ["-s", "--streaming-threshold", "0", test_data])
+    assert result.exit_code == 0
+    assert "Total documents validated: 16" in result.output
+    assert "Documents that failed validation: 13" in result.output
+
+
+def test_checks(test_data):
+    runner = CliRunner()
+    result = runner.invoke(main, ["-s", "--checks", "duplicate-id", test_data])
+    assert result.exit_code == 0
+    assert "Documents that failed validation: 3" in result.output
+    result = runner.invoke(main, ["-s", "--streaming-threshold", "0", "--checks", "duplicate-id", test_data])
+    assert "Documents that failed validation: 3" in result.output
+    result = runner.invoke(main, ["--checks", "schema,bogus", test_data])
+    assert result.exit_code == 2 and "bogus" in result.output
+
+
+def test_output_dir(test_data, tmp_path):
+    runner = CliRunner()
+    output = str(tmp_path / "out")
+    result = runner.invoke(main, ["-s", "-d", "-j", "2", "-o", output, test_data])
+    assert result.exit_code == 0
+    assert "Documents that failed validation: 13" in result.output
+    assert sorted(os.listdir(output)) == ["eml-2.2.0-dereference.xml", "eml-2.2.0-unicode.xml", "eml-2.2.0.xml"]
+    printed = runner.invoke(main, ["-vv", "-d", f"{test_data}/eml-2.2.0-dereference.xml"])
+    written = runner.invoke(main, ["-vv", "-d", "-o", output, f"{test_data}/eml-2.2.0-dereference.xml"])
+    assert written.output.count("<eml:eml") == printed.output.count("<eml:eml") == 1
+    result = runner.invoke(main, ["-o", output, test_data])
+    assert result.exit_code == 2
+
+
+def test_output_dir_subdirectories(test_data, tmp_path):
+    source = tmp_path / "src"
+    for subdirectory in ("a", "b"):
+        (source / subdirectory).mkdir(parents=True)
+        (source / subdirectory / "eml.xml").write_bytes((Path(test_data) / "eml-2.2.0.xml").read_bytes())
+    with tarfile.open(source / "a" / "corpus.tar", "w") as t:
+        t.add(f"{test_data}/eml-2.2.0.xml", arcname="b/eml.xml")
+    runner = CliRunner()
+    output = tmp_path / "out"
+    result = runner.invoke(main, ["-s", "-r", "-a", "-d", "-o", str(output), str(source)])
+    assert result.exit_code == 0
+    assert "Documents that failed validation: 0" in result.output
+    written = sorted(str(p.relative_to(output)) for p in output.rglob("*.xml"))
+    assert written == ["a/corpus.tar/b/eml.xml", "a/eml.xml", "b/eml.xml"]
+    # Same-named file targets cannot share the output directory
+    output = tmp_path / "collision"
+    targets = [str(source / "a" / "eml.xml"), str(source / "b" / "eml.xml")]
+    result = runner.invoke(main, ["-d", "-o", str(output), *targets])
+    assert result.exit_code == 1
+    assert [p.name for p in output.iterdir()] == ["eml.xml"]
+
+
+def test_huge_tree(tmp_path):
+    doc = tmp_path / "deep.xml"
+    doc.write_text(
+        '<eml:eml xmlns:eml="https://eml.ecoinformatics.org/eml-2.2.0">' + "<a>" * 300 + "</a>" * 300 + "</eml:eml>"
+    )
+    runner = CliRunner()
+    result = runner.invoke(main, [str(doc)])
+    assert "Excessive depth" in result.output
+    result = runner.invoke(main, ["--huge-tree", str(doc)])
+    assert "Excessive depth" not in result.output and "Schema validation error" in result.output
+
+
+def test_watch(test_data, monkeypatch):
+    valid = f"{test_data}/eml-2.2.0.xml"
+    invalid = f"{test_data}/eml-2.2.0-duplicate-id.xml"
+
+    def watch(target, **kwargs):
+        assert target == (test_data,) and kwargs["recursive"]
+        yield [invalid, valid], []
+        yield [], [invalid]
+
+    # Watched documents are read rather than memory mapped, since editors truncate them while saving
+    read = document.read
+    mapped = []
+    monkeypatch.setattr(document, "read", lambda path, **kwargs: mapped.append(kwargs) or read(path, **kwargs))
+    monkeypatch.setattr(watcher, "watch", watch)
+    runner = CliRunner()
+    result = runner.invoke(main, ["-w", "-s", "-r", test_data])
+    assert result.exit_code == 0
+    assert mapped == [dict(mapped=False)] * 2
+    assert "Documents watched: 2, failed validation: 1" in result.output
+    assert result.output.endswith("Documents watched: 1, failed validation: 0\n")
+
+
+def test_shard_merge(test_data, tmp_path, caplog):
+    runner = CliRunner()
+    reports = []
+    for i in (1, 2, 3):
+        result = runner.invoke(main, ["--shard", f"{i}/3", "--format", "jsonl", "-s", test_data])
+        assert result.exit_code == 0
+        reports.append(tmp_path / f"shard{i}.jsonl")
+        reports[-1].write_text(result.output)
+    merged = runner.invoke(main, ["merge", "-s", *map(str, reports)])
+    assert merged.exit_code == 0
+    full = runner.invoke(main, ["-s", test_data])
+    merged_report, _, merged_statistics = merged.output.partition("Total documents validated")
+    full_report, _, full_statistics = full.output.partition("Total documents validated")
+    assert merged_statistics == full_statistics
+    # The same document reports, in shard order, colored only on a terminal
+    assert Style.RED not in merged_report
+    full_report = full_report.replace(Style.RED, "").replace(Style.RESET, "")
+    assert sorted(merged_report.split(test_data)) == sorted(full_report.split(test_data))
+    record = json.loads(reports[0].read_text().splitlines()[0])
+    record.update(valid=False, errors=[dict(type="ParseError", message="Duplicate id(s): ['a']")])
+    assert _text_report(record) == f"{record['document']}\n{Style.RED}Duplicate id(s): ['a']{Style.RESET}\n\n"
+    merged = runner.invoke(main, ["merge", "--format", "jsonl", str(reports[0]), str(reports[0])])
+    assert merged.exit_code == 1
+    assert "missing: [2, 3], merged more than once: [1]" in caplog.text
+
+
+def test_cache(test_data, tmp_path):
+    runner = CliRunner()
+    cache = str(tmp_path / "cache.db")
+    first = runner.invoke(main, ["-s", "--cache", cache, test_data])
+    second = runner.invoke(main, ["-s", "-j", "2", "--cache", cache, test_data])
+    assert "Result cache hits: 0 of 16 (0.0%)" in first.output
+    assert "Result cache hits: 16 of 16 (100.0%)" in second.output
+    assert first.output.split("Result cache")[0] == second.output.split("Result cache")[0]
+    bypass = runner.invoke(main, ["-s", "--cache", cache, "--no-cache", test_data])
+    assert "Result cache" not in bypass.output
+
+
+def test_unicode_show():
+    xml = "<a>\u00e9t\u00e9</a>\n<b/>"
+    out = io.StringIO()
+    unicode_show(xml, unicode=1, out=out, color=False)
+    assert out.getvalue() == xml + "\n"
+    out = io.StringIO()
+    unicode_show(xml, unicode=2, out=out, color=True)
+    e = f"{Style.GREEN_BG}\u00e9{Style.RESET}"
+    assert out.getvalue() == (
+        f"{Style.BLUE}    1{Style.RESET}: <a>{e}t{e}</a>\n"
+        f"{Style.BLUE}    2{Style.RESET}: <b/>\n"
+    )
+
+
+def test_unicode_show_not_a_terminal(test_data):
+    runner = CliRunner()
+    result = runner.invoke(main, ["-vv", "-uu", f"{test_data}/eml-2.2.0-unicode.xml"])
+    assert result.exit_code == 0
+    assert Style.GREEN_BG not in result.output
+    assert "    1: <?xml" in result.output
+
+
+def test_generate(tmp_path):
+    runner = CliRunner()
+    output = str(tmp_path / "corpus")
+    result = runner.invoke(main, ["generate", output, "-c", "3", "--references", "5", "--chain", "3"])
+    assert result.exit_code == 0
+    assert f"Generated 3 document(s) in {output}, 0 not valid" in result.output
+    result = runner.invoke(main, ["-s", "-d", output])
+    assert "Total documents validated: 3" in result.output
+    assert "Documents that failed validation: 0" in result.output
+
+
+def test_generate_deep(tmp_path):
+    runner = CliRunner()
+    output = str(tmp_path / "deep")
+    result = runner.invoke(main, ["generate", output, "--depth", "300"])
+    assert result.exit_code == 0
+    assert f"Generated 1 document(s) in {output}, 0 not valid" in result.output
+    # The depth limit applies again after generating
+    result = runner.invoke(main, ["-s", output])
+    assert "Documents that failed validation: 1" in result.output
+
+
+def test_timings(test_data):
+    runner = CliRunner()
+    result = runner.invoke(main, ["--timings", "-d", f"{test_data}/eml-2.2.0.xml"])
+    assert result.exit_code == 0
+    record = json.loads(result.output)
+    assert record["document"] == f"{test_data}/eml-2.2.0.xml"
+    assert not record["failed"]
+    stages = ["read", "schema", "xml-parse", "validate", "parse", "dereference", "revalidate", "reparse"]
+    assert all(stage in record["stages"] for stage in stages)
+
+
+def test_jsonl(test_data):
+    runner = CliRunner()
+    result = runner.invoke(main, ["--format", "jsonl", "-s", "-j", "2", test_data])
+    assert result.exit_code == 0
+    lines = result.output.splitlines()
+    records = [json.loads(line) for line in lines[:-1]]
+    summary = json.loads(lines[-1])["summary"]
+    assert summary["documents"] == len(records) == 16
+    assert summary["failed"] == sum(not r["valid"] for r in records)
+    records = {r["document"].rpartition("/")[2]: r for r in records}
+    assert records["eml-2.2.0.xml"]["errors"] == [] and "timings" not in records["eml-2.2.0.xml"]
+    assert records["eml-2.2.0-invalid.xml"]["errors"][0]["line"] == 22
+    assert records["eml-2.2.0-duplicate-id.xml"]["stages"]["check:duplicate-id"] == "failed"
+
+
+def test_archives(test_data, tmp_path):
+    with tarfile.open(tmp_path / "bundle.tar.gz", "w:gz") as t:
+        t.add(f"{test_data}/eml-2.2.0.xml", "eml/valid.xml")
+        t.add(f"{test_data}/eml-2.2.0-invalid.xml", "eml/invalid.xml")
+    cache = str(tmp_path / "cache.sqlite")
+    runner = CliRunner()
+    for _ in range(2):
+        result = runner.invoke(main, ["-s", "-r", "-a", "-j", "2", "--cache", cache, str(tmp_path)])
+        assert result.exit_code == 0
+        assert f"{tmp_path}/bundle.tar.gz/eml/invalid.xml" in result.output
+        assert "Total documents validated: 2" in result.output
+        assert "Documents that failed validation: 1" in result.output
+    assert "Result cache hits: 2 of 2" in result.output
@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+:Mod: test_generator
+
+:Synopsis:
+
+:Author:
+    servilla
+
+:Created:
+    10/18/26
+"""
+import pytest
+
+from emlvp.dereferencer import Dereferencer
+from emlvp.exceptions import ParseError
+import emlvp.generator as generator
+from emlvp.parser import Parser
+from emlvp.schema_registry import schema_file
+from emlvp.validator import Validator
+
+
+def test_generate():
+    xml = generator.generate(
+        entities=3,
+        attributes=5,
+        creators=2,
+        references=4,
+        annotations=6,
+        custom_units=2,
+        additional_metadata_size=1000,
+        depth=5,
+        chain=4,
+        seed=7,
+    )
+    validator = Validator(schema_file("2.2.0"))
+    validator.validate(xml)
+    Parser().parse(xml)
+    dereferenced = Dereferencer().dereference(xml)
+    validator.validate(dereferenced)
+    assert "<references" not in dereferenced
+
+
+def test_generate_reproducible():
+    assert generator.generate(entities=2, seed=1) == generator.generate(entities=2, seed=1)
+    assert generator.generate(entities=2, seed=1) != generator.generate(entities=2, seed=2)
+
+
+def test_generate_duplicate_ids():
+    xml = generator.generate(creators=2, duplicate_ids=2)
+    Validator(schema_file("2.2.0")).validate(xml)
+    with pytest.raises(ParseError) as e:
+        Parser().parse(xml)
+    assert "Duplicate id(s): ['creator-0', 'creator-1']" in str(e.value)
@@ -12,7 +12,31 @@
 :Created:
     2/16/24
 """
-from emlvp.normalizer import normalize
+import os
+
+import pytest
+
+import emlvp.document as document
+import emlvp.normalizer as normalizer
+from emlvp.normalizer import normalize, normalize_tree
+
+
+ADVERSARIAL = """<?xml version="1.0"?>
+<!-- leading\xa0comment -->
+<eml:eml xmlns:eml="https://eml.ecoinformatics.org/eml-2.2.0"
+    xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" packageId="  a \t b\xa0 " xsi:schemaLocation=" x  y ">
+  lead  text
+  <n xmlns:eml="https://eml.ecoinformatics.org/eml-2.2.0" xmlns:k="urn:k" xsi:type="t">
+    <eml:m xmlns:eml="https://eml.ecoinformatics.org/eml-2.2.0">z</eml:m> t </n>
+  <dataset>\t\r\n<title>  A \xa0 title\r\n  here </title><!-- c\xa0 --> tail\xa0after <para>  keep   <b> inner  </b>
+    this </para> x
+    <abstract><markdown>  # h\n\n  text  </markdown><section><para>p  1</para></section></abstract>
+    <attributeName>  an </attributeName><objectName> o  n </objectName><literalLayout>  l  l  </literalLayout>
+    <x:para xmlns:x="urn:x">  ns  para </x:para> <e/> <e>   </e>
+    <?pi  some\xa0 data ?>  after  pi  <![CDATA[  cdata   here ]]>
+  </dataset>
+</eml:eml>
+<!-- trailing -->"""
 
 
 def test_dereference(test_data):
@@ -20,3 +44,63 @@ def test_dereference(test_data):
         xml = f.read()
     xml = normalize(xml)
     assert xml is not None
+
+
+def test_normalize_tree(test_data):
+    with open(f"{test_data}/eml-2.2.0.xml", "r", encoding="utf-8") as f:
+        xml = f.read()
+    tree = normalize_tree(document.parse(xml))
+    assert str(tree) == normalize(xml)
+
+
+@pytest.mark.parametrize("engine", normalizer.ENGINES)
+def test_write(tmp_path, engine):
+    tree = normalize_tree(document.parse(ADVERSARIAL), engine=engine)
+    path = str(tmp_path / "normalized.xml")
+    normalizer.write(tree, path)
+    with open(path, "r", encoding="utf-8") as f:
+        assert f.read() == normalizer.tostring(tree)
+    assert os.listdir(tmp_path) == ["normalized.xml"]
+
+
+def test_stylesheet_compiled_once():
+    assert normalizer._stylesheet() is normalizer._stylesheet()
+
+
+@pytest.mark.parametrize(
+    "name",
+    [
+        "eml-2.2.0.xml",
+        "eml-2.2.0-dereference.xml",
+        "eml-2.2.0-missing-annotation-parent-id.xml",
+        "eml-2.2.0-missing-custom-unit-id.xml",
+        "eml-2.2.0-unicode.xml",
+    ],
+)
+def test_native_parity(test_data, name):
+    with open(os.path.join(test_data, name), "r", encoding="utf-8") as f:
+        xml = f.read()
+    assert normalize(xml, engine="native") == normalize(xml, engine="xslt")
+
+
+def test_native_parity_adversarial():
+    assert normalize(ADVERSARIAL, engine="native") == normalize(ADVERSARIAL, engine="xslt")
+
+
+@pytest.mark.parametrize(
+    "doctype, text",
+    [
+        ('<!DOCTYPE eml:eml SYSTEM "eml.dtd">', "lead  text"),
+        ('<!DOCTYPE eml:eml [<!ENTITY lead "  entity\xa0 lead ">]>', "&lead;  text"),
+    ],
+)
+def test_native_parity_doctype(doctype, text):
+    xml = ADVERSARIAL.replace("<!-- leading", f"{doctype}\n<!-- leading").replace("lead  text", text)
+    native = normalize(xml, engine="native")
+    assert native == normalize(xml, engine="xslt")
+    assert "DOCTYPE" not in native
+
+
+def test_unknown_engine():
+    with pytest.raises(ValueError):
+        normalize("<eml/>", engine="sed")
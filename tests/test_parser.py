@@ -14,8 +14,9 @@
 """
 import pytest
 
+import emlvp.document as document
 import emlvp.exceptions as exceptions
-from emlvp.parser import Parser
+from emlvp.parser import DocumentIndex, Parser
 
 
 def test_parse_valid(test_data):
@@ -37,8 +38,14 @@ def test_parse_inspection(test_data):
     with open(f"{test_data}/eml-2.2.0-fail-slow.xml", "r", encoding="utf-8") as f:
         xml = f.read()
     p = Parser(fail_fast=False)
-    with pytest.raises(exceptions.ParseError):
+    with pytest.raises(exceptions.ParseError) as e:
+        p.parse(xml)
+    assert list(e.value.failures) == ["duplicate-id", "circular-reference"]
+    assert str(e.value) == "\n".join(e.value.failures.values())
+    p = Parser(fail_fast=True)
+    with pytest.raises(exceptions.ParseError) as e:
         p.parse(xml)
+    assert list(e.value.failures) == ["duplicate-id"]
 
 
 def test_parse_missing_additional_metadata_describes_id(test_data):
@@ -95,3 +102,118 @@ def test_parse_system_inconsistency(test_data):
     p = Parser()
     with pytest.raises(exceptions.ParseError):
         p.parse(xml)
+
+
+def test_parse_tree(test_data):
+    with open(f"{test_data}/eml-2.2.0-duplicate-id.xml", "r", encoding="utf-8") as f:
+        xml = f.read()
+    tree = document.parse(xml)
+    p = Parser()
+    with pytest.raises(exceptions.ParseError):
+        p.parse_tree(tree)
+
+
+def test_parse_fail_fast_reports_first_check(test_data):
+    with open(f"{test_data}/eml-2.2.0-fail-slow.xml", "r", encoding="utf-8") as f:
+        xml = f.read()
+    with pytest.raises(exceptions.ParseError) as slow:
+        Parser(fail_fast=False).parse(xml)
+    with pytest.raises(exceptions.ParseError) as fast:
+        Parser(fail_fast=True).parse(xml)
+    assert str(fast.value) == "Duplicate id(s): ['some_citation_id']\n"
+    assert str(slow.value).startswith(str(fast.value))
+
+
+def test_document_index():
+    xml = """<eml:eml xmlns:eml="https://eml.ecoinformatics.org/eml-2.2.0">
+      <dataset id="d1">
+        <a><b><annotation/><c><annotation/></c></b></a>
+        <attribute id="a1" system="s"/>
+        <attribute id="a1"/>
+        <attribute><references>a1</references></attribute>
+        <customUnit>u1</customUnit>
+        <customUnit>u2</customUnit>
+      </dataset>
+      <annotations><annotation references="d1"/><annotation references="x"/></annotations>
+      <additionalMetadata>
+        <describes>d1</describes>
+        <metadata><unitList><unit id="u1"/></unitList></metadata>
+      </additionalMetadata>
+    </eml:eml>"""
+    index = DocumentIndex.from_tree(document.parse(xml))
+    assert list(index.duplicate_ids) == ["a1"]
+    assert index.ids["a1"] == ("attribute", "s")
+    assert index.references == [("a1", None, None)]
+    assert [tag for _, tag in sorted(index.annotation_parents)] == ["b", "c"]
+    assert list(index.annotation_references) == ["d1", "x"]
+    assert list(index.describes) == ["d1"]
+    assert index.unit_ids == {"u1"}
+    with pytest.raises(exceptions.ParseError) as e:
+        Parser().parse(xml)
+    assert "Missing custom unit id(s): ['u2']" in str(e.value)
+
+
+def test_parse_checks(test_data):
+    with open(f"{test_data}/eml-2.2.0-fail-slow.xml", "r", encoding="utf-8") as f:
+        xml = f.read()
+    p = Parser(checks=["circular-reference", "duplicate-id"])
+    assert p.checks == ("duplicate-id", "circular-reference") and not p.ids_only
+    p = Parser(checks=["circular-reference"])
+    with pytest.raises(exceptions.ParseError) as e:
+        p.parse(xml)
+    assert list(e.value.failures) == ["circular-reference"]
+    Parser(checks=[]).parse(xml)
+    with pytest.raises(ValueError):
+        Parser(checks=["no-such-check"])
+
+
+@pytest.mark.parametrize("name", ["eml-2.2.0.xml", "eml-2.2.0-fail-slow.xml", "eml-2.2.0-duplicate-id.xml"])
+def test_document_index_ids(test_data, name):
+    with open(f"{test_data}/{name}", "rb") as f:
+        tree = document.parse(f.read())
+    index = DocumentIndex.from_tree(tree)
+    ids = DocumentIndex.ids_from_tree(tree)
+    assert list(ids.ids) == list(index.ids)
+    assert ids.duplicate_ids == index.duplicate_ids
+    p = Parser(checks=["duplicate-id"])
+    assert p.ids_only
+    try:
+        Parser().parse_tree(tree)
+        expected = None
+    except exceptions.ParseError as e:
+        expected = e.failures.get("duplicate-id")
+    try:
+        p.parse_tree(tree)
+        assert expected is None
+    except exceptions.ParseError as e:
+        assert e.failures == {"duplicate-id": expected}
+
+
+@pytest.mark.parametrize(
+    "name",
+    [
+        "eml-2.2.0.xml",
+        "eml-2.2.0-fail-slow.xml",
+        "eml-2.2.0-missing-annotation-parent-id.xml",
+        "eml-2.2.0-missing-custom-unit-id.xml",
+        "eml-2.2.0-syntax-error.xml",
+    ],
+)
+def test_parse_stream(test_data, name):
+    with open(f"{test_data}/{name}", "r", encoding="utf-8") as f:
+        xml = f.read()
+    try:
+        Parser().parse(xml)
+        expected = None
+    except exceptions.EMLVPError as e:
+        expected = (type(e), str(e))
+    try:
+        Parser().parse_stream(f"{test_data}/{name}")
+        streamed = None
+    except exceptions.EMLVPError as e:
+        streamed = (type(e), str(e))
+    if expected is not None and expected[0] is exceptions.XMLSyntaxError:
+        # Syntax error messages name the source, which is the file rather than "<string>" when streaming
+        assert streamed[0] is exceptions.XMLSyntaxError
+    else:
+        assert streamed == expected
@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+:Mod: test_parser_pool
+
+:Synopsis:
+
+:Author:
+    servilla
+
+:Created:
+    10/18/26
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import emlvp.document as document
+import emlvp.exceptions as exceptions
+from emlvp.parser_pool import ParserPool, pool
+
+
+DEEP = "<a>" * 300 + "</a>" * 300
+
+
+def test_get_per_thread():
+    p = ParserPool()
+    assert p.get() is p.get()
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        other = executor.submit(p.get).result()
+    assert other is not p.get()
+
+
+def test_configure():
+    p = ParserPool()
+    parser = p.get()
+    p.configure(remove_blank_text=False)
+    assert p.get() is parser
+    p.configure(huge_tree=True)
+    assert p.get() is not parser
+    assert p.options == dict(huge_tree=True, remove_blank_text=False)
+    assert p.iterparse_options()["huge_tree"] and p.iterparse_options()["encoding"] == "utf-8"
+
+
+def test_huge_tree():
+    with pytest.raises(exceptions.XMLSyntaxError):
+        document.parse(DEEP)
+    try:
+        pool.configure(huge_tree=True)
+        assert document.parse(DEEP).getroot().tag == "a"
+    finally:
+        pool.configure(huge_tree=False)
@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+:Mod: test_pipeline
+
+:Synopsis:
+
+:Author:
+    servilla
+
+:Created:
+    10/18/26
+"""
+import pytest
+
+from emlvp import pipeline
+from emlvp.timings import Timings
+
+
+def _read(test_data, name: str) -> bytes:
+    with open(f"{test_data}/{name}", "rb") as f:
+        return f.read()
+
+
+def test_check(test_data):
+    result = pipeline.check(_read(test_data, "eml-2.2.0.xml"), doc="eml-2.2.0.xml")
+    assert result.valid and result.version == "2.2.0"
+    assert result.to_dict()["document"] == "eml-2.2.0.xml"
+    assert set(result.stages.values()) == {"ok"}
+    assert result.timings is None and result.output is None
+
+
+@pytest.mark.parametrize("streaming_threshold", [None, 0])
+def test_check_file_declared_encoding(test_data, tmp_path, streaming_threshold):
+    # Documents are decoded as UTF-8 whatever encoding is declared, whether streamed or parsed
+    xml = _read(test_data, "eml-2.2.0.xml").decode("utf-8")
+    xml = xml.replace('encoding="UTF-8"', 'encoding="ISO-8859-1"').replace("Evidence", "Évidence", 1)
+    utf8 = tmp_path / "utf8.xml"
+    utf8.write_bytes(xml.encode("utf-8"))
+    latin1 = tmp_path / "latin1.xml"
+    latin1.write_bytes(xml.encode("utf-8").replace("É".encode("utf-8"), "É".encode("latin-1")))
+    assert pipeline.check_file(str(utf8), streaming_threshold=streaming_threshold).valid
+    result = pipeline.check_file(str(latin1), streaming_threshold=streaming_threshold)
+    assert [error.type for error in result.errors] == ["UTF8Error"]
+
+
+def test_check_invalid(test_data):
+    result = pipeline.check(_read(test_data, "eml-2.2.0-invalid.xml"))
+    assert not result.valid
+    assert result.stages["validate"] == "failed" and "parse" not in result.stages
+    assert all(e.type == "ValidationError" and e.line for e in result.errors)
+
+
+def test_check_parse(test_data):
+    result = pipeline.check(_read(test_data, "eml-2.2.0-fail-slow.xml"))
+    assert [e.check for e in result.errors] == ["duplicate-id", "circular-reference"]
+    assert result.stages["parse"] == result.stages["check:duplicate-id"] == "failed"
+    assert result.stages["check:references"] == "ok"
+
+
+def test_check_dereference(test_data):
+    result = pipeline.check(_read(test_data, "eml-2.2.0-dereference.xml"), dereference=True)
+    assert result.valid
+    assert "<references" not in result.output
+
+
+def test_check_file(test_data):
+    result = pipeline.check_file(f"{test_data}/eml-2.2.0-syntax-error.xml", timings=Timings())
+    assert result.stages["xml-parse"] == "failed"
+    assert result.errors[0].type == "XMLSyntaxError" and result.errors[0].line == 2080
+    assert list(result.timings) == list(result.stages)
+    streamed = pipeline.check_file(f"{test_data}/eml-2.2.0-invalid.xml", streaming_threshold=0)
+    assert "read" not in streamed.stages and streamed.stages["validate"] == "failed"
+    missing = pipeline.check_file(f"{test_data}/missing.xml", streaming_threshold=0)
+    assert missing.stages == {"sniff": "failed"}
+    assert missing.errors[0].type == "FileNotFoundError"
+
+
+def test_check_checks(test_data):
+    xml = _read(test_data, "eml-2.2.0-invalid.xml")
+    result = pipeline.check(xml, checks=["duplicate-id"])
+    assert result.valid and "schema" not in result.stages and "validate" not in result.stages
+    result = pipeline.check(_read(test_data, "eml-2.2.0-fail-slow.xml"), checks=["schema", "circular-reference"])
+    assert [e.check for e in result.errors] == ["circular-reference"]
+    result = pipeline.check(xml, checks=["bogus"])
+    assert not result.valid and result.errors[0].type == "ValueError"
+
+
+def test_check_fail_fast_order(test_data):
+    # Scanning only ids is cheaper than validation, which is cheaper than the full parser walk
+    result = pipeline.check(_read(test_data, "eml-2.2.0-circular-reference.xml"), fail_fast=True, timings=Timings())
+    stages = list(result.timings)
+    assert stages.index("check:duplicate-id") < stages.index("validate") < stages.index("check:references")
+    assert result.errors[0].check == "circular-reference"
+    # A duplicate id fails fast without validating the document
+    for checks in (None, ["schema", "duplicate-id"]):
+        result = pipeline.check(_read(test_data, "eml-2.2.0-duplicate-id.xml"), fail_fast=True, checks=checks)
+        assert result.stages["parse"] == "failed" and "validate" not in result.stages
+    result = pipeline.check(_read(test_data, "eml-2.2.0-fail-slow.xml"), checks=["schema", "duplicate-id"])
+    assert list(result.stages).index("validate") < list(result.stages).index("parse")
+
+
+def test_check_output(test_data, tmp_path):
+    xml = _read(test_data, "eml-2.2.0.xml")
+    output = str(tmp_path / "eml-2.2.0.xml")
+    result = pipeline.check(xml, normalize=True, output=output)
+    assert result.valid and result.output is None and result.stages["serialize"] == "ok"
+    with open(output, "r", encoding="utf-8") as f:
+        assert f.read() == pipeline.check(xml, normalize=True).output
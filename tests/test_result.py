@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+:Mod: test_result
+
+:Synopsis:
+
+:Author:
+    servilla
+
+:Created:
+    10/18/26
+"""
+import json
+import pickle
+
+import pytest
+
+from emlvp import exceptions
+from emlvp.result import Error, errors_from, Result
+
+
+def test_result():
+    result = Result("edi.1.1.xml")
+    result.version = "2.2.0"
+    result.stages = {"validate": "ok", "parse": "failed"}
+    result.errors = [Error("ParseError", "Duplicate id(s): ['a']", check="duplicate-id")]
+    assert not result.valid
+    with pytest.raises(AttributeError):
+        result.extra = True
+    assert json.loads(result.to_json()) == dict(
+        document="edi.1.1.xml",
+        valid=False,
+        version="2.2.0",
+        stages={"validate": "ok", "parse": "failed"},
+        errors=[dict(type="ParseError", message="Duplicate id(s): ['a']", check="duplicate-id")],
+    )
+    # Results are returned from worker processes
+    assert pickle.loads(pickle.dumps(result)).to_dict() == result.to_dict()
+
+
+def test_errors_from():
+    assert [e.to_dict() for e in errors_from(ValueError("Cannot determine EML schema"))] == [
+        dict(type="ValueError", message="Cannot determine EML schema")
+    ]
+    e = exceptions.ParseError("Missing references id(s): ['b']")
+    assert errors_from(e)[0].check is None
+
@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+:Mod: test_result_cache
+
+:Synopsis:
+
+:Author:
+    servilla
+
+:Created:
+    10/18/26
+"""
+import os
+
+from emlvp.result_cache import ResultCache
+
+
+def test_put_get(tmp_path):
+    doc = tmp_path / "doc.xml"
+    doc.write_text("<eml/>", encoding="utf-8")
+    cache = ResultCache(str(tmp_path / "cache.db"))
+    key = cache.key(str(doc), {"normalize": False})
+    assert cache.get(key) is None
+    cache.put(key, "report\n", True)
+    assert cache.get(key) == ("report\n", True)
+    assert cache.key(str(doc), {"normalize": True}) != key
+    assert (cache.hits, cache.misses) == (1, 1)
+    cache.close()
+
+    cache = ResultCache(str(tmp_path / "cache.db"))
+    assert cache.get(key) == ("report\n", True)
+    cache.close()
+
+    cache = ResultCache(str(tmp_path / "cache.db"), refresh=True)
+    assert cache.get(key) is None
+    cache.close()
+
+
+def test_digest(tmp_path):
+    doc = tmp_path / "doc.xml"
+    doc.write_text("<eml/>", encoding="utf-8")
+    cache = ResultCache(str(tmp_path / "cache.db"))
+    digest = cache.digest(str(doc))
+    assert cache.digest(str(doc)) == digest
+
+    # Unchanged modification time and size is trusted without re-hashing
+    stat = os.stat(doc)
+    doc.write_text("<EML/>", encoding="utf-8")
+    os.utime(doc, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert cache.digest(str(doc)) == digest
+
+    doc.write_text("<eml></eml>", encoding="utf-8")
+    assert cache.digest(str(doc)) != digest
+    cache.close()
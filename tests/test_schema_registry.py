@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+:Mod: test_schema_registry
+
+:Synopsis:
+
+:Author:
+    servilla
+
+:Created:
+    10/18/26
+"""
+from concurrent.futures import ThreadPoolExecutor
+import gc
+import threading
+
+import pytest
+
+from emlvp.schema_registry import SchemaRegistry, schema_file
+from emlvp.validator import Validator
+
+
+def test_get_compiles_once(schema_path):
+    r = SchemaRegistry()
+    s1 = r.get(schema_path + "/EML2.2.0/xsd/eml.xsd")
+    s2 = r.get(schema_path + "/EML2.2.0/xsd/../xsd/eml.xsd")
+    assert s1 is s2
+    info = r.cache_info()
+    assert info.hits == 1
+    assert info.misses == 1
+    assert info.size == 1
+
+
+def test_warm():
+    r = SchemaRegistry()
+    r.warm(("2.1.0", "2.2.0"))
+    assert r.cache_info().misses == 2
+    r.get(schema_file("2.1.0"))
+    assert r.cache_info().hits == 1
+
+
+def test_unsupported_version():
+    with pytest.raises(ValueError):
+        schema_file("1.0.0")
+
+
+def test_concurrent_get():
+    r = SchemaRegistry()
+    schemas = []
+    threads = [
+        threading.Thread(target=lambda: schemas.append(r.get(schema_file("2.2.0"))))
+        for _ in range(8)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    # Each thread compiles its own schema, which it reuses
+    assert len(set(id(s) for s in schemas)) == 8
+    assert r.cache_info().misses == 8
+    assert r.get(schema_file("2.2.0")) is r.get(schema_file("2.2.0"))
+
+
+def test_concurrent_first_compile(test_data):
+    with open(f"{test_data}/eml-2.2.0.xml", "rb") as f:
+        xml = f.read()
+    r = SchemaRegistry()
+    errors = []
+
+    def validate():
+        try:
+            Validator(schema_file("2.2.0"), schema_registry=r).validate(xml)
+        except Exception as e:
+            errors.append(e)
+
+    # Every thread starts against an empty registry and compiles its schema at the same time as the others
+    threads = [threading.Thread(target=validate) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert r.cache_info().misses == 8
+
+
+def test_thread_exit_releases_schemas():
+    r = SchemaRegistry()
+    for _ in range(3):
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(lambda _: r.get(schema_file("2.2.0")), range(16)))
+        gc.collect()
+        # The schemas of the threads of a finished pool are released rather than accumulating
+        assert r.cache_info().size == 0
+    r.get(schema_file("2.2.0"))
+    assert r.cache_info().size == 1
+
+
+def test_validator_uses_registry(test_data):
+    with open(f"{test_data}/eml-2.2.0.xml", "r", encoding="utf-8") as f:
+        xml = f.read()
+    r = SchemaRegistry()
+    v = Validator(schema_file("2.2.0"), schema_registry=r)
+    v.validate(xml)
+    v.validate(xml)
+    assert r.cache_info().misses == 1
+    assert r.cache_info().hits == 1
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+:Mod: test_server
+
+:Synopsis:
+
+:Author:
+    servilla
+
+:Created:
+    10/18/26
+"""
+import http.client
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from emlvp import generator, server
+
+
+@pytest.fixture(scope="module")
+def service():
+    s = server.ValidationServer(("127.0.0.1", 0), workers=1, queue_size=0)
+    thread = threading.Thread(target=s.serve_forever, daemon=True)
+    thread.start()
+    yield s
+    s.shutdown()
+    s.server_close()
+
+
+def _post(service, body: bytes, query: str = "") -> tuple:
+    host, port = service.server_address
+    request = urllib.request.Request(f"http://{host}:{port}/validate{query}", data=body, method="POST")
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def _read(test_data, name: str) -> bytes:
+    with open(f"{test_data}/{name}", "rb") as f:
+        return f.read()
+
+
+def test_validate(service, test_data):
+    status, result = _post(service, _read(test_data, "eml-2.2.0.xml"))
+    assert status == 200
+    assert result["valid"] and result["version"] == "2.2.0"
+    status, result = _post(service, _read(test_data, "eml-2.2.0-duplicate-id.xml"), "?fail_fast=true")
+    assert status == 200
+    assert not result["valid"]
+    status, result = _post(service, _read(test_data, "eml-2.2.0-syntax-error.xml"), "?normalize=true")
+    assert status == 200
+    assert result["errors"][0]["type"] == "XMLSyntaxError"
+    status, result = _post(service, b"<eml")
+    assert status == 200
+    assert result["errors"] == [dict(type="ValueError", message="Cannot determine EML schema")]
+
+
+def test_busy(service, test_data):
+    # With one worker and no queue, a request is refused while the only slot is taken
+    assert service.slots.acquire(blocking=False)
+    try:
+        status, result = _post(service, _read(test_data, "eml-2.2.0.xml"))
+    finally:
+        service.slots.release()
+    assert status == 503
+    assert result == dict(error="Server busy")
+
+
+def test_bad_request(service):
+    status, _ = _post(service, b"", "?normalize_engine=unknown")
+    assert status == 400
+    host, port = service.server_address
+    with urllib.request.urlopen(f"http://{host}:{port}/health") as response:
+        health = json.loads(response.read())
+    assert health["status"] == "ok" and health["workers"] == 1
+
+
+def test_content_length(service):
+    host, port = service.server_address
+    for length, status in ((None, 411), ("ten", 400), ("-1", 400)):
+        connection = http.client.HTTPConnection(host, port, timeout=10)
+        try:
+            connection.putrequest("POST", "/validate")
+            if length is not None:
+                connection.putheader("Content-Length", length)
+            connection.endheaders()
+            assert connection.getresponse().status == status
+        finally:
+            connection.close()
+
+
+def test_timeout_holds_slot():
+    s = server.ValidationServer(("127.0.0.1", 0), workers=1, queue_size=0, timeout=0.01)
+    thread = threading.Thread(target=s.serve_forever, daemon=True)
+    thread.start()
+    try:
+        status, _ = _post(s, generator.generate(entities=1000).encode("utf-8"))
+        assert status == 504
+        # The worker is still processing the timed out document, so there is no slot for another
+        status, _ = _post(s, b"<eml/>")
+        assert status == 503
+        assert s.slots.acquire(timeout=30)
+        s.slots.release()
+    finally:
+        s.shutdown()
+        s.server_close()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+:Mod: test_sniffer
+
+:Synopsis:
+
+:Author:
+    servilla
+
+:Created:
+    10/18/26
+"""
+import pytest
+
+from emlvp.exceptions import XMLSyntaxError
+import emlvp.sniffer as sniffer
+
+
+def test_sniff_version(test_data):
+    assert sniffer.sniff_version(f"{test_data}/eml-2.2.0.xml") == "2.2.0"
+    assert sniffer.sniff_version(f"{test_data}/eml-2.2.0-dereference.xml") == "2.1.0"
+    # Root element is not in an EML namespace, but the EML 2.2.0 namespace is declared on it
+    assert sniffer.sniff_version(f"{test_data}/eml-2.2.0-missing-eml-tag.xml") == "2.2.0"
+
+
+def test_sniff_version_ignores_content():
+    xml = (
+        b'<eml:eml xmlns:eml="eml://ecoinformatics.org/eml-2.1.0">'
+        b"<dataset><title>Migrated to https://eml.ecoinformatics.org/eml-2.2.0</title></dataset></eml:eml>"
+    )
+    assert sniffer.sniff_version(xml) == "2.1.0"
+
+
+def test_sniff_version_reads_prologue_only(tmp_path):
+    doc = tmp_path / "eml.xml"
+    doc.write_bytes(b'<eml:eml xmlns:eml="https://eml.ecoinformatics.org/eml-2.2.0">' + b"</not-xml>" * 100000)
+    assert sniffer.sniff_version(str(doc)) == "2.2.0"
+    doc.write_bytes(b'<eml:eml xmlns:eml="https://eml.ecoinformatics.org/eml-9.9.9">' + b"</not-xml>" * 100000)
+    with pytest.raises(ValueError):
+        sniffer.sniff_version(str(doc))
+
+
+def test_sniff_version_syntax_error():
+    with pytest.raises(XMLSyntaxError):
+        sniffer.sniff_version(b'<eml:eml xmlns:eml="https://eml.ecoinformatics.org/eml-2.2.0" <dataset/>')
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+:Mod: test_timings
+
+:Synopsis:
+
+:Author:
+    servilla
+
+:Created:
+    10/18/26
+"""
+import pstats
+import re
+
+import pytest
+
+import emlvp.parser as parser
+from emlvp.timings import NO_TIMINGS, Timings
+
+
+def test_timings(test_data, tmp_path):
+    with open(f"{test_data}/eml-2.2.0.xml", "r", encoding="utf-8") as f:
+        xml = f.read()
+    timings = Timings(profile_dir=str(tmp_path), label=f"{test_data}/eml-2.2.0.xml")
+    with timings.stage("parse"):
+        parser.Parser(timings=timings).parse(xml)
+    assert list(timings.stages) == [f"check:{name}" for name in parser.CHECKS] + ["parse"]
+    assert timings.stages["parse"] >= sum(timings.stages[f"check:{name}"] for name in parser.CHECKS)
+    timings.dump_profiles()
+    # Only the outermost stage is profiled
+    profiles = [p.name for p in tmp_path.iterdir()]
+    assert len(profiles) == 1 and re.fullmatch(r"eml-2\.2\.0\.xml-[0-9a-f]{8}\.parse\.prof", profiles[0])
+    pstats.Stats(str(tmp_path / profiles[0]))
+
+
+def test_timings_profile_labels(tmp_path):
+    # Documents with the same file name in different directories or archives do not share profiles
+    labels = ["a/eml.xml", "b/eml.xml", "corpus.zip/a/eml.xml"]
+    for label in labels:
+        timings = Timings(profile_dir=str(tmp_path), label=label)
+        with timings.stage("parse"):
+            pass
+        timings.dump_profiles()
+    assert len(list(tmp_path.iterdir())) == len(labels)
+
+
+def test_timings_failed():
+    timings = Timings()
+    with pytest.raises(ValueError):
+        with timings.stage("parse"):
+            with timings.stage("check:references"):
+                raise ValueError("Missing references id(s)")
+    # The outermost stage that failed
+    assert timings.failed == "parse"
+    assert list(timings.stages) == ["check:references", "parse"]
+
+
+def test_no_timings():
+    with NO_TIMINGS.stage("parse"):
+        pass
+    assert NO_TIMINGS.stage("parse") is NO_TIMINGS.stage("validate")
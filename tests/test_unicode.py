@@ -12,6 +12,10 @@
 :Created:
     4/11/24
 """
+from pathlib import Path
+
+import pytest
+
 import emlvp.unicode_inspector as ui
 
 
@@ -20,3 +24,28 @@ def test_unicode_list(test_data):
         xml = f.read()
     unicode_list = ui.unicode_list(xml)
     assert len(unicode_list) == 61
+
+
+@pytest.mark.parametrize(
+    "xml",
+    [
+        "",
+        "<eml/>",
+        "a\x7fb\n\n\xe9\r\n\U0001F600x\n",
+        "\n\xa0",
+        "\xe9\n\n\xe9x\xe9",
+    ],
+)
+def test_unicode_list_engines_strings(xml):
+    assert ui.unicode_list(xml) == ui.unicode_list(xml, engine="python")
+
+
+def test_unicode_list_engines_files(test_data):
+    for file in sorted(Path(test_data).glob("*.xml")):
+        xml = file.read_text(encoding="utf-8")
+        assert ui.unicode_list(xml) == ui.unicode_list(xml, engine="python"), file.name
+
+
+def test_unicode_list_unknown_engine():
+    with pytest.raises(ValueError):
+        ui.unicode_list("<eml/>", engine="numpy")
@@ -12,8 +12,11 @@
 :Created:
     1/21/23
 """
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
 
+import emlvp.document as document
 import emlvp.exceptions as exceptions
 from emlvp.validator import Validator
 
@@ -25,6 +28,26 @@ def test_validate_valid(test_data, schema_path):
     v.validate(xml)
 
 
+def test_validate_threads(test_data, schema_path):
+    # Validators of one schema used concurrently report only the errors of their own document
+    docs = {}
+    for name in ("eml-2.2.0.xml", "eml-2.2.0-invalid.xml"):
+        with open(f"{test_data}/{name}", "r", encoding="utf-8") as f:
+            docs[name] = f.read()
+
+    def validate(name):
+        try:
+            Validator(schema_path + "/EML2.2.0/xsd/eml.xsd").validate(docs[name])
+        except exceptions.ValidationError as e:
+            return str(e)
+
+    names = list(docs) * 20
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        errors = list(executor.map(validate, names))
+    assert errors[0] is None and errors[1] is not None
+    assert errors == errors[:2] * 20
+
+
 def test_validate_invalid(test_data, schema_path):
     with open(f"{test_data}/eml-2.2.0-invalid.xml", "r", encoding="utf-8") as f:
         xml = f.read()
@@ -55,3 +78,19 @@ def test_validate_syntax_error(test_data, schema_path):
     v = Validator(schema_path + "/EML2.2.0/xsd/eml.xsd")
     with pytest.raises(exceptions.XMLSyntaxError):
         v.validate(xml)
+
+
+def test_validate_tree(test_data, schema_path):
+    with open(f"{test_data}/eml-2.2.0-invalid.xml", "r", encoding="utf-8") as f:
+        xml = f.read()
+    tree = document.parse(xml)
+    v = Validator(schema_path + "/EML2.2.0/xsd/eml.xsd")
+    with pytest.raises(exceptions.ValidationError):
+        v.validate_tree(tree)
+
+
+def test_validate_stream(test_data, schema_path):
+    v = Validator(schema_path + "/EML2.2.0/xsd/eml.xsd")
+    v.validate_stream(f"{test_data}/eml-2.2.0.xml")
+    with pytest.raises(exceptions.ValidationError):
+        v.validate_stream(f"{test_data}/eml-2.2.0-invalid.xml")
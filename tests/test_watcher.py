@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+:Mod: test_watcher
+
+:Synopsis:
+
+:Author:
+    servilla
+
+:Created:
+    10/18/26
+"""
+import contextlib
+import os
+import time
+import zipfile
+
+import pytest
+
+from emlvp.watcher import watch
+
+
+def test_watch(tmp_path):
+    a = tmp_path / "a.xml"
+    a.write_text("<a/>")
+    (tmp_path / "notes.txt").write_text("")
+    with contextlib.closing(watch([str(tmp_path)], interval=0.01, debounce=0.05)) as changes:
+        assert next(changes) == ([str(a)], [])
+        start = time.monotonic()
+        b = tmp_path / "b.xml"
+        # A burst of saves is reported once
+        for i in range(5):
+            b.write_text("<b>" + "x" * i + "</b>")
+        a.write_text("<a>changed</a>")
+        reported = []
+        while len(reported) < 2:
+            changed, removed = next(changes)
+            reported.extend(changed)
+        assert sorted(reported) == sorted([str(a), str(b)])
+        assert time.monotonic() - start < 1
+        a.unlink()
+        assert next(changes) == ([], [str(a)])
+
+
+def test_watch_missing_target(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        next(watch([str(tmp_path / "missing")]))
+
+
+def test_watch_renamed_target(tmp_path):
+    # An editor that saves by renaming a new file over the target leaves it briefly missing
+    a = tmp_path / "a.xml"
+    a.write_text("<a/>")
+    with contextlib.closing(watch([str(a)], interval=0.01, debounce=0.05)) as changes:
+        assert next(changes) == ([str(a)], [])
+        saved = tmp_path / "a.xml.tmp"
+        saved.write_text("<a>saved</a>")
+        a.unlink()
+        assert next(changes) == ([], [str(a)])
+        os.replace(saved, a)
+        assert next(changes) == ([str(a)], [])
+
+
+def test_watch_archive(tmp_path):
+    archive = tmp_path / "corpus.zip"
+    with zipfile.ZipFile(archive, "w") as z:
+        z.writestr("eml.xml", "<eml/>")
+    with pytest.raises(ValueError):
+        next(watch([str(archive)]))